@@ -0,0 +1,184 @@
+# async_api.py
+import asyncio
+import weakref
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, List, Callable, AsyncIterator
+from pathlib import Path
+
+from core import extraer_frames, unir_frames_en_video
+
+
+
+
+
+
+
+
+
+
+'''
+>>> API asíncrona para servicios basados en asyncio
+'''
+class AsyncJob:
+    """
+    Trabajo de extracción o unión en curso en un ejecutor administrado.
+
+    Se espera con `await job` y su progreso se consume con `async for evento in job.events()`.
+    Cancelar la tarea que espera el trabajo activa su cancel_event, espera a que el hilo
+    libere la captura/el escritor de video (como mucho lo que tarda un frame) y propaga la
+    cancelación.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, funcion: Callable, args: tuple, opciones: dict,
+                 executor: ThreadPoolExecutor, semaforo: asyncio.Semaphore, event_buffer: int):
+        self._loop = loop
+        self._cancel = threading.Event()
+        self._cola = asyncio.Queue(maxsize=max(1, event_buffer))
+        self._suscrito = False
+
+        # Respetar un on_event propio del llamador además de la cola de eventos
+        on_event = opciones.pop('on_event', None)
+
+        def al_evento(evento):
+            if on_event is not None:
+                on_event(evento)
+            if not self._suscrito or self._cancel.is_set():
+                return
+            # Bloquea el hilo de trabajo mientras el consumidor va atrasado (contrapresión)
+            asyncio.run_coroutine_threadsafe(self._cola.put(evento), self._loop).result()
+
+        async def ejecutar():
+            async with semaforo:
+                if self._cancel.is_set():
+                    raise asyncio.CancelledError()
+                return await self._loop.run_in_executor(
+                    executor, lambda: funcion(*args, on_event=al_evento, cancel_event=self._cancel, **opciones)
+                )
+
+        self._tarea = loop.create_task(ejecutar())
+
+    def _drenar(self):
+        """Vacía la cola de eventos para desbloquear al hilo de trabajo."""
+        while not self._cola.empty():
+            self._cola.get_nowait()
+
+    def cancel(self):
+        """Pide detener el trabajo; `await job` devolverá el resultado parcial."""
+        self._cancel.set()
+        self._drenar()
+
+    def done(self) -> bool:
+        return self._tarea.done()
+
+    async def events(self) -> AsyncIterator:
+        """
+        Itera los eventos del trabajo (VideoStartEvent, ProgressEvent, VideoSummaryEvent)
+        hasta que termina. Solo se encolan eventos mientras hay un iterador activo, por lo
+        que conviene empezar a iterar antes de esperar el trabajo.
+        """
+        self._suscrito = True
+        try:
+            while True:
+                if self._cola.empty() and self._tarea.done():
+                    return
+                obtener = asyncio.ensure_future(self._cola.get())
+                await asyncio.wait({obtener, self._tarea}, return_when=asyncio.FIRST_COMPLETED)
+                if obtener.done():
+                    yield obtener.result()
+                else:
+                    obtener.cancel()
+        finally:
+            self._suscrito = False
+            self._drenar()
+
+    async def wait(self):
+        """Espera el resultado; si se cancela la espera, se detiene y libera el trabajo."""
+        try:
+            return await asyncio.shield(self._tarea)
+        except asyncio.CancelledError:
+            self.cancel()
+            if not self._tarea.done():
+                try:
+                    await self._tarea
+                except BaseException:
+                    pass
+            raise
+
+    def __await__(self):
+        return self.wait().__await__()
+
+
+class AsyncFrameService:
+    """
+    Ejecuta extracciones y uniones sin bloquear el bucle de eventos, en un ejecutor propio
+    con un límite de trabajos simultáneos; el resto espera su turno.
+
+    Se puede usar desde varios bucles de eventos (p. ej. llamadas sucesivas a asyncio.run):
+    cada bucle tiene su propio semáforo y el ejecutor, compartido, limita el total de hilos.
+
+    La decodificación, la codificación y las escrituras de archivos ocurren en hilos del
+    ejecutor (y en los hilos de escritura de `workers`), nunca en el bucle de eventos.
+    """
+
+    def __init__(self, max_concurrency: int = 2, event_buffer: int = 64):
+        """
+        Args:
+            max_concurrency: Trabajos que se ejecutan a la vez
+            event_buffer: Eventos encolados antes de frenar al trabajo si el consumidor va atrasado
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.event_buffer = event_buffer
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='frames')
+        # Un asyncio.Semaphore queda ligado al bucle en el que se usa por primera vez
+        self._semaforos = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _semaforo(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            semaforo = self._semaforos.get(loop)
+            if semaforo is None:
+                semaforo = self._semaforos[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaforo
+
+    def _iniciar(self, funcion: Callable, args: tuple, opciones: dict) -> AsyncJob:
+        loop = asyncio.get_running_loop()
+        return AsyncJob(loop, funcion, args, opciones, self._executor, self._semaforo(loop), self.event_buffer)
+
+    def extract(self, video_paths: Union[str, List[str]], **opciones) -> AsyncJob:
+        """Inicia extraer_frames con las mismas opciones; devuelve el trabajo en curso."""
+        return self._iniciar(extraer_frames, (video_paths,), opciones)
+
+    def join(self, frames_path: Union[str, Path], **opciones) -> AsyncJob:
+        """Inicia unir_frames_en_video con las mismas opciones; devuelve el trabajo en curso."""
+        return self._iniciar(unir_frames_en_video, (frames_path,), opciones)
+
+    def close(self):
+        """Libera el ejecutor; los trabajos en curso terminan en segundo plano."""
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_servicio_por_defecto = None
+
+
+def _servicio() -> AsyncFrameService:
+    global _servicio_por_defecto
+    if _servicio_por_defecto is None:
+        _servicio_por_defecto = AsyncFrameService()
+    return _servicio_por_defecto
+
+
+async def extraer_frames_async(video_paths: Union[str, List[str]], **opciones) -> dict:
+    """Versión asíncrona de extraer_frames sobre el servicio compartido."""
+    return await _servicio().extract(video_paths, **opciones)
+
+
+async def unir_frames_en_video_async(frames_path: Union[str, Path], **opciones) -> bool:
+    """Versión asíncrona de unir_frames_en_video sobre el servicio compartido."""
+    return await _servicio().join(frames_path, **opciones)
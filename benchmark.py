@@ -0,0 +1,316 @@
+# benchmark.py
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from pathlib import Path
+from typing import List
+
+from utils import importar_perezoso
+
+cv2 = importar_perezoso('cv2')
+np = importar_perezoso('numpy')
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Benchmarks reproducibles de extracción y unión
+'''
+# Casos rápidos (por defecto) y completos: resolución, duración, intervalo y modo de cada medición
+CASOS_RAPIDOS = [
+    {'name': 'extract_png_240p', 'operation': 'extract', 'resolution': [320, 240], 'frames': 120, 'options': {}},
+    {'name': 'extract_png_240p_i5', 'operation': 'extract', 'resolution': [320, 240], 'frames': 120, 'options': {'frame_interval': 5}},
+    {'name': 'extract_png_720p_w4', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 60, 'options': {'workers': 4}},
+    {'name': 'extract_raw_720p', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 60, 'options': {'storage': 'raw'}},
+    {'name': 'join_png_240p', 'operation': 'join', 'resolution': [320, 240], 'frames': 120, 'options': {}},
+    {'name': 'join_raw_720p', 'operation': 'join', 'resolution': [1280, 720], 'frames': 60, 'options': {}, 'extract_options': {'storage': 'raw'}},
+    {'name': 'extract_archive_240p', 'operation': 'extract', 'resolution': [320, 240], 'frames': 120, 'options': {'storage': 'archive'}},
+    {'name': 'join_archive_240p', 'operation': 'join', 'resolution': [320, 240], 'frames': 120, 'options': {}, 'extract_options': {'storage': 'archive'}},
+    {'name': 'extract_png_240p_p2', 'operation': 'extract', 'resolution': [320, 240], 'frames': 120, 'videos': 4, 'options': {'processes': 2}},
+    {'name': 'extract_png_720p_seg3', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 120, 'options': {'segments': 3}},
+    {'name': 'extract_png_720p_i30', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 300, 'options': {'frame_interval': 30}},
+    {'name': 'extract_png_720p_sample1', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 300, 'options': {'sample_fps': 1}},
+    {'name': 'extract_png_720p_range', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 300,
+     'options': {'start_time': 4, 'end_time': 8, 'sample_fps': 5}},
+    {'name': 'extract_png_720p_resize_gray', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 60,
+     'options': {'transforms': 'resize=320x-1,grayscale'}},
+    {'name': 'extract_png_720p_w4_budget', 'operation': 'extract', 'resolution': [1280, 720], 'frames': 60,
+     'options': {'workers': 4, 'max_inflight_bytes': 2 * 1280 * 720 * 3}},
+    {'name': 'join_png_720p_letterbox', 'operation': 'join', 'resolution': [1280, 720], 'frames': 60,
+     'options': {'transforms': 'letterbox=640x480'}},
+    {'name': 'join_png_720p_budget', 'operation': 'join', 'resolution': [1280, 720], 'frames': 60,
+     'options': {'max_inflight_bytes': 2 * 1280 * 720 * 3}},
+]
+
+CASOS_COMPLETOS = CASOS_RAPIDOS + [
+    {'name': 'extract_png_1080p', 'operation': 'extract', 'resolution': [1920, 1080], 'frames': 120, 'options': {}},
+    {'name': 'extract_png_1080p_w4', 'operation': 'extract', 'resolution': [1920, 1080], 'frames': 120, 'options': {'workers': 4}},
+    {'name': 'extract_jpg_1080p_w4', 'operation': 'extract', 'resolution': [1920, 1080], 'frames': 120, 'options': {'workers': 4, 'image_format': 'jpg'}},
+    {'name': 'extract_bmp_1080p', 'operation': 'extract', 'resolution': [1920, 1080], 'frames': 120, 'options': {'image_format': 'bmp'}},
+    {'name': 'extract_png_1080p_i10', 'operation': 'extract', 'resolution': [1920, 1080], 'frames': 300, 'options': {'frame_interval': 10}},
+    {'name': 'join_png_1080p', 'operation': 'join', 'resolution': [1920, 1080], 'frames': 120, 'options': {'read_workers': 1}},
+    {'name': 'join_png_1080p_prefetch', 'operation': 'join', 'resolution': [1920, 1080], 'frames': 120, 'options': {'read_workers': 4}},
+]
+
+# Presupuesto de arranque en frío del motor sin interfaz (import core), en milisegundos
+PRESUPUESTO_IMPORT_MS = 100
+
+
+def generar_video(path: Path, width: int, height: int, frames: int, fps: float = 30.0):
+    """
+    Genera un video sintético determinista: degradado en movimiento, un rectángulo que
+    se desplaza, ruido leve y el número de frame, para que la compresión sea realista.
+
+    Args:
+        path: Ruta del video a crear
+        width: Ancho en píxeles
+        height: Alto en píxeles
+        frames: Cantidad de frames
+        fps: Frames por segundo
+    """
+    rng = np.random.default_rng(0)
+    ruido = rng.integers(0, 12, size=(height, width, 3), dtype=np.uint8)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+
+    out = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    for i in range(frames):
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[..., 0] = (x + i * 3) % 256
+        frame[..., 1] = (y + i * 2) % 256
+        frame[..., 2] = ((x + y) / 2 + i) % 256
+        frame += ruido
+        lado = max(8, height // 6)
+        pos = (i * 7) % max(1, width - lado)
+        frame[height // 3:height // 3 + lado, pos:pos + lado] = 255
+        cv2.putText(frame, str(i), (10, height - 10), cv2.FONT_HERSHEY_SIMPLEX, height / 240, (0, 0, 0), 2)
+        out.write(frame)
+    out.release()
+
+
+def _video_para(caso: dict, videos_dir: Path) -> Path:
+    """Devuelve (generándolo si hace falta) el video sintético de un caso."""
+    width, height = caso['resolution']
+    path = videos_dir / f"synthetic_{width}x{height}_{caso['frames']}.mp4"
+    if not path.exists():
+        videos_dir.mkdir(parents=True, exist_ok=True)
+        generar_video(path, width, height, caso['frames'])
+    return path
+
+
+def _tamano_de_carpeta(path: Path) -> int:
+    """Suma el tamaño de todos los archivos de una carpeta."""
+    return sum(archivo.stat().st_size for archivo in path.rglob('*') if archivo.is_file())
+
+
+def _pico_rss_kb() -> int:
+    """Pico de memoria residente del proceso actual en KB (None si la plataforma no lo expone)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa bytes, Linux kilobytes
+    return pico // 1024 if platform.system() == 'Darwin' else pico
+
+
+def medir_caso(caso: dict, videos_dir: Path) -> dict:
+    """
+    Ejecuta un caso en el proceso actual y mide su rendimiento.
+
+    Se llama en un subproceso por caso, de modo que el pico de RSS corresponde solo a él
+    (en los casos de unión incluye la extracción previa de los frames, que no se cronometra).
+    Los frames/s se calculan sobre los frames de origen, de modo que un muestreo o un rango
+    que evita decodificar frames se refleja como más frames/s.
+
+    Args:
+        caso: Definición del caso (operation, resolution, frames, options y, opcionalmente,
+            videos: cantidad de copias del video extraídas en la misma llamada)
+        videos_dir: Carpeta con los videos sintéticos
+
+    Returns:
+        dict: Resultado con wall_seconds, frames, fps, bytes_written y peak_rss_kb
+    """
+    from core import extraer_frames, unir_frames_en_video
+
+    video_path = _video_para(caso, videos_dir)
+    with tempfile.TemporaryDirectory(prefix='svfe-bench-') as tmp:
+        output_dir = Path(tmp) / 'frames'
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if caso['operation'] == 'extract':
+                inicio = time.perf_counter()
+                resultados = extraer_frames([str(video_path)] * caso.get('videos', 1), output_dir=output_dir,
+                                            resume=False, **caso['options'])
+                wall = time.perf_counter() - inicio
+                frames = caso['frames'] * caso.get('videos', 1)
+                ok = bool(resultados) and all(resultados.values())
+                bytes_written = _tamano_de_carpeta(output_dir)
+            else:
+                # Preparar los frames (no se mide) y medir solo la unión
+                extraer_frames(str(video_path), output_dir=output_dir, resume=False, **caso.get('extract_options', {}))
+                frames_path = output_dir / video_path.stem
+                output_path = Path(tmp) / 'joined.mp4'
+                inicio = time.perf_counter()
+                ok = unir_frames_en_video(frames_path, output_path, **caso['options'])
+                wall = time.perf_counter() - inicio
+                frames = caso['frames']
+                bytes_written = output_path.stat().st_size if output_path.exists() else 0
+
+    return {
+        'name': caso['name'],
+        'operation': caso['operation'],
+        'ok': ok,
+        'wall_seconds': round(wall, 4),
+        'frames': frames,
+        'fps': round(frames / wall, 2) if wall > 0 else None,
+        'bytes_written': bytes_written,
+        'peak_rss_kb': _pico_rss_kb(),
+    }
+
+
+def ejecutar_caso(caso: dict, videos_dir: Path) -> dict:
+    """Ejecuta un caso en un subproceso aislado y devuelve su resultado."""
+    comando = [sys.executable, str(Path(__file__).resolve()), '_caso', json.dumps(caso), str(videos_dir)]
+    proceso = subprocess.run(comando, capture_output=True, text=True, cwd=Path(__file__).resolve().parent)
+    if proceso.returncode != 0:
+        return {'name': caso['name'], 'operation': caso['operation'], 'ok': False, 'error': proceso.stderr.strip()[-500:]}
+    return json.loads(proceso.stdout)
+
+
+def medir_importacion(repeticiones: int = 5) -> dict:
+    """
+    Mide el arranque en frío de 'import core' (la mejor de varias ejecuciones).
+
+    Returns:
+        dict: Resultado con el tiempo en milisegundos y si cumple PRESUPUESTO_IMPORT_MS
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import core'],
+            capture_output=True, text=True, cwd=Path(__file__).resolve().parent
+        )
+        # La última línea de -X importtime es el módulo pedido: "import time: self | cumulative | core"
+        ultima = proceso.stderr.strip().splitlines()[-1]
+        tiempos.append(int(ultima.split('|')[1]) / 1000)
+    mejor = min(tiempos)
+    return {
+        'name': 'import_core',
+        'operation': 'import',
+        'ok': mejor <= PRESUPUESTO_IMPORT_MS,
+        'import_ms': round(mejor, 2),
+        'budget_ms': PRESUPUESTO_IMPORT_MS,
+    }
+
+
+def comparar_resultados(actual: dict, base: dict, threshold: float = 0.15) -> List[dict]:
+    """
+    Compara dos ejecuciones y devuelve los casos cuya velocidad empeoró más que el umbral.
+
+    Args:
+        actual: Resultados de la ejecución actual
+        base: Resultados de referencia
+        threshold: Caída relativa tolerada en frames/s (0.15 = 15 %)
+
+    Returns:
+        List[dict]: Regresiones con name, base_fps, fps y change
+    """
+    base_por_nombre = {r['name']: r for r in base.get('results', [])}
+    regresiones = []
+    for resultado in actual.get('results', []):
+        referencia = base_por_nombre.get(resultado['name'])
+        if not referencia or not referencia.get('fps') or not resultado.get('fps'):
+            continue
+        cambio = resultado['fps'] / referencia['fps'] - 1
+        if cambio < -threshold:
+            regresiones.append({
+                'name': resultado['name'],
+                'base_fps': referencia['fps'],
+                'fps': resultado['fps'],
+                'change': round(cambio, 4),
+            })
+    return regresiones
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Ejecuta el benchmark y opcionalmente lo compara con una ejecución anterior.
+
+    Returns:
+        int: 0 si todo terminó bien y sin regresiones, 1 en caso contrario
+    """
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Modo interno: medir un único caso en este proceso
+    if argv and argv[0] == '_caso':
+        print(json.dumps(medir_caso(json.loads(argv[1]), Path(argv[2]))))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmark de extracción y unión de frames con videos sintéticos")
+    parser.add_argument('--full', action='store_true', help='Ejecutar también los casos 1080p (más lentos)')
+    parser.add_argument('--only', nargs='+', help='Nombres de los casos a ejecutar')
+    parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--compare', help='Resultados JSON de referencia para detectar regresiones')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Caída de frames/s tolerada (0.15 = 15%%)')
+    parser.add_argument('--videos-dir', help='Carpeta donde guardar/reutilizar los videos sintéticos')
+    args = parser.parse_args(argv)
+
+    casos = CASOS_COMPLETOS if args.full else CASOS_RAPIDOS
+    if args.only:
+        casos = [caso for caso in casos if caso['name'] in args.only]
+
+    videos_dir = Path(args.videos_dir or Path(tempfile.gettempdir()) / 'svfe-bench-videos')
+    resultados = [medir_importacion()]
+    for caso in casos:
+        # Generar el video fuera del subproceso para que no cuente en su tiempo ni en su memoria
+        _video_para(caso, videos_dir)
+        resultado = ejecutar_caso(caso, videos_dir)
+        resultados.append(resultado)
+        if resultado.get('fps') is not None:
+            print(f"(OK) {resultado['name']}: {resultado['fps']} frames/s, {resultado['wall_seconds']}s, "
+                  f"{resultado['bytes_written']} bytes, pico RSS {resultado['peak_rss_kb']} KB", file=sys.stderr)
+        else:
+            print(f"(!) {resultado['name']}: {resultado.get('error') or 'falló'}", file=sys.stderr)
+
+    informe = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': resultados,
+    }
+
+    ok = all(resultado['ok'] for resultado in resultados)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as archivo:
+            informe['regressions'] = comparar_resultados(informe, json.load(archivo), args.threshold)
+        for regresion in informe['regressions']:
+            print(f"(!) Regresión en {regresion['name']}: {regresion['base_fps']} -> {regresion['fps']} frames/s "
+                  f"({regresion['change']:+.1%})", file=sys.stderr)
+        ok = ok and not informe['regressions']
+
+    texto = json.dumps(informe, indent=2)
+    if args.output:
+        Path(args.output).write_text(texto, encoding='utf-8')
+    print(texto)
+    return 0 if ok else 1
+
+
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# cache.py
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from typing import Union, Optional, List, Iterable
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Caché de extracciones direccionada por contenido
+'''
+CACHE_DIR = os.path.join('Storage', 'Cache')
+
+# Metadatos de cada entrada de la caché
+_ENTRY_FILENAME = 'entry.json'
+
+# Tamaño máximo por defecto de la caché (10 GiB)
+CACHE_MAX_BYTES = 10 * 1024 ** 3
+
+# Bytes leídos por bloque al calcular la huella del contenido
+_BLOQUE_LECTURA = 8 * 1024 * 1024
+
+# ioctl de Linux que clona un archivo compartiendo sus bloques con copia al escribir (Btrfs, XFS)
+_FICLONE = 0x40049409
+
+# Huellas ya calculadas en este proceso: (ruta, tamaño, fecha de modificación) -> huella
+_huellas = {}
+_huellas_lock = threading.Lock()
+
+
+def huella_de_contenido(video_path: Union[str, Path]) -> str:
+    """
+    Calcula el hash del archivo de video completo. Dos videos con la misma huella tienen el
+    mismo contenido byte a byte, aunque su nombre o su fecha sean distintos.
+
+    El resultado se recuerda mientras el archivo no cambie de tamaño ni de fecha, para no
+    volver a leerlo en cada extracción del mismo proceso.
+
+    Args:
+        video_path: Ruta del video
+
+    Returns:
+        str: Huella hexadecimal (BLAKE2b)
+    """
+    stat = os.stat(video_path)
+    clave = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+    with _huellas_lock:
+        if clave in _huellas:
+            return _huellas[clave]
+    hash_ = hashlib.blake2b(digest_size=32)
+    with open(video_path, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(_BLOQUE_LECTURA), b''):
+            hash_.update(bloque)
+    with _huellas_lock:
+        _huellas[clave] = hash_.hexdigest()
+    return _huellas[clave]
+
+
+def clave_de_cache(huella: str, params: dict) -> str:
+    """
+    Calcula la clave de una extracción a partir de la huella del contenido completo del
+    video (sin ruta ni fecha, para reconocer copias renombradas) y sus parámetros.
+
+    Args:
+        huella: Huella del contenido (ver huella_de_contenido)
+        params: Parámetros de la extracción
+
+    Returns:
+        str: Clave hexadecimal
+    """
+    contenido = {'content': huella, 'params': params}
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _copiar(origen: Path, destino: Path):
+    """
+    Copia origen en destino como un archivo independiente: editar uno nunca modifica el
+    otro. Donde el sistema de archivos lo permite se clona (reflink) sin duplicar los datos.
+    """
+    if destino.exists():
+        destino.unlink()
+    if sys.platform.startswith('linux'):
+        import fcntl
+        try:
+            with open(origen, 'rb') as entrada, open(destino, 'wb') as salida:
+                fcntl.ioctl(salida.fileno(), _FICLONE, entrada.fileno())
+            shutil.copystat(origen, destino)
+            return
+        except OSError:
+            pass
+    shutil.copy2(origen, destino)
+
+
+def _leer_entrada(entry_path: Path) -> Optional[dict]:
+    try:
+        with open(entry_path / _ENTRY_FILENAME, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _guardar_entrada(entry_path: Path, entrada: dict):
+    tmp_path = entry_path / (_ENTRY_FILENAME + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as archivo:
+        json.dump(entrada, archivo, indent=2)
+    os.replace(tmp_path, entry_path / _ENTRY_FILENAME)
+
+
+def materializar_desde_cache(cache_dir: Union[str, Path], clave: str, output_path: Union[str, Path],
+                             obsoletos: Iterable[str] = ()) -> Optional[dict]:
+    """
+    Si la clave está en la caché, copia sus archivos en la carpeta de salida (clonándolos
+    si el sistema de archivos lo permite).
+
+    Args:
+        cache_dir: Carpeta de la caché
+        clave: Clave de la extracción
+        output_path: Carpeta de frames del video
+        obsoletos: Archivos de una ejecución anterior que se eliminan de la carpeta antes de
+            copiar (índices, mapas de duplicados...), para que no se mezclen con la entrada
+
+    Returns:
+        dict o None: Metadatos de la entrada (saved_count, last_frame, ...) o None si no está
+    """
+    entry_path = Path(cache_dir) / clave
+    entrada = _leer_entrada(entry_path)
+    if entrada is None:
+        return None
+
+    output_path = Path(output_path)
+    try:
+        for nombre in obsoletos:
+            (output_path / nombre).unlink(missing_ok=True)
+        for nombre in entrada['files']:
+            _copiar(entry_path / nombre, output_path / nombre)
+    except OSError:
+        # Entrada incompleta (p. ej. eliminada por otra poda): se extrae de nuevo
+        return None
+
+    # Registrar el uso para la expulsión LRU
+    entrada['last_used'] = time.time()
+    entrada['hits'] = entrada.get('hits', 0) + 1
+    _guardar_entrada(entry_path, entrada)
+    return entrada
+
+
+def guardar_en_cache(cache_dir: Union[str, Path], clave: str, output_path: Union[str, Path],
+                     nombres: List[str], metadatos: dict, max_bytes: int = CACHE_MAX_BYTES):
+    """
+    Guarda en la caché una copia de los archivos de una extracción completa y poda la caché
+    al tamaño máximo. Es una copia independiente: editar después los frames de la carpeta
+    de salida no altera la entrada.
+
+    Args:
+        cache_dir: Carpeta de la caché
+        clave: Clave de la extracción
+        output_path: Carpeta de frames del video
+        nombres: Archivos de la carpeta que forman la extracción
+        metadatos: Datos de la extracción (source, params, saved_count, last_frame)
+        max_bytes: Tamaño máximo de la caché
+    """
+    cache_dir = Path(cache_dir)
+    output_path = Path(output_path)
+    entry_path = cache_dir / clave
+    if _leer_entrada(entry_path) is not None:
+        return
+
+    # Preparar la entrada en una carpeta temporal y publicarla con un renombrado atómico
+    tmp_path = cache_dir / f"{clave}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+    try:
+        for nombre in nombres:
+            _copiar(output_path / nombre, tmp_path / nombre)
+        ahora = time.time()
+        _guardar_entrada(tmp_path, {
+            **metadatos,
+            'key': clave,
+            'files': nombres,
+            'bytes': sum((tmp_path / nombre).stat().st_size for nombre in nombres),
+            'created': ahora,
+            'last_used': ahora,
+            'hits': 0,
+        })
+        os.rename(tmp_path, entry_path)
+    except OSError:
+        # Otro proceso publicó la misma entrada primero
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if _leer_entrada(entry_path) is None:
+            raise
+    podar_cache(cache_dir, max_bytes)
+
+
+def listar_cache(cache_dir: Union[str, Path] = CACHE_DIR) -> List[dict]:
+    """
+    Lista las entradas de la caché, de la usada más recientemente a la más antigua.
+
+    Args:
+        cache_dir: Carpeta de la caché
+
+    Returns:
+        List[dict]: Metadatos de cada entrada
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return []
+    entradas = [_leer_entrada(entry_path) for entry_path in cache_dir.iterdir() if entry_path.is_dir()]
+    return sorted((e for e in entradas if e is not None), key=lambda e: e['last_used'], reverse=True)
+
+
+def podar_cache(cache_dir: Union[str, Path] = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES) -> List[dict]:
+    """
+    Elimina las entradas usadas hace más tiempo hasta que la caché ocupe como mucho max_bytes.
+    Las carpetas de salida no se ven afectadas: tienen su propia copia de los archivos.
+
+    Args:
+        cache_dir: Carpeta de la caché
+        max_bytes: Tamaño máximo de la caché (0 la vacía por completo)
+
+    Returns:
+        List[dict]: Entradas eliminadas
+    """
+    entradas = listar_cache(cache_dir)
+    total = sum(entrada['bytes'] for entrada in entradas)
+    eliminadas = []
+    while entradas and total > max_bytes:
+        entrada = entradas.pop()
+        shutil.rmtree(Path(cache_dir) / entrada['key'], ignore_errors=True)
+        total -= entrada['bytes']
+        eliminadas.append(entrada)
+    return eliminadas
@@ -0,0 +1,90 @@
+# checkpoint.py
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Union, Optional
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Manifiesto de progreso para extracciones reanudables
+'''
+MANIFEST_FILENAME = 'manifest.json'
+
+# Bytes leídos del inicio y del final del video para calcular su huella
+_BLOQUE_HUELLA = 1024 * 1024
+
+
+def identidad_de_video(video_path: Union[str, Path]) -> dict:
+    """
+    Calcula una identidad barata del archivo de video: tamaño, fecha de modificación y
+    un hash del primer y último megabyte.
+
+    Args:
+        video_path: Ruta del video
+
+    Returns:
+        dict: Identidad con path, size, mtime y hash
+    """
+    stat = os.stat(video_path)
+    sha1 = hashlib.sha1(str(stat.st_size).encode('utf-8'))
+    with open(video_path, 'rb') as archivo:
+        sha1.update(archivo.read(_BLOQUE_HUELLA))
+        if stat.st_size > _BLOQUE_HUELLA:
+            archivo.seek(max(_BLOQUE_HUELLA, stat.st_size - _BLOQUE_HUELLA))
+            sha1.update(archivo.read())
+    return {
+        'path': str(video_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'hash': sha1.hexdigest(),
+    }
+
+
+def misma_identidad(a: dict, b: dict) -> bool:
+    """Indica si dos identidades corresponden al mismo archivo (la ruta puede cambiar)."""
+    return all(a.get(clave) == b.get(clave) for clave in ('size', 'mtime', 'hash'))
+
+
+def leer_manifiesto(output_path: Union[str, Path]) -> Optional[dict]:
+    """
+    Lee el manifiesto de una carpeta de salida.
+
+    Args:
+        output_path: Carpeta de frames del video
+
+    Returns:
+        dict o None: Manifiesto, o None si no existe o está dañado
+    """
+    manifest_path = Path(output_path) / MANIFEST_FILENAME
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def guardar_manifiesto(output_path: Union[str, Path], manifiesto: dict):
+    """
+    Guarda el manifiesto de forma atómica (archivo temporal + os.replace), de modo que
+    una interrupción nunca deja un manifiesto a medio escribir.
+
+    Args:
+        output_path: Carpeta de frames del video
+        manifiesto: Contenido a guardar
+    """
+    manifest_path = Path(output_path) / MANIFEST_FILENAME
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as archivo:
+        json.dump(manifiesto, archivo, indent=2)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(tmp_path, manifest_path)
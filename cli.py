@@ -0,0 +1,340 @@
+# cli.py
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+from pathlib import Path
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+
+from core import extraer_frames, unir_frames_en_video
+from encoders import encoders_disponibles
+from probe import sondear_videos
+from cache import CACHE_DIR, CACHE_MAX_BYTES, listar_cache, podar_cache
+from events import ProgressEvent, VideoSummaryEvent, evento_a_dict
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Ejecución de trabajos sin interfaz gráfica
+'''
+# Claves de un trabajo del manifiesto -> argumentos de extraer_frames / unir_frames_en_video
+_CLAVES_EXTRACCION = {
+    'interval': 'frame_interval',
+    'workers': 'workers',
+    'processes': 'processes',
+    'format': 'image_format',
+    'quality': 'quality',
+    'storage': 'storage',
+    'resume': 'resume',
+    'dedup_threshold': 'dedup_threshold',
+    'scene_threshold': 'scene_threshold',
+    'min_scene_length': 'min_scene_length',
+    'output_dir': 'output_dir',
+    'shard_frames': 'shard_frames',
+    'shard_bytes': 'shard_bytes',
+    'cache_dir': 'cache_dir',
+    'cache_max_bytes': 'cache_max_bytes',
+    'segments': 'segments',
+    'max_inflight_bytes': 'max_inflight_bytes',
+    'start': 'start_time',
+    'end': 'end_time',
+    'sample_fps': 'sample_fps',
+    'sample_every': 'sample_every',
+    'transforms': 'transforms',
+    'transform_batch': 'transform_batch',
+}
+_CLAVES_UNION = {
+    'output': 'output_path',
+    'fps': 'fps',
+    'format': 'image_format',
+    'read_workers': 'read_workers',
+    'prefetch': 'prefetch',
+    'encoder': 'encoder',
+    'encoder_options': 'encoder_options',
+    'max_inflight_bytes': 'max_inflight_bytes',
+    'transforms': 'transforms',
+    'transform_batch': 'transform_batch',
+}
+
+# Opciones de codificador que se pueden indicar directamente en un trabajo de unión
+_OPCIONES_ENCODER = ('codec', 'preset', 'crf', 'threads', 'fourcc')
+
+
+def _argumentos(trabajo: dict, claves: dict) -> dict:
+    """Traduce las claves presentes en un trabajo a argumentos de la función correspondiente."""
+    return {argumento: trabajo[clave] for clave, argumento in claves.items() if trabajo.get(clave) is not None}
+
+
+def _crear_emisor_jsonl(intervalo: float = 0.5):
+    """
+    Crea un callback on_event que escribe cada evento como una línea JSON en stderr.
+    Los ProgressEvent se limitan a uno cada `intervalo` segundos por video.
+    """
+    lock = threading.Lock()
+    ultimos = {}
+
+    def on_event(evento):
+        if isinstance(evento, ProgressEvent):
+            ahora = time.monotonic()
+            if ahora - ultimos.get(evento.name, 0.0) < intervalo and evento.done < evento.total:
+                return
+            ultimos[evento.name] = ahora
+        with lock:
+            sys.__stderr__.write(json.dumps(evento_a_dict(evento), ensure_ascii=False) + "\n")
+            sys.__stderr__.flush()
+    return on_event
+
+
+def ejecutar_trabajo(trabajo: dict, on_event=None, report: bool = False) -> dict:
+    """
+    Ejecuta un trabajo de extracción o unión y devuelve su resultado.
+
+    Args:
+        trabajo: Diccionario con 'type' ('extract' o 'join') y sus parámetros
+        on_event: Función que recibe además los eventos de progreso del trabajo
+        report: Imprimir el resumen de tiempos por etapa de cada video
+
+    Returns:
+        dict: Resultado con type, ok, result, error, seconds y metrics (resumen por etapas de cada video)
+    """
+    inicio = time.monotonic()
+    tipo = trabajo.get('type')
+    resumen = {'type': tipo, 'ok': False, 'result': None, 'error': None, 'metrics': []}
+
+    def recoger(evento):
+        if isinstance(evento, VideoSummaryEvent):
+            resumen['metrics'].append(evento.to_dict())
+        if on_event is not None:
+            on_event(evento)
+
+    try:
+        if tipo == 'extract':
+            inputs = trabajo.get('inputs') or [trabajo['input']]
+            argumentos = _argumentos(trabajo, _CLAVES_EXTRACCION)
+            if trabajo.get('cache'):
+                argumentos.setdefault('cache_dir', CACHE_DIR)
+            resultados = extraer_frames(inputs, on_event=recoger, report=report, **argumentos)
+            resumen['result'] = resultados
+            resumen['ok'] = bool(resultados) and all(resultados.values())
+            if not resumen['ok']:
+                resumen['error'] = "Uno o más videos no produjeron frames"
+        elif tipo == 'join':
+            argumentos = _argumentos(trabajo, _CLAVES_UNION)
+            opciones_encoder = {clave: trabajo[clave] for clave in _OPCIONES_ENCODER if trabajo.get(clave) is not None}
+            if opciones_encoder:
+                argumentos['encoder_options'] = {**argumentos.get('encoder_options', {}), **opciones_encoder}
+            resumen['result'] = unir_frames_en_video(trabajo['input'], on_event=recoger, report=report, **argumentos)
+            resumen['ok'] = resumen['result']
+            if not resumen['ok']:
+                resumen['error'] = "No se pudo crear el video"
+        else:
+            resumen['error'] = f"Tipo de trabajo desconocido: {tipo}"
+    except Exception as e:
+        resumen['error'] = f"{type(e).__name__}: {e}"
+    resumen['seconds'] = round(time.monotonic() - inicio, 3)
+    return resumen
+
+
+def ejecutar_trabajos(trabajos: List[dict], concurrency: int = 1, on_event=None, report: bool = False) -> dict:
+    """
+    Ejecuta una lista de trabajos con un nivel de concurrencia dado.
+
+    Primero se ejecutan las extracciones y después las uniones, de modo que un manifiesto
+    puede unir carpetas que genera él mismo.
+
+    Args:
+        trabajos: Lista de trabajos de extracción/unión
+        concurrency: Cantidad de trabajos ejecutados a la vez
+        on_event: Función que recibe los eventos de progreso de todos los trabajos
+        report: Imprimir el resumen de tiempos por etapa de cada video
+
+    Returns:
+        dict: Resumen con ok global y el resultado de cada trabajo, en el orden del manifiesto
+    """
+    resultados = [None] * len(trabajos)
+    fases = [
+        [i for i, trabajo in enumerate(trabajos) if trabajo.get('type') != 'join'],
+        [i for i, trabajo in enumerate(trabajos) if trabajo.get('type') == 'join'],
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        for indices in fases:
+            futuros = [executor.submit(ejecutar_trabajo, trabajos[i], on_event, report) for i in indices]
+            for indice, resultado in zip(indices, (futuro.result() for futuro in futuros)):
+                resultado['index'] = indice
+                resultados[indice] = resultado
+    return {'ok': all(r['ok'] for r in resultados), 'jobs': resultados}
+
+
+def leer_manifiesto_de_trabajos(path: str) -> dict:
+    """
+    Lee un manifiesto de trabajos en JSON o YAML (este último requiere PyYAML).
+
+    Args:
+        path: Ruta del manifiesto
+
+    Returns:
+        dict: Manifiesto con 'jobs' y opcionalmente 'concurrency'
+    """
+    texto = Path(path).read_text(encoding='utf-8')
+    if Path(path).suffix.lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("Se necesita PyYAML para leer manifiestos YAML (pip install pyyaml)")
+        manifiesto = yaml.safe_load(texto)
+    else:
+        manifiesto = json.loads(texto)
+
+    # Se admite también una lista de trabajos sin envoltorio
+    if isinstance(manifiesto, list):
+        manifiesto = {'jobs': manifiesto}
+    return manifiesto
+
+
+def _crear_parser() -> argparse.ArgumentParser:
+    """Define los subcomandos extract, join y run."""
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description="Simple Video Frames Editor sin interfaz gráfica. El resumen se imprime en JSON "
+                    "por stdout y el progreso por stderr."
+    )
+    parser.add_argument('--events', action='store_true', help='Emitir los eventos de progreso como líneas JSON por stderr')
+    parser.add_argument('--report', action='store_true', help='Imprimir por stderr los tiempos por etapa de cada video')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    extract = subparsers.add_parser('extract', help='Extrae frames de uno o varios videos')
+    extract.add_argument('inputs', nargs='+', help='Videos de entrada')
+    extract.add_argument('--interval', type=int, default=1, help='Intervalo de frames a guardar')
+    extract.add_argument('--workers', type=int, default=1, help='Hilos de escritura por video')
+    extract.add_argument('--processes', type=int, default=1, help='Videos procesados en paralelo')
+    extract.add_argument('--segments', type=int, default=1,
+                         help='Rangos de frames de cada video decodificados en paralelo (para videos largos)')
+    extract.add_argument('--start', type=float, help='Segundo desde el que se extrae')
+    extract.add_argument('--end', type=float, help='Segundo hasta el que se extrae')
+    extract.add_argument('--sample-fps', type=float, help='Frames por segundo a guardar (reemplaza a --interval)')
+    extract.add_argument('--sample-every', type=float, help='Segundos entre dos frames guardados (reemplaza a --interval)')
+    extract.add_argument('--transforms',
+                         help='Transformaciones antes de guardar, p. ej. "crop=0:0:1280:720,resize=640x-1,grayscale"')
+    extract.add_argument('--transform-batch', type=int, default=16, help='Frames por lote al transformar')
+    extract.add_argument('--format', default='png', help="Formato de los frames: png, jpg, webp o bmp")
+    extract.add_argument('--quality', type=int, help='Compresión PNG (0-9) o calidad JPEG/WebP (0-100)')
+    extract.add_argument('--storage', default='images', choices=['images', 'raw', 'archive'],
+                         help='Almacenamiento de frames (archive = fragmentos tar con índice)')
+    extract.add_argument('--no-resume', dest='resume', action='store_false', help='No reanudar extracciones previas')
+    extract.add_argument('--dedup-threshold', type=float, help='Umbral para omitir frames casi duplicados')
+    extract.add_argument('--scene-threshold', type=float, help='Umbral de cambio de escena (0-1)')
+    extract.add_argument('--min-scene-length', type=int, default=15, help='Longitud mínima de escena en frames')
+    extract.add_argument('--shard-frames', type=int, help='Frames máximos por fragmento tar (storage archive)')
+    extract.add_argument('--shard-bytes', type=int, help='Bytes máximos por fragmento tar (storage archive)')
+    extract.add_argument('--cache', action='store_true', help='Reutilizar extracciones idénticas de la caché')
+    extract.add_argument('--cache-dir', help=f'Carpeta de la caché (por defecto {CACHE_DIR}; implica --cache)')
+    extract.add_argument('--cache-max-bytes', type=int, help='Tamaño máximo de la caché (por defecto 10 GiB)')
+    extract.add_argument('--max-inflight-bytes', type=int,
+                         help='Memoria máxima para frames pendientes de escribir (se reparte entre procesos)')
+    extract.add_argument('--output-dir', help='Carpeta base de salida (por defecto Storage/Frames)')
+
+    join = subparsers.add_parser('join', help='Une una carpeta de frames en un video')
+    join.add_argument('input', help='Carpeta de frames')
+    join.add_argument('--output', help='Video de salida')
+    join.add_argument('--fps', type=float, help='FPS del video resultante (por defecto los del video original)')
+    join.add_argument('--format', help='Formato de los frames (por defecto se detecta)')
+    join.add_argument('--read-workers', type=int, default=4, help='Hilos de lectura anticipada')
+    join.add_argument('--prefetch', type=int, default=16, help='Frames leídos por adelantado')
+    join.add_argument('--max-inflight-bytes', type=int, help='Memoria máxima para frames leídos por adelantado')
+    join.add_argument('--transforms',
+                      help='Transformaciones antes de codificar, p. ej. "letterbox=1280x720" para unir tamaños distintos')
+    join.add_argument('--transform-batch', type=int, default=16, help='Frames por lote al transformar')
+    join.add_argument('--encoder', default='opencv', choices=['opencv', 'ffmpeg', 'auto'],
+                      help=f"Codificador de video (disponibles: {', '.join(encoders_disponibles())}); "
+                           "sin ffmpeg se usa OpenCV")
+    join.add_argument('--codec', help='Códec de ffmpeg (por defecto libx264)')
+    join.add_argument('--preset', help='Preset de ffmpeg (por defecto medium)')
+    join.add_argument('--crf', type=int, help='Calidad constante de ffmpeg (por defecto 23)')
+    join.add_argument('--threads', type=int, help='Hilos de codificación de ffmpeg (0 = automático)')
+    join.add_argument('--fourcc', help='Códec de OpenCV (por defecto mp4v)')
+
+    run = subparsers.add_parser('run', help='Ejecuta un manifiesto de trabajos (JSON o YAML)')
+    run.add_argument('manifest', help='Ruta del manifiesto')
+    run.add_argument('--concurrency', type=int, help='Trabajos simultáneos (por defecto el del manifiesto o 1)')
+
+    cache = subparsers.add_parser('cache', help='Lista o poda la caché de extracciones')
+    cache.add_argument('action', choices=['list', 'prune'], help='list: entradas de la más a la menos reciente; '
+                                                                  'prune: expulsa las menos usadas')
+    cache.add_argument('--cache-dir', default=CACHE_DIR, help=f'Carpeta de la caché (por defecto {CACHE_DIR})')
+    cache.add_argument('--max-bytes', type=int, default=CACHE_MAX_BYTES,
+                       help='Tamaño a conservar al podar (0 vacía la caché)')
+
+    probe = subparsers.add_parser('probe', help='Muestra los metadatos de varios videos sin procesarlos')
+    probe.add_argument('inputs', nargs='+', help='Videos a sondear')
+    return parser
+
+
+def ejecutar_comando_cache(args: argparse.Namespace) -> dict:
+    """Ejecuta el subcomando cache y devuelve el resumen a imprimir."""
+    if args.action == 'prune':
+        eliminadas = podar_cache(args.cache_dir, args.max_bytes)
+        return {'ok': True, 'removed': eliminadas, 'freed_bytes': sum(e['bytes'] for e in eliminadas)}
+    entradas = listar_cache(args.cache_dir)
+    return {'ok': True, 'entries': entradas, 'bytes': sum(e['bytes'] for e in entradas)}
+
+
+def ejecutar_comando_probe(args: argparse.Namespace) -> dict:
+    """Sondea los videos en paralelo y devuelve sus metadatos y el total de frames y duración."""
+    sondeos = sondear_videos(args.inputs)
+    validos = [sondeo for sondeo in sondeos if sondeo.ok]
+    return {
+        'ok': len(validos) == len(sondeos),
+        'videos': [sondeo.to_dict() for sondeo in sondeos],
+        'total_frames': sum(sondeo.frames for sondeo in validos),
+        'duration': round(sum(sondeo.duration for sondeo in validos), 3),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    """
+    Punto de entrada de la línea de comandos.
+
+    Returns:
+        int: 0 si todos los trabajos terminaron bien, 1 en caso contrario
+    """
+    args = _crear_parser().parse_args(argv)
+    on_event = _crear_emisor_jsonl() if args.events else None
+
+    # Los mensajes de progreso van a stderr para que stdout contenga solo el resumen JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.command == 'cache':
+            resumen = ejecutar_comando_cache(args)
+        elif args.command == 'probe':
+            resumen = ejecutar_comando_probe(args)
+        elif args.command == 'run':
+            try:
+                manifiesto = leer_manifiesto_de_trabajos(args.manifest)
+            except Exception as e:
+                resumen = {'ok': False, 'error': f"{type(e).__name__}: {e}", 'jobs': []}
+            else:
+                concurrency = args.concurrency or manifiesto.get('concurrency', 1)
+                resumen = ejecutar_trabajos(manifiesto.get('jobs', []), concurrency, on_event, args.report)
+        else:
+            trabajo = {clave: valor for clave, valor in vars(args).items() if clave not in ('command', 'events', 'report')}
+            trabajo['type'] = args.command
+            resumen = ejecutar_trabajos([trabajo], on_event=on_event, report=args.report)
+
+    print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    return 0 if resumen['ok'] else 1
+
+
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2028 @@
+# core.py
+from __future__ import annotations
+
+import os
+import json
+import math
+import time
+import queue
+import threading
+from pathlib import Path
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Union, List, Callable, Iterable, Iterator, Optional, Tuple
+
+from utils import verificar_rutas_almacenamiento, importar_perezoso
+from frame_store import RAW_FILENAME, RawFrameWriter, leer_frames_raw
+from cache import CACHE_MAX_BYTES, clave_de_cache, huella_de_contenido, materializar_desde_cache, guardar_en_cache
+from checkpoint import identidad_de_video, misma_identidad, leer_manifiesto, guardar_manifiesto
+from frame_archive import ARCHIVE_INDEX_FILENAME, ArchiveFrameWriter, ArchiveFrameReader, leer_indice_de_archivo, nombre_de_fragmento
+from frame_index import INDEX_FILENAME, FrameIndexWriter, leer_indice, repeticiones_por_tiempo
+from encoders import crear_encoder
+from memory_budget import MemoryBudget
+from transforms import TransformChain, ToBGR, crear_cadena
+from events import (VideoStartEvent, ProgressEvent, VideoSummaryEvent, RunStartEvent, RunTracker, StageTimer,
+                    formatear_resumen)
+from probe import VideoProbe, sondear_videos
+
+cv2 = importar_perezoso('cv2')
+np = importar_perezoso('numpy')
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Motor de procesamiento (sin dependencias de interfaz)
+'''
+# Cada cuántos frames guardados se actualiza el manifiesto de progreso
+_INTERVALO_CHECKPOINT = 500
+
+# Mapa de frames duplicados omitidos: cuántas veces se repite cada frame guardado
+DEDUP_FILENAME = 'dedup.json'
+
+# Lista de cortes de escena detectados (número de frame, marca de tiempo y puntuación)
+SCENES_FILENAME = 'scenes.json'
+
+# Archivos que describen una extracción completa (además de los frames); los que deja una
+# ejecución anterior se eliminan antes de recuperar una extracción de la caché
+_ARTEFACTOS_DE_EXTRACCION = (INDEX_FILENAME, ARCHIVE_INDEX_FILENAME, RAW_FILENAME, DEDUP_FILENAME, SCENES_FILENAME)
+
+# Lado de la miniatura en escala de grises usada como firma de cada frame
+_LADO_FIRMA = 32
+
+# Cantidad de bins del histograma usado para detectar cambios de escena
+_BINS_HISTOGRAMA = 32
+
+# Salto mínimo (en frames) entre dos frames guardados para intentar una búsqueda en lugar de grab()
+_SALTO_MINIMO_BUSQUEDA = 16
+
+# Perfiles de formato de salida: (extensión, parámetro de cv2.imwrite, rango válido)
+FORMATOS_FRAME = {
+    'png': ('.png', 'IMWRITE_PNG_COMPRESSION', (0, 9)),
+    'jpg': ('.jpg', 'IMWRITE_JPEG_QUALITY', (0, 100)),
+    'webp': ('.webp', 'IMWRITE_WEBP_QUALITY', (1, 100)),
+    'bmp': ('.bmp', None, None),
+}
+
+
+def _perfil_de_formato(image_format: str = 'png', quality: int = None) -> tuple:
+    """
+    Traduce un formato de salida y su nivel de calidad/compresión a parámetros de cv2.imwrite.
+    
+    Args:
+        image_format: Formato de los frames ('png', 'jpg', 'webp' o 'bmp')
+        quality: Compresión PNG (0-9) o calidad JPEG/WebP (0-100). None = valores por defecto
+            de OpenCV (en PNG, nivel 1 con Z_RLE, más rápido que cualquier nivel explícito)
+    
+    Returns:
+        tuple: (extensión, lista de parámetros para cv2.imwrite)
+    """
+    if image_format not in FORMATOS_FRAME:
+        raise ValueError(f"Formato de frame no soportado: {image_format}")
+    
+    extension, parametro, rango = FORMATOS_FRAME[image_format]
+    if parametro is None or quality is None:
+        return extension, []
+    
+    if not rango[0] <= quality <= rango[1]:
+        raise ValueError(f"Calidad inválida para {image_format}: debe estar entre {rango[0]} y {rango[1]}")
+    return extension, [getattr(cv2, parametro), int(quality)]
+
+
+def _listar_frames(frames_path: Path, image_format: str = None) -> List[Path]:
+    """
+    Lista ordenadamente los frames de una carpeta.
+    
+    Args:
+        frames_path: Carpeta que contiene los frames
+        image_format: Formato de los frames. Si es None, se usa el primero que tenga frames
+    
+    Returns:
+        List[Path]: Rutas de los frames ordenadas por número de frame
+    """
+    formatos = [image_format] if image_format else list(FORMATOS_FRAME)
+    for formato in formatos:
+        extension = FORMATOS_FRAME[formato][0]
+        frames = sorted(frames_path.glob(f"frame_*{extension}"))
+        if frames:
+            return frames
+    return []
+
+
+def _objetivos_de_muestreo(frame_interval: int = 1, inicio: int = 0, fin: Optional[int] = None,
+                           paso: Optional[float] = None) -> Iterator[int]:
+    """
+    Números de frame a guardar, en orden creciente, dentro del rango [inicio, fin).
+    
+    Args:
+        frame_interval: Intervalo de frames (se guardan sus múltiplos) si no hay paso
+        inicio: Primer frame del rango
+        fin: Frame siguiente al último del rango (None = hasta el final del video)
+        paso: Frames de origen entre dos muestras (fps de origen / fps de muestreo); si se
+            indica, reemplaza a frame_interval y las muestras se cuentan desde inicio
+    
+    Yields:
+        int: Número de cada frame a guardar
+    """
+    muestra = 0
+    while True:
+        if paso is None:
+            objetivo = (-(-inicio // frame_interval) + muestra) * frame_interval
+        else:
+            objetivo = inicio + round(muestra * max(1.0, paso))
+        if fin is not None and objetivo >= fin:
+            return
+        yield objetivo
+        muestra += 1
+
+
+def _iterar_captura(video: cv2.VideoCapture, frame_interval: int = 1, start_frame: int = 0,
+                    timer: StageTimer = None, objetivos: Iterable[int] = None,
+                    buscar: bool = False) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """
+    Bucle de decodificación compartido por todos los modos de extracción.
+    
+    Solo se decodifican por completo los frames que se entregan. Los intermedios se saltan
+    con grab(), sin convertirlos a BGR ni copiarlos. Con buscar=True, los saltos largos se
+    hacen con una búsqueda (que decodifica desde el fotograma clave anterior) mientras esta
+    resulte más barata, según lo medido, que avanzar con grab().
+    
+    Args:
+        video: Captura ya abierta
+        frame_interval: Intervalo de frames a entregar (1 = todos los frames)
+        start_frame: Número de frame en el que ya está posicionada la captura
+        timer: Medidor donde acumular las etapas 'decode', 'grab' y 'seek'
+        objetivos: Números de frame a entregar en orden creciente (por defecto, los múltiplos
+            de frame_interval)
+        buscar: Permitir búsquedas en los saltos largos (el contenedor debe buscar con exactitud)
+    
+    Yields:
+        tuple: (número de frame, marca de tiempo en milisegundos, frame)
+    """
+    if objetivos is None:
+        objetivos = _objetivos_de_muestreo(frame_interval, start_frame)
+    medir = timer.add if timer is not None else (lambda *args, **kwargs: None)
+    posicion = start_frame
+    segundos_por_grab = None
+    segundos_por_busqueda = None
+    for objetivo in objetivos:
+        if objetivo < posicion:
+            continue
+        
+        # Saltar hasta el objetivo buscando, si se estima más barato que avanzar frame a frame
+        # (el primer salto largo busca y el siguiente avanza con grab(), para medir ambos)
+        salto = objetivo - posicion
+        if buscar and salto >= _SALTO_MINIMO_BUSQUEDA and (segundos_por_busqueda is None or (
+                segundos_por_grab is not None and segundos_por_busqueda < salto * segundos_por_grab)):
+            inicio = time.perf_counter()
+            if _buscar_frame(video, objetivo):
+                posicion = objetivo
+            else:
+                # Posición incierta: seguir desde donde quedó la captura, sin más búsquedas
+                buscar = False
+                posicion = int(video.get(cv2.CAP_PROP_POS_FRAMES))
+            segundos = time.perf_counter() - inicio
+            segundos_por_busqueda = segundos if segundos_por_busqueda is None else (segundos_por_busqueda + segundos) / 2
+            medir('seek', segundos)
+            if objetivo < posicion:
+                continue
+        
+        if posicion < objetivo:
+            inicio = time.perf_counter()
+            saltados = 0
+            while posicion < objetivo and video.grab():
+                posicion += 1
+                saltados += 1
+            segundos = time.perf_counter() - inicio
+            medir('grab', segundos, calls=saltados)
+            if saltados:
+                segundos_por_grab = segundos / saltados
+            if posicion < objetivo:
+                return
+        
+        # Decodificar por completo el frame que se entrega
+        inicio = time.perf_counter()
+        success, frame = video.read()
+        medir('decode', time.perf_counter() - inicio)
+        if not success:
+            return
+        posicion += 1
+        yield objetivo, video.get(cv2.CAP_PROP_POS_MSEC), frame
+
+
+def iterar_frames(video_path: Union[str, Path], interval: int = 1, batch_size: Optional[int] = None) -> Iterator[tuple]:
+    """
+    Itera de forma perezosa sobre los frames de un video, sin escribir nada en disco.
+    
+    La captura se libera siempre, incluso si el consumidor deja de iterar antes de tiempo.
+    
+    Args:
+        video_path: Ruta del video
+        interval: Intervalo de frames a entregar (1 = todos los frames)
+        batch_size: Si se indica, agrupa los frames en lotes apilados en un único arreglo
+    
+    Yields:
+        tuple: (número de frame, marca de tiempo en ms, frame) o, con batch_size,
+            (arreglo de números de frame, arreglo de marcas de tiempo, arreglo (N, alto, ancho, canales))
+    """
+    video = cv2.VideoCapture(str(video_path))
+    try:
+        if not video.isOpened():
+            raise IOError(f"No se pudo abrir el video: {video_path}")
+        
+        if not batch_size:
+            yield from _iterar_captura(video, interval)
+            return
+        
+        lote = []
+        for item in _iterar_captura(video, interval):
+            lote.append(item)
+            if len(lote) == batch_size:
+                yield _apilar_lote(lote)
+                lote = []
+        if lote:
+            yield _apilar_lote(lote)
+    finally:
+        video.release()
+
+
+def _apilar_lote(lote: List[tuple]) -> tuple:
+    """Convierte una lista de (número, marca de tiempo, frame) en arreglos apilados."""
+    indices, timestamps, frames = zip(*lote)
+    return np.array(indices), np.array(timestamps), np.stack(frames)
+
+
+def _precargar_frames(items: Iterable, leer: Callable, read_workers: int = 4, prefetch: int = 16,
+                     presupuesto: MemoryBudget = None, frame_bytes: int = 0, transferir: bool = False) -> Iterator:
+    """
+    Lee frames por adelantado en un pool de hilos y los entrega en el mismo orden que items.
+    
+    Mantiene como máximo `prefetch` lecturas en curso, de modo que la memoria usada es
+    acotada y el consumidor (p. ej. el codificador de video) no espera por el disco ni el decode.
+    Con un presupuesto, cada lectura reserva frame_bytes hasta que el consumidor termina
+    con el frame, y no se piden más lecturas de las que caben en él. Sin lecturas en curso,
+    la siguiente espera a que quepa, así que el consumidor no debe pedir otro frame mientras
+    retiene memoria que solo él liberaría.
+    
+    Args:
+        items: Secuencia ordenada de elementos a leer (p. ej. rutas de frames)
+        leer: Función que convierte un elemento en frame (p. ej. cv2.imread)
+        read_workers: Hilos de lectura/decodificación
+        prefetch: Profundidad máxima del buffer de lectura anticipada
+        presupuesto: Presupuesto de memoria de los frames leídos por adelantado
+        frame_bytes: Bytes que reserva cada lectura
+        transferir: Si es True, la reserva de cada frame entregado pasa al consumidor,
+            que la devuelve al presupuesto cuando termina con él
+    
+    Yields:
+        El resultado de leer(item) para cada elemento, en orden
+    """
+    iterador = iter(items)
+    pendientes = deque()
+    agotado = object()
+    
+    def reponer(executor: ThreadPoolExecutor, bloquear: bool):
+        """Pide lecturas hasta llenar el buffer o el presupuesto (esperando por la primera si bloquear)."""
+        while len(pendientes) < prefetch:
+            if presupuesto is not None:
+                if bloquear and not pendientes:
+                    presupuesto.acquire(frame_bytes)
+                elif not presupuesto.try_acquire(frame_bytes):
+                    return
+            item = next(iterador, agotado)
+            if item is agotado:
+                if presupuesto is not None:
+                    presupuesto.release(frame_bytes)
+                return
+            pendientes.append(executor.submit(leer, item))
+    
+    with ThreadPoolExecutor(max_workers=read_workers) as executor:
+        try:
+            # Llenar el buffer inicial
+            reponer(executor, True)
+            
+            # Entregar en orden y reponer las lecturas a medida que se consumen los frames
+            while pendientes:
+                futuro = pendientes.popleft()
+                reponer(executor, False)
+                try:
+                    yield futuro.result()
+                finally:
+                    if presupuesto is not None and not transferir:
+                        presupuesto.release(frame_bytes)
+                reponer(executor, True)
+        finally:
+            # Cancelar lecturas pendientes si el consumidor se detiene antes de tiempo
+            for futuro in pendientes:
+                futuro.cancel()
+                if presupuesto is not None:
+                    presupuesto.release(frame_bytes)
+
+
+def _bytes_por_lectura(forma: tuple, cadena: TransformChain = None) -> int:
+    """Bytes que reserva la lectura de un frame: el frame y, si se transforma, su memoria de trabajo en un lote."""
+    nbytes = math.prod(forma)
+    if cadena is None:
+        return nbytes
+    return 2 * nbytes + cadena.working_bytes(forma)
+
+
+def _transformar_por_lotes(items: Iterable[tuple], cadena: TransformChain, batch_size: int = 16,
+                           timer: StageTimer = None, presupuesto: MemoryBudget = None, reserva_previa: int = 0,
+                           transferir: bool = False, esperar_memoria: Callable = None) -> Iterator[tuple]:
+    """
+    Aplica una cadena de transformaciones a lotes de frames apilados en un único arreglo.
+    
+    Los frames se agrupan hasta completar batch_size o hasta que cambia su forma, y cada
+    lote pasa por la cadena de una vez. Con un presupuesto, cada frame del lote cuenta su
+    memoria de trabajo completa: el frame de entrada, su copia en el arreglo apilado y lo
+    que asigna la cadena (TransformChain.working_bytes). Tras transformar el lote solo
+    quedan reservadas sus salidas. Mientras retiene memoria, esta etapa nunca espera por
+    el presupuesto: si el siguiente frame no cabe, antes transforma y entrega el lote en
+    curso, porque quien libera memoria suele ser el mismo hilo que la consume.
+    
+    Args:
+        items: Tuplas cuyo último elemento es el frame (None se deja pasar sin transformar)
+        cadena: Cadena de transformaciones
+        batch_size: Frames máximos por lote
+        timer: Medidor donde acumular la etapa 'transform'
+        presupuesto: Presupuesto de memoria de los frames del lote y de sus salidas
+        reserva_previa: Bytes que el origen ya reservó para cada elemento y cuya reserva pasa
+            al lote (_precargar_frames con transferir=True); con 0 el lote reserva por sí mismo
+        transferir: Si es True, la reserva de cada frame transformado pasa al consumidor, que
+            la devuelve al presupuesto (frame.nbytes) cuando termina con él; si no, se devuelve
+            cuando el consumidor pide el siguiente
+        esperar_memoria: Función que reserva n bytes cuando el lote está vacío y no caben ahora
+            (por defecto presupuesto.acquire; p. ej. vaciar escrituras pendientes del mismo hilo)
+    
+    Yields:
+        tuple: Cada tupla de items, en el mismo orden, con el frame transformado
+    """
+    lote = []
+    reservado = 0
+    salida_retenida = 0
+    esperar_memoria = esperar_memoria or (presupuesto.acquire if presupuesto is not None else None)
+    
+    def coste(cantidad: int, frame: np.ndarray) -> int:
+        """Memoria de trabajo de un lote de `cantidad` frames como el dado (uno solo se apila sin copiarlo)."""
+        apilado = cantidad * frame.nbytes if cantidad > 1 else 0
+        return cantidad * (frame.nbytes + cadena.working_bytes(frame.shape)) + apilado
+    
+    def liberar(nbytes: int):
+        if presupuesto is not None and nbytes:
+            presupuesto.release(nbytes)
+    
+    def vaciar() -> Iterator[tuple]:
+        nonlocal lote, reservado, salida_retenida
+        if not lote:
+            return
+        cabeceras = [item[:-1] for item in lote]
+        frames = [item[-1] for item in lote]
+        lote = []
+        inicio = time.perf_counter()
+        apilado = np.stack(frames) if len(frames) > 1 else frames[0][None]
+        del frames
+        salida = cadena.apply(apilado)
+        del apilado
+        if timer is not None:
+            timer.add('transform', time.perf_counter() - inicio, calls=len(cabeceras))
+        # Las entradas y los intermedios ya no existen: solo quedan reservadas las salidas
+        liberar(reservado - salida.nbytes)
+        reservado = 0
+        salida_retenida = salida.nbytes
+        for cabecera, frame in zip(cabeceras, salida):
+            if transferir:
+                salida_retenida -= frame.nbytes
+                yield cabecera + (frame,)
+            else:
+                yield cabecera + (frame,)
+                salida_retenida -= frame.nbytes
+                liberar(frame.nbytes)
+    
+    try:
+        for item in items:
+            frame = item[-1]
+            if frame is None:
+                yield from vaciar()
+                reservado += reserva_previa
+                yield item
+                reservado -= reserva_previa
+                liberar(reserva_previa)
+                continue
+            if lote and (len(lote) >= batch_size or frame.shape != lote[0][-1].shape):
+                yield from vaciar()
+            if reserva_previa:
+                reservado += reserva_previa
+            elif presupuesto is not None:
+                necesario = coste(len(lote) + 1, frame) - coste(len(lote), frame)
+                if not presupuesto.try_acquire(necesario):
+                    yield from vaciar()
+                    necesario = coste(1, frame)
+                    if not presupuesto.try_acquire(necesario):
+                        esperar_memoria(necesario)
+                reservado += necesario
+            lote.append(item)
+            # El origen espera por el presupuesto al leer el siguiente: no pedirlo reteniendo memoria
+            if reserva_previa and presupuesto is not None and not presupuesto.fits(reserva_previa):
+                yield from vaciar()
+        yield from vaciar()
+    finally:
+        liberar(reservado + salida_retenida)
+
+
+def _codificar_imagen(frame: np.ndarray, extension: str, parametros: list, timer: StageTimer = None) -> np.ndarray:
+    """Codifica un frame en memoria en el formato de la extensión, midiendo la etapa 'encode'."""
+    inicio = time.perf_counter()
+    success, buffer = cv2.imencode(extension, frame, parametros)
+    if timer is not None:
+        timer.add('encode', time.perf_counter() - inicio)
+    if not success:
+        raise IOError(f"No se pudo codificar el frame en formato {extension}")
+    return buffer
+
+
+def _guardar_imagen(frame_filename: Path, frame: np.ndarray, extension: str, parametros: list, timer: StageTimer = None):
+    """
+    Codifica un frame en memoria y lo escribe en disco, midiendo por separado las etapas
+    'encode' y 'write' (equivale a cv2.imwrite).
+    """
+    buffer = _codificar_imagen(frame, extension, parametros, timer)
+    inicio = time.perf_counter()
+    buffer.tofile(str(frame_filename))
+    if timer is not None:
+        timer.add('write', time.perf_counter() - inicio)
+
+
+def _leer_imagen(frame_path: Path, timer: StageTimer = None, lector: ArchiveFrameReader = None) -> np.ndarray:
+    """
+    Lee un archivo de frame (o el miembro del mismo nombre de los fragmentos tar, si se
+    indica un lector) y lo decodifica, midiendo por separado las etapas 'read' y 'decode'
+    (equivale a cv2.imread). Devuelve None si el frame no se puede leer.
+    """
+    inicio = time.perf_counter()
+    try:
+        if lector is not None:
+            datos = np.frombuffer(lector.read(frame_path.name) or b'', dtype=np.uint8)
+        else:
+            datos = np.fromfile(str(frame_path), dtype=np.uint8)
+    except OSError:
+        return None
+    leido = time.perf_counter()
+    frame = cv2.imdecode(datos, cv2.IMREAD_COLOR) if datos.size else None
+    if timer is not None:
+        timer.add('read', leido - inicio)
+        timer.add('decode', time.perf_counter() - leido)
+    return frame
+
+
+def _escritor_frames(cola: queue.Queue, errores: list, extension: str, parametros: list, timer: StageTimer = None,
+                     presupuesto: MemoryBudget = None):
+    """
+    Consume frames de la cola y los codifica/escribe en disco hasta recibir None.
+    
+    Args:
+        cola: Cola acotada con tuplas (ruta_del_frame, frame)
+        errores: Lista compartida donde se registran los errores de escritura
+        extension: Extensión que determina el formato de codificación
+        parametros: Parámetros de compresión para cv2.imencode
+        timer: Medidor donde acumular las etapas 'encode' y 'write'
+        presupuesto: Presupuesto de memoria al que se devuelve cada frame una vez escrito
+    """
+    while True:
+        item = cola.get()
+        try:
+            if item is None:
+                break
+            frame_filename, frame = item
+            try:
+                _guardar_imagen(frame_filename, frame, extension, parametros, timer)
+            finally:
+                if presupuesto is not None:
+                    presupuesto.release(frame.nbytes)
+        except Exception as e:
+            errores.append(e)
+        finally:
+            cola.task_done()
+
+
+def _firma_de_frame(frame: np.ndarray) -> np.ndarray:
+    """Calcula una firma barata del frame: miniatura en escala de grises de _LADO_FIRMA x _LADO_FIRMA."""
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(frame, (_LADO_FIRMA, _LADO_FIRMA), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def _diferencia_de_firmas(a: np.ndarray, b: np.ndarray) -> float:
+    """Diferencia absoluta media (0-255) entre dos firmas."""
+    return float(np.abs(a - b).mean())
+
+
+def _histograma_de_frame(frame: np.ndarray) -> np.ndarray:
+    """Histograma normalizado de luminancia de una miniatura del frame."""
+    miniatura = cv2.resize(frame, (64, 64), interpolation=cv2.INTER_AREA)
+    if miniatura.ndim == 3:
+        miniatura = cv2.cvtColor(miniatura, cv2.COLOR_BGR2GRAY)
+    histograma = cv2.calcHist([miniatura], [0], None, [_BINS_HISTOGRAMA], [0, 256]).ravel()
+    return histograma / histograma.sum()
+
+
+def _filtrar_cortes(frames: Iterable[tuple], threshold: float, min_scene_length: int, cortes: list) -> Iterator[tuple]:
+    """
+    Deja pasar solo el primer frame de cada escena.
+    
+    Cada frame se compara con el anterior mediante la distancia entre histogramas de
+    luminancia (0 = idénticos, 1 = disjuntos). Hay corte cuando la distancia supera el
+    umbral y la escena actual dura al menos min_scene_length frames.
+    
+    Args:
+        frames: Tuplas (número de frame, marca de tiempo en ms, frame)
+        threshold: Distancia mínima (0-1) para considerar un cambio de escena
+        min_scene_length: Longitud mínima de una escena, en frames del video
+        cortes: Lista donde se agregan los cortes detectados
+    
+    Yields:
+        tuple: (número de frame, marca de tiempo en ms, frame) del inicio de cada escena
+    """
+    histograma_anterior = None
+    inicio_escena = None
+    for frame_count, timestamp, frame in frames:
+        histograma = _histograma_de_frame(frame)
+        puntuacion = 1.0 if histograma_anterior is None else float(0.5 * np.abs(histograma - histograma_anterior).sum())
+        histograma_anterior = histograma
+        
+        if inicio_escena is None or (puntuacion >= threshold and frame_count - inicio_escena >= min_scene_length):
+            inicio_escena = frame_count
+            cortes.append({'frame': frame_count, 'timestamp_ms': timestamp, 'score': puntuacion})
+            yield frame_count, timestamp, frame
+
+
+def detectar_escenas(video_path: Union[str, Path], threshold: float = 0.3, min_scene_length: int = 15) -> List[dict]:
+    """
+    Detecta los cortes de escena de un video sin escribir frames en disco.
+    
+    Args:
+        video_path: Ruta del video
+        threshold: Distancia entre histogramas (0-1) a partir de la cual hay un cambio de escena
+        min_scene_length: Longitud mínima de una escena, en frames
+    
+    Returns:
+        List[dict]: Cortes con frame, timestamp_ms y score (el primero es siempre el frame 0)
+    """
+    cortes = []
+    for _ in _filtrar_cortes(iterar_frames(video_path), threshold, min_scene_length, cortes):
+        pass
+    return cortes
+
+
+def _leer_repeticiones(frames_path: Path, frames: list, usar_raw: bool) -> List[int]:
+    """
+    Devuelve cuántas veces debe escribirse cada frame para recuperar la duración original
+    de una extracción con frames duplicados omitidos.
+    
+    Args:
+        frames_path: Carpeta de frames
+        frames: Frames a unir (rutas de archivo o frames del almacén raw)
+        usar_raw: Indica si los frames provienen del almacén raw
+    
+    Returns:
+        List[int]: Repeticiones de cada frame (todo 1 si no hay mapa de duplicados)
+    """
+    dedup_path = frames_path / DEDUP_FILENAME
+    if not dedup_path.exists():
+        return [1] * len(frames)
+    
+    with open(dedup_path, 'r', encoding='utf-8') as archivo:
+        kept = json.load(archivo)['kept']
+    if usar_raw:
+        return [repeticiones for _, repeticiones in kept][:len(frames)]
+    
+    por_numero = {frame_number: repeticiones for frame_number, repeticiones in kept}
+    return [por_numero.get(int(frame_path.stem.split('_')[1]), 1) for frame_path in frames]
+
+
+def _buscar_frame(video: cv2.VideoCapture, frame_number: int) -> bool:
+    """
+    Posiciona la captura en un número de frame y comprueba que el contenedor respetó la búsqueda.
+    
+    Returns:
+        bool: True si la captura quedó exactamente en frame_number
+    """
+    if not video.set(cv2.CAP_PROP_POS_FRAMES, frame_number):
+        return False
+    return int(video.get(cv2.CAP_PROP_POS_FRAMES)) == frame_number
+
+
+def _planificar_segmentos(total_frames: int, segments: int, frame_interval: int = 1) -> List[Tuple[int, Optional[int]]]:
+    """
+    Divide un video en rangos de frames [inicio, fin) que empiezan en múltiplos del intervalo,
+    de modo que los segmentos guardan exactamente los mismos frames que la extracción secuencial.
+    
+    Returns:
+        List[tuple]: (inicio, fin) de cada segmento; el último tiene fin None (hasta el final del video)
+    """
+    inicios = sorted({-(-(i * total_frames // segments) // frame_interval) * frame_interval for i in range(segments)})
+    inicios = [inicio for inicio in inicios if inicio < total_frames]
+    return list(zip(inicios, inicios[1:] + [None]))
+
+
+def _busqueda_fiable(video_path: str, posiciones: List[int]) -> bool:
+    """
+    Comprueba que el contenedor permite buscar frames con exactitud en las posiciones dadas:
+    el frame leído tras buscar n debe ser idéntico al que sigue a buscar n - 1. Los
+    contenedores que solo saltan a fotogramas clave no superan la comprobación.
+    """
+    video = cv2.VideoCapture(str(video_path))
+    try:
+        for posicion in posiciones:
+            if posicion < 1 or not _buscar_frame(video, posicion):
+                return False
+            leido, frame = video.read()
+            if not leido or not _buscar_frame(video, posicion - 1):
+                return False
+            video.read()
+            leido_siguiente, siguiente = video.read()
+            if not leido_siguiente or not np.array_equal(frame, siguiente):
+                return False
+        return True
+    finally:
+        video.release()
+
+
+def _contar_guardados(desde: int, hasta: int, frame_interval: int) -> int:
+    """Cantidad de múltiplos del intervalo entre desde y hasta (ambos incluidos)."""
+    return hasta // frame_interval - (desde - 1) // frame_interval if hasta >= desde else 0
+
+
+def _frames_validos(video_output_path: Path, storage: str, image_format: str, saved_count: int) -> Tuple[int, int]:
+    """
+    Comprueba en disco los frames que un manifiesto da por guardados: cada archivo debe
+    existir y no estar vacío, cada miembro de los fragmentos tar debe estar completo y el
+    almacén raw debe contener todos los frames.
+
+    Returns:
+        tuple: (cantidad de frames del prefijo válido, número del último frame de ese prefijo
+            o -1 si no se conoce). La cantidad es saved_count si todos son válidos
+    """
+    if saved_count <= 0:
+        return 0, -1
+    if storage == 'raw':
+        try:
+            _, frames = leer_frames_raw(video_output_path / RAW_FILENAME)
+        except (OSError, ValueError):
+            return 0, -1
+        return (saved_count, -1) if len(frames) >= saved_count else (0, -1)
+
+    indice = leer_indice(video_output_path)
+    entradas = indice[1] if indice is not None and len(indice[1]) >= saved_count else None
+    if storage == 'archive':
+        miembros = leer_indice_de_archivo(video_output_path)[:saved_count]
+        tamanos = {}
+        for shard in {miembro['shard'] for miembro in miembros}:
+            ruta = video_output_path / nombre_de_fragmento(shard)
+            tamanos[shard] = ruta.stat().st_size if ruta.exists() else 0
+        validos = [miembro['size'] > 0 and tamanos[miembro['shard']] >= miembro['offset'] + miembro['size']
+                   for miembro in miembros]
+    else:
+        if entradas is not None:
+            rutas = [video_output_path / entrada['file'] for entrada in entradas[:saved_count]]
+        else:
+            # Carpeta sin índice (versión anterior): se comprueban los archivos presentes
+            rutas = _listar_frames(video_output_path, image_format)[:saved_count]
+        validos = [ruta.exists() and ruta.stat().st_size > 0 for ruta in rutas]
+
+    cantidad = next((i for i, valido in enumerate(validos) if not valido), len(validos))
+    if cantidad >= saved_count:
+        return saved_count, -1
+    if cantidad == 0 or entradas is None:
+        return 0, -1
+    return cantidad, entradas[cantidad - 1]['frame']
+
+
+def _extraer_segmento(video_path: str, inicio: int, fin: Optional[int], ultimo_hecho: int, frame_interval: int,
+                      timer: StageTimer, detener: threading.Event, al_frame: Callable,
+                      cadena: TransformChain = None, transform_batch: int = 16,
+                      presupuesto: MemoryBudget = None) -> Tuple[bool, Optional[float]]:
+    """
+    Decodifica el rango [inicio, fin) con su propia captura y entrega a al_frame
+    (frame_count, timestamp, frame) los frames del intervalo posteriores a ultimo_hecho,
+    transformados por lotes con la cadena si se indica.
+    
+    Returns:
+        tuple: (si el segmento se completó, frames decodificados hasta el final del video o None
+            si el segmento no es el último)
+    """
+    video = cv2.VideoCapture(str(video_path))
+    try:
+        # Reanudar dentro del segmento si se puede; si no, desde su inicio (ya comprobado)
+        start_frame = ultimo_hecho + 1 if ultimo_hecho >= inicio else inicio
+        if start_frame > 0 and not _buscar_frame(video, start_frame):
+            start_frame = inicio
+            if not _buscar_frame(video, inicio):
+                raise IOError(f"No se pudo buscar el frame {inicio} en {video_path}")
+        interrumpido = False
+        
+        def en_rango() -> Iterator[tuple]:
+            nonlocal interrumpido
+            for frame_count, timestamp, frame in _iterar_captura(video, frame_interval, start_frame, timer):
+                if detener.is_set():
+                    interrumpido = True
+                    return
+                if fin is not None and frame_count >= fin:
+                    return
+                if frame_count > ultimo_hecho:
+                    yield frame_count, timestamp, frame
+        
+        fuente = en_rango()
+        if cadena is not None:
+            # Cada frame transformado llega a al_frame con su memoria ya reservada
+            fuente = _transformar_por_lotes(fuente, cadena, transform_batch, timer, presupuesto, transferir=True)
+        for frame_count, timestamp, frame in fuente:
+            al_frame(frame_count, timestamp, frame)
+        if interrumpido:
+            return False, None
+        return True, (video.get(cv2.CAP_PROP_POS_FRAMES) if fin is None else None)
+    finally:
+        video.release()
+
+
+def _abrir_indice(video_output_path: Path, metadatos: dict, saved_count: int, last_frame: int = -1,
+                  keep: Callable[[int], bool] = None) -> Optional[FrameIndexWriter]:
+    """
+    Abre el índice de frames conservando las entradas de lo ya extraído (last_frame o keep,
+    como en FrameIndexWriter). Devuelve None si el índice previo no cubre los saved_count
+    frames guardados (carpeta de una versión anterior).
+    """
+    indice = FrameIndexWriter(video_output_path, metadatos, last_frame, keep)
+    if indice.count != saved_count:
+        indice.discard()
+        return None
+    return indice
+
+
+def _extraer_por_segmentos(video_path: str, video_output_path: Path, plan: List[Tuple[int, Optional[int]]],
+                           last_frame: int, previos: Optional[list], frame_interval: int, fps: float,
+                           total_frames: int, extension: str, parametros: list, metadatos_indice: dict,
+                           registrar_progreso: Callable, errores: list, timer: StageTimer,
+                           presupuesto: MemoryBudget, emitir: Callable, cancel_event: threading.Event = None,
+                           cadena: TransformChain = None, transform_batch: int = 16) -> Tuple[int, int, bool]:
+    """
+    Extrae los rangos del plan en paralelo, cada uno con su propia captura (ver _extraer_segmento),
+    escribiendo un archivo de imagen por frame con los mismos nombres que la extracción secuencial.
+    
+    Los puntos de control guardan en el manifiesto, mediante registrar_progreso, el prefijo
+    contiguo ya escrito (válido para reanudar en secuencial) y el último frame de cada segmento;
+    al cancelar se registra ese estado antes de volver.
+    
+    Args:
+        plan: Rangos [inicio, fin) de cada segmento (fin None en el último)
+        last_frame: Último frame del punto de control secuencial (-1 si no hay)
+        previos: Estado por segmentos del manifiesto ([inicio, fin, último]) o None
+        metadatos_indice: Metadatos del índice de frames
+        registrar_progreso: Función del manifiesto registrar_progreso(frame, segmentos=...)
+        errores: Lista donde se registran los errores de los segmentos
+        (el resto, como en _extraer_video)
+    
+    Returns:
+        tuple: (frames guardados en total, último frame guardado, si se canceló)
+    """
+    print(f" - Extrayendo en {len(plan)} segmentos en paralelo")
+    
+    # Último frame guardado de cada segmento (inicio - 1 si aún no empezó), a partir del
+    # estado guardado por segmentos o del punto de control secuencial
+    inicios = [inicio for inicio, _ in plan]
+    if previos and [(inicio, fin) for inicio, fin, _ in previos] == plan:
+        estado = [ultimo for _, _, ultimo in previos]
+    else:
+        estado = [max(last_frame, inicio - 1) if fin is None else min(max(last_frame, inicio - 1), fin - 1)
+                  for inicio, fin in plan]
+    terminados = [False] * len(plan)
+    saved_count = sum(_contar_guardados(inicio, ultimo, frame_interval) for (inicio, _), ultimo in zip(plan, estado))
+    if saved_count:
+        print(f" - Reanudando segmentos ({saved_count} frames ya guardados)")
+    
+    def registrar_segmentos():
+        """Punto de control: prefijo contiguo y estado de cada segmento."""
+        prefijo = estado[-1]
+        for ultimo, terminado in zip(estado, terminados):
+            if not terminado:
+                prefijo = ultimo
+                break
+        registrar_progreso(prefijo, segmentos=[[inicio, fin, ultimo] for (inicio, fin), ultimo in zip(plan, estado)])
+    
+    indice = _abrir_indice(video_output_path, metadatos_indice, saved_count,
+                           keep=lambda frame_number: frame_number <= estado[bisect_right(inicios, frame_number) - 1])
+    video_name = video_output_path.name
+    lock = threading.Lock()
+    detener = threading.Event()
+    decodificados = sum(ultimo - inicio + 1 for inicio, ultimo in zip(inicios, estado))
+    
+    def al_frame(segmento: int, frame_count: int, timestamp: float, frame: np.ndarray):
+        """Guarda un frame de un segmento y actualiza el progreso común."""
+        nonlocal saved_count, decodificados
+        frame_filename = video_output_path / f"frame_{frame_count:06d}{extension}"
+        if cadena is None:
+            presupuesto.acquire(frame.nbytes)
+        try:
+            _guardar_imagen(frame_filename, frame, extension, parametros, timer)
+        finally:
+            presupuesto.release(frame.nbytes)
+        with lock:
+            if indice is not None:
+                indice.append(frame_count, timestamp, frame_filename.name, frame.shape)
+            decodificados += frame_count - estado[segmento]
+            estado[segmento] = frame_count
+            saved_count += 1
+            if saved_count % 100 == 0:
+                print(f"(OK) Frames guardados para {video_name}: {saved_count}")
+            emitir(ProgressEvent('extract', video_name, decodificados, total_frames, timer.elapsed))
+            if saved_count % _INTERVALO_CHECKPOINT == 0:
+                if indice is not None:
+                    indice.flush()
+                registrar_segmentos()
+        if cancel_event is not None and cancel_event.is_set():
+            detener.set()
+    
+    def ejecutar_segmento(segmento: int):
+        inicio, fin = plan[segmento]
+        try:
+            completo, frames_leidos = _extraer_segmento(
+                video_path, inicio, fin, estado[segmento], frame_interval, timer, detener,
+                lambda *datos: al_frame(segmento, *datos), cadena, transform_batch, presupuesto
+            )
+        except BaseException:
+            detener.set()
+            raise
+        terminados[segmento] = completo
+        return frames_leidos
+    
+    fin_ms = None
+    try:
+        with ThreadPoolExecutor(max_workers=len(plan)) as executor:
+            futuros = [executor.submit(ejecutar_segmento, segmento) for segmento in range(len(plan))]
+        for futuro in futuros:
+            if futuro.exception() is not None:
+                errores.append(futuro.exception())
+        frames_leidos = futuros[-1].result() if not errores else None
+        if frames_leidos is not None and fps > 0:
+            fin_ms = frames_leidos * 1000 / fps
+    finally:
+        if indice is not None:
+            indice.close(fin_ms if all(terminados) else None)
+    
+    # Una extracción cancelada conserva el estado de cada segmento para poder reanudarse
+    cancelado = not errores and not all(terminados)
+    if cancelado:
+        registrar_segmentos()
+    return saved_count, max(estado), cancelado
+
+
+def _extraer_video(video_path: str, video_output_path: Path, frame_interval: int = 1, workers: int = 1,
+                   image_format: str = 'png', quality: int = None, storage: str = 'images',
+                   resume: bool = True, dedup_threshold: float = None, scene_threshold: float = None,
+                   min_scene_length: int = 15, on_event: Callable = None,
+                   cancel_event: threading.Event = None, report: bool = False,
+                   shard_frames: int = 10000, shard_bytes: int = 1 << 30,
+                   cache_dir: Union[str, Path] = None, cache_max_bytes: int = CACHE_MAX_BYTES,
+                   segments: int = 1, max_inflight_bytes: int = None, start_time: float = None,
+                   end_time: float = None, sample_fps: float = None, transforms=None,
+                   transform_batch: int = 16) -> int:
+    """
+    Extrae los frames de un único video en su carpeta de salida.
+    
+    Con workers > 1 la decodificación se ejecuta en el hilo actual y alimenta una
+    cola acotada que consumen varios hilos de codificación/escritura (cv2.imencode
+    libera el GIL, por lo que la compresión PNG se reparte entre varios núcleos).
+    Con storage='raw' los frames se agregan sin comprimir a un único archivo
+    mapeado en memoria (frames.raw) y no se usan hilos de escritura.
+    Con storage='archive' los frames codificados se anexan en orden a fragmentos tar
+    (frames-NNNNNN.tar) con un índice de desplazamientos (archive.jsonl); los hilos
+    solo codifican.
+    Con segments > 1 el video se divide en rangos de frames alineados con frame_interval
+    que decodifican y escriben hilos independientes; los nombres de los frames coinciden
+    exactamente con los de la extracción secuencial.
+    
+    Con max_inflight_bytes, el decodificador (o cada segmento) espera mientras los frames
+    aún no escritos superan ese tamaño, calculado con el tamaño real de cada frame.
+    
+    Con start_time/end_time solo se extrae ese rango del video, y con sample_fps se guardan
+    esa cantidad de frames por segundo en lugar de uno cada frame_interval. Los frames que
+    no se guardan no se decodifican por completo: se saltan con grab() o, en muestreos
+    dispersos sobre contenedores que buscan con exactitud, con búsquedas.
+    
+    Con transforms, los frames decodificados se agrupan en lotes de transform_batch frames
+    apilados en un único arreglo y pasan por la cadena (recorte, escala, grises, ...) antes
+    de escribirse; el índice registra la forma resultante de cada frame.
+    
+    El progreso se registra en un manifiesto (manifest.json) de la carpeta de salida.
+    Con resume=True, una ejecución con el mismo video y parámetros continúa tras el
+    último frame escrito, o termina de inmediato si la extracción ya estaba completa.
+    
+    Con dedup_threshold, los frames cuya firma difiere del último frame guardado menos
+    que el umbral no se escriben; dedup.json registra cuántas veces se repite cada
+    frame guardado para que unir_frames_en_video recupere la duración original.
+    
+    Con scene_threshold solo se guarda el primer frame de cada escena y la lista de
+    cortes (número de frame y marca de tiempo) se escribe en scenes.json.
+    
+    Args:
+        video_path: Ruta del video a procesar
+        video_output_path: Carpeta donde se guardarán los frames
+        frame_interval: Intervalo de frames a guardar (1 = todos los frames)
+        workers: Número de hilos de codificación/escritura (1 = sin pipeline)
+        image_format: Formato de los frames ('png', 'jpg', 'webp' o 'bmp')
+        quality: Compresión PNG (0-9) o calidad JPEG/WebP (0-100)
+        storage: 'images' (un archivo por frame), 'raw' (almacén frames.raw) o 'archive'
+            (fragmentos tar con índice de desplazamientos)
+        resume: Reanudar a partir del manifiesto si coincide el video y los parámetros
+        dedup_threshold: Diferencia media (0-255) bajo la cual un frame se considera duplicado
+        scene_threshold: Distancia entre histogramas (0-1) que marca un cambio de escena
+        min_scene_length: Longitud mínima de una escena, en frames
+        on_event: Función que recibe VideoStartEvent, ProgressEvent (tras cada frame guardado)
+            y VideoSummaryEvent (con los tiempos de decode, encode y write)
+        cancel_event: Evento que, al activarse, detiene la extracción y libera la captura
+        report: Imprimir el resumen por etapas al terminar el video
+        shard_frames: Con storage='archive', cantidad máxima de frames por fragmento
+        shard_bytes: Con storage='archive', tamaño máximo de cada fragmento en bytes
+        cache_dir: Carpeta de la caché de extracciones (None = sin caché)
+        cache_max_bytes: Tamaño máximo de la caché antes de expulsar las entradas menos usadas
+        segments: Rangos de frames decodificados en paralelo, cada uno con su propia captura
+            (1 = decodificación secuencial). Solo con storage='images' y sin filtros, y si el
+            contenedor permite buscar frames con exactitud
+        max_inflight_bytes: Bytes máximos de frames decodificados pendientes de escribir
+            (None = sin límite; el pico se informa igualmente en el resumen)
+        start_time: Segundo del video desde el que se extrae (None = desde el inicio)
+        end_time: Segundo del video hasta el que se extrae, sin incluirlo (None = hasta el final)
+        sample_fps: Frames por segundo de video a guardar; reemplaza a frame_interval
+        transforms: Cadena de transformaciones (texto, lista de pasos o TransformChain; ver
+            transforms.crear_cadena). None = los frames se guardan tal como se decodifican
+        transform_batch: Frames por lote al aplicar las transformaciones
+    
+    Returns:
+        int: Cantidad de frames guardados
+    """
+    video_name = video_output_path.name
+    cadena = crear_cadena(transforms)
+    extension, parametros = _perfil_de_formato(image_format, quality)
+    timer = StageTimer()
+    presupuesto = MemoryBudget(max_inflight_bytes)
+    emitir = on_event if on_event is not None else (lambda evento: None)
+    
+    # Comprobar si existe una extracción previa del mismo video con los mismos parámetros
+    identidad = identidad_de_video(video_path) if os.path.isfile(video_path) else None
+    params = {
+        'frame_interval': frame_interval,
+        'image_format': image_format,
+        'quality': quality,
+        'storage': storage,
+        'dedup_threshold': dedup_threshold,
+        'scene_threshold': scene_threshold,
+        'min_scene_length': min_scene_length,
+    }
+    # Solo se registran si se usan, para que las extracciones anteriores sigan siendo reanudables
+    muestreo = {'start_time': start_time, 'end_time': end_time, 'sample_fps': sample_fps}
+    params.update({clave: valor for clave, valor in muestreo.items() if valor is not None})
+    if cadena is not None:
+        params['transforms'] = cadena.to_list()
+    manifiesto = leer_manifiesto(video_output_path) if resume and identidad else None
+    if manifiesto and (manifiesto.get('params') != params or not misma_identidad(manifiesto.get('source', {}), identidad)):
+        manifiesto = None
+    
+    # El almacén raw y los filtros con estado (duplicados, escenas) se rehacen completos;
+    # los archivos de imagen de una extracción normal se pueden reanudar
+    reanudable = storage != 'raw' and dedup_threshold is None and scene_threshold is None
+    
+    # El manifiesto solo vale si los frames que registra siguen en disco y no están vacíos
+    if manifiesto:
+        validos, ultimo_valido = _frames_validos(video_output_path, storage, image_format, manifiesto['saved_count'])
+        if validos < manifiesto['saved_count']:
+            print(f" - Frames faltantes o dañados en la extracción anterior: se conservan {validos if reanudable else 0} "
+                  f"de {manifiesto['saved_count']} y se extrae el resto")
+            if reanudable and validos > 0:
+                manifiesto = {**manifiesto, 'last_frame': ultimo_valido, 'saved_count': validos,
+                              'complete': False, 'segments': None}
+            else:
+                manifiesto = None
+    
+    if manifiesto and manifiesto.get('complete'):
+        print(f" - Extracción ya completada anteriormente ({manifiesto['saved_count']} frames)")
+        emitir(VideoSummaryEvent('extract', video_name, manifiesto['saved_count'], timer.elapsed))
+        return manifiesto['saved_count']
+    
+    # Reutilizar una extracción idéntica del mismo contenido (aunque el archivo tenga otro nombre)
+    clave = clave_de_cache(huella_de_contenido(video_path), params) if cache_dir is not None and identidad else None
+    if clave is not None:
+        entrada = materializar_desde_cache(cache_dir, clave, video_output_path, _ARTEFACTOS_DE_EXTRACCION)
+        if entrada is not None:
+            guardar_manifiesto(video_output_path, {
+                'source': identidad,
+                'params': params,
+                'last_frame': entrada['last_frame'],
+                'saved_count': entrada['saved_count'],
+                'complete': True,
+            })
+            print(f" - Frames recuperados de la caché ({entrada['saved_count']} frames)")
+            emitir(VideoSummaryEvent('extract', video_name, entrada['saved_count'], timer.elapsed))
+            return entrada['saved_count']
+    
+    last_frame = -1
+    saved_count = 0
+    if manifiesto and reanudable:
+        last_frame = manifiesto['last_frame']
+        saved_count = manifiesto['saved_count']
+        if storage == 'archive' and len(leer_indice_de_archivo(video_output_path)) < saved_count:
+            # Los fragmentos no cubren lo ya extraído: empezar de nuevo
+            last_frame, saved_count = -1, 0
+    
+    # Abrir el video
+    video = cv2.VideoCapture(video_path)
+    
+    # Verificar si el video se abrió correctamente
+    if not video.isOpened():
+        print(f" - Error al abrir el video: {video_path}")
+        return 0
+    
+    # Obtener información del video
+    total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = video.get(cv2.CAP_PROP_FPS)
+    
+    print(f" - Total frames en el video: {total_frames}")
+    print(f" - FPS: {fps}\n")
+    
+    # Rango de frames [inicio, fin) y frames de origen entre dos muestras
+    inicio, fin, paso = 0, None, None
+    if start_time is not None or end_time is not None or sample_fps is not None:
+        if fps <= 0:
+            print(" - El video no informa sus FPS: no se puede extraer por tiempo")
+            video.release()
+            return 0
+        if start_time is not None:
+            inicio = max(0, math.ceil(start_time * fps - 1e-6))
+        if end_time is not None:
+            fin = math.ceil(end_time * fps - 1e-6)
+        if sample_fps is not None:
+            paso = fps / sample_fps
+        print(f" - Rango: frames {inicio} a {fin if fin is not None else 'final'}"
+              + (f", una muestra cada {max(1.0, paso):g} frames" if paso is not None else ""))
+    if cadena is not None:
+        print(f" - Transformaciones: {cadena.describe()} (lotes de {transform_batch} frames)")
+    fin_rango = min(fin, total_frames) if fin is not None and total_frames > 0 else (fin or total_frames)
+    emitir(VideoStartEvent('extract', video_name, total_frames, fps))
+    
+    def registrar_progreso(frame_number: int, complete: bool = False, segmentos: list = None):
+        """Guarda en el manifiesto el último frame escrito por completo (y el estado de cada segmento)."""
+        if identidad is None:
+            return
+        manifiesto_actual = {
+            'source': identidad,
+            'params': params,
+            'last_frame': frame_number,
+            'saved_count': saved_count,
+            'complete': complete,
+        }
+        if segmentos is not None:
+            manifiesto_actual['saved_count'] = _contar_guardados(0, frame_number, frame_interval)
+            manifiesto_actual['segments'] = segmentos
+        guardar_manifiesto(video_output_path, manifiesto_actual)
+    
+    # Antes de escribir ningún frame, el manifiesto pasa a describir esta ejecución (incompleta):
+    # si se cancela o falla, la siguiente no confía en un 'complete' de una ejecución anterior.
+    # Solo se conserva el de una extracción parcial por segmentos que se va a continuar
+    if not (manifiesto and reanudable and manifiesto.get('segments')):
+        registrar_progreso(last_frame)
+    
+    # Dividir el video en segmentos que se decodifican en paralelo, si el contenedor lo permite
+    plan = None
+    if segments > 1:
+        if storage != 'images' or dedup_threshold is not None or scene_threshold is not None:
+            print(" - La extracción por segmentos requiere imágenes sin filtros: se extrae de forma secuencial")
+        elif any(valor is not None for valor in muestreo.values()):
+            print(" - La extracción por segmentos no admite rangos ni muestreo por tiempo: se extrae de forma secuencial")
+        elif total_frames < segments * frame_interval * 2:
+            print(" - Video demasiado corto o sin cantidad de frames conocida: se extrae de forma secuencial")
+        else:
+            plan = _planificar_segmentos(total_frames, segments, frame_interval)
+            if not _busqueda_fiable(video_path, [inicio for inicio, _ in plan[1:]]):
+                print(" - El contenedor no permite buscar frames con exactitud: se extrae de forma secuencial")
+                plan = None
+    
+    # Índice con el número, la marca de tiempo, la forma y el archivo de cada frame guardado
+    metadatos_indice = {
+        'source': str(video_path),
+        'fps': fps,
+        'total_frames': total_frames,
+        'frame_interval': frame_interval,
+        'storage': storage,
+        'image_format': image_format,
+        **{clave: valor for clave, valor in muestreo.items() if valor is not None},
+    }
+    
+    errores = []
+    ultimo_frame = last_frame
+    cancelado = False
+    fin_ms = None
+    if plan is not None:
+        video.release()
+        previos = manifiesto.get('segments') if manifiesto and reanudable else None
+        saved_count, ultimo_frame, cancelado = _extraer_por_segmentos(
+            video_path, video_output_path, plan, last_frame, previos, frame_interval, fps, total_frames,
+            extension, parametros, metadatos_indice, registrar_progreso, errores, timer, presupuesto,
+            emitir, cancel_event, cadena, transform_batch
+        )
+    else:
+        # Saltar la parte ya extraída; si el contenedor no permite buscar con exactitud,
+        # se decodifica desde el inicio y se omiten los frames que ya están en disco
+        start_frame = 0
+        if last_frame >= 0:
+            if _buscar_frame(video, last_frame + 1):
+                start_frame = last_frame + 1
+            else:
+                video.release()
+                video = cv2.VideoCapture(video_path)
+            print(f" - Reanudando tras el frame {last_frame} ({saved_count} frames ya guardados)")
+        
+        # Frames a guardar; en muestreos dispersos se comprueba si el contenedor permite saltar buscando
+        objetivos = _objetivos_de_muestreo(frame_interval, inicio, fin, paso)
+        buscar = False
+        if max(paso or frame_interval, inicio - start_frame) >= _SALTO_MINIMO_BUSQUEDA:
+            muestras = []
+            for objetivo in _objetivos_de_muestreo(frame_interval, max(inicio, 1), fin, paso):
+                muestras.append(objetivo)
+                if len(muestras) == 2:
+                    break
+            buscar = bool(muestras) and _busqueda_fiable(video_path, muestras)
+            if not buscar:
+                print(" - El contenedor no permite buscar frames con exactitud: los frames intermedios se saltan con grab()")
+        
+        # Preparar la etapa de escritura: almacén raw, directa o mediante pipeline de hilos
+        hilos = []
+        raw_writer = None
+        archive_writer = None
+        codificador = None
+        pendientes = deque()
+        # Con transformaciones, cada frame llega al guardado con su memoria ya reservada por los lotes
+        reservar = presupuesto.acquire if cadena is None else (lambda nbytes: None)
+        esperar_memoria = presupuesto.acquire
+        if storage == 'raw':
+            capacity = int((fin_rango - inicio) / max(1.0, paso or frame_interval)) + 1 if fin_rango > 0 else 256
+            raw_writer = RawFrameWriter(video_output_path / RAW_FILENAME, fps=fps, capacity=capacity)
+            
+            def guardar(filename, frame):
+                reservar(frame.nbytes)
+                try:
+                    with timer.measure('write'):
+                        raw_writer.write(frame)
+                finally:
+                    presupuesto.release(frame.nbytes)
+        elif storage == 'archive':
+            archive_writer = ArchiveFrameWriter(video_output_path, max_bytes=shard_bytes, max_frames=shard_frames, keep=saved_count)
+            if workers > 1:
+                codificador = ThreadPoolExecutor(max_workers=workers)
+            
+            def escribir_pendiente():
+                """Anexa al fragmento el frame codificado más antiguo, respetando el orden."""
+                name, futuro, nbytes = pendientes.popleft()
+                try:
+                    datos = futuro.result()
+                    with timer.measure('write'):
+                        archive_writer.write(name, datos.tobytes())
+                finally:
+                    presupuesto.release(nbytes)
+            
+            def hacer_espacio(nbytes: int):
+                """Reserva nbytes; solo este hilo libera memoria (al escribir), así que vacía pendientes hasta que quepan."""
+                while pendientes and not presupuesto.try_acquire(nbytes):
+                    escribir_pendiente()
+                if not pendientes:
+                    presupuesto.acquire(nbytes)
+            
+            if codificador is not None:
+                esperar_memoria = hacer_espacio
+                if cadena is None:
+                    reservar = hacer_espacio
+            
+            def guardar(filename, frame):
+                if codificador is None:
+                    reservar(frame.nbytes)
+                    try:
+                        datos = _codificar_imagen(frame, extension, parametros, timer)
+                        with timer.measure('write'):
+                            archive_writer.write(filename.name, datos.tobytes())
+                    finally:
+                        presupuesto.release(frame.nbytes)
+                    return
+                reservar(frame.nbytes)
+                pendientes.append((filename.name, codificador.submit(_codificar_imagen, frame, extension, parametros, timer), frame.nbytes))
+                while len(pendientes) > workers * 2:
+                    escribir_pendiente()
+        elif workers > 1:
+            cola = queue.Queue(maxsize=workers * 2)
+            for _ in range(workers):
+                hilo = threading.Thread(target=_escritor_frames, args=(cola, errores, extension, parametros, timer, presupuesto), daemon=True)
+                hilo.start()
+                hilos.append(hilo)
+            
+            def guardar(filename, frame):
+                # Los hilos de escritura devuelven la memoria al terminar cada frame
+                reservar(frame.nbytes)
+                cola.put((filename, frame))
+        else:
+            def guardar(filename, frame):
+                reservar(frame.nbytes)
+                try:
+                    _guardar_imagen(filename, frame, extension, parametros, timer)
+                finally:
+                    presupuesto.release(frame.nbytes)
+        
+        indice = _abrir_indice(video_output_path, metadatos_indice, saved_count, last_frame)
+        
+        firma_guardada = None
+        kept = []
+        cortes = []
+        try:
+            # Guardar frame según el intervalo especificado (o solo al inicio de cada escena)
+            fuente = _iterar_captura(video, frame_interval, start_frame, timer, objetivos, buscar)
+            if scene_threshold is not None:
+                fuente = _filtrar_cortes(fuente, scene_threshold, min_scene_length, cortes)
+            if cadena is not None:
+                # Los frames ya guardados no se transforman: se descartan antes de formar los lotes
+                fuente = _transformar_por_lotes((item for item in fuente if item[0] > last_frame), cadena,
+                                                transform_batch, timer, presupuesto, transferir=True,
+                                                esperar_memoria=esperar_memoria)
+            for frame_count, timestamp, frame in fuente:
+                if errores:
+                    break
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelado = True
+                    break
+                
+                # Frames anteriores al punto de reanudación que ya están en disco
+                if frame_count <= last_frame:
+                    continue
+                
+                # Omitir frames casi idénticos al último guardado
+                if dedup_threshold is not None:
+                    firma = _firma_de_frame(frame)
+                    if firma_guardada is not None and _diferencia_de_firmas(firma, firma_guardada) < dedup_threshold:
+                        kept[-1][1] += 1
+                        if cadena is not None:
+                            presupuesto.release(frame.nbytes)
+                        continue
+                    firma_guardada = firma
+                    kept.append([frame_count, 1])
+                
+                # Generar nombre del archivo
+                frame_filename = video_output_path / f"frame_{frame_count:06d}{extension}"
+                
+                # Guardar el frame en el formato elegido
+                guardar(frame_filename, frame)
+                if indice is not None:
+                    indice.append(frame_count, timestamp, None if raw_writer else frame_filename.name, frame.shape)
+                saved_count += 1
+                ultimo_frame = frame_count
+                
+                # Mostrar progreso
+                if saved_count % 100 == 0:
+                    print(f"(OK) Frames guardados para {video_name}: {saved_count}")
+                emitir(ProgressEvent('extract', video_name, frame_count + 1 - inicio, max(0, fin_rango - inicio), timer.elapsed))
+                
+                # Registrar un punto de control cuando todo lo anterior ya está escrito
+                if saved_count % _INTERVALO_CHECKPOINT == 0 and reanudable:
+                    if hilos:
+                        cola.join()
+                    if archive_writer is not None:
+                        while pendientes:
+                            escribir_pendiente()
+                        archive_writer.flush()
+                    if not errores:
+                        if indice is not None:
+                            indice.flush()
+                        registrar_progreso(frame_count)
+            else:
+                # Se recorrió el rango completo: registrar dónde termina para la unión
+                if fps > 0:
+                    fin_ms = (fin_rango if fin is not None and total_frames > 0 else video.get(cv2.CAP_PROP_POS_FRAMES)) * 1000 / fps
+        finally:
+            # Detener los hilos de escritura y esperar a que vacíen la cola
+            for _ in hilos:
+                cola.put(None)
+            for hilo in hilos:
+                hilo.join()
+            if raw_writer is not None:
+                raw_writer.close()
+            if archive_writer is not None:
+                try:
+                    while pendientes:
+                        escribir_pendiente()
+                finally:
+                    if codificador is not None:
+                        codificador.shutdown()
+                    archive_writer.close()
+            if indice is not None:
+                indice.close(fin_ms if not errores else None)
+            
+            # Liberar recursos
+            video.release()
+    
+    if errores:
+        raise errores[0]
+    
+    # Resumen por etapas del video
+    resumen = VideoSummaryEvent('extract', video_name, saved_count, timer.elapsed, timer.stages(), cancelado, presupuesto.peak)
+    if report:
+        print(formatear_resumen(resumen))
+    
+    # Una extracción cancelada conserva su último punto de control para poder reanudarse
+    if cancelado:
+        if plan is None and reanudable:
+            registrar_progreso(ultimo_frame)
+        print(f"\n(!) Extracción cancelada para {video_name} tras {saved_count} frames.")
+        emitir(resumen)
+        return saved_count
+    
+    # Guardar el mapa de duplicados antes de dar la extracción por completa
+    dedup_path = video_output_path / DEDUP_FILENAME
+    if dedup_threshold is not None:
+        with open(dedup_path, 'w', encoding='utf-8') as archivo:
+            json.dump({'frame_interval': frame_interval, 'threshold': dedup_threshold, 'kept': kept}, archivo)
+        print(f" - Frames duplicados omitidos: {sum(r for _, r in kept) - len(kept)}")
+    elif dedup_path.exists():
+        dedup_path.unlink()
+    
+    # Guardar la lista de cortes de escena
+    scenes_path = video_output_path / SCENES_FILENAME
+    if scene_threshold is not None:
+        with open(scenes_path, 'w', encoding='utf-8') as archivo:
+            json.dump({'threshold': scene_threshold, 'min_scene_length': min_scene_length, 'cuts': cortes}, archivo, indent=2)
+        print(f" - Escenas detectadas: {len(cortes)}")
+    elif scenes_path.exists():
+        scenes_path.unlink()
+    registrar_progreso(ultimo_frame, complete=True)
+    
+    # Guardar la extracción en la caché (requiere el índice para saber qué archivos la forman)
+    if clave is not None and indice is not None:
+        try:
+            guardar_en_cache(cache_dir, clave, video_output_path, _archivos_de_extraccion(video_output_path, storage), {
+                'source': str(video_path),
+                'params': params,
+                'last_frame': ultimo_frame,
+                'saved_count': saved_count,
+            }, cache_max_bytes)
+        except OSError as e:
+            print(f" - No se pudo guardar la extracción en la caché: {str(e)}")
+    
+    print(f"\n(OK) Proceso completado para {video_name}.")
+    print(f"Se guardaron {saved_count} frames en {video_output_path}")
+    emitir(resumen)
+    return saved_count
+
+
+def _archivos_de_extraccion(video_output_path: Path, storage: str) -> List[str]:
+    """Archivos de la carpeta de salida que forman la extracción registrada en su índice."""
+    _, entradas = leer_indice(video_output_path)
+    if storage == 'raw':
+        nombres = [RAW_FILENAME]
+    elif storage == 'archive':
+        fragmentos = sorted({entrada['shard'] for entrada in leer_indice_de_archivo(video_output_path)})
+        nombres = [nombre_de_fragmento(shard) for shard in fragmentos] + [ARCHIVE_INDEX_FILENAME]
+    else:
+        nombres = [entrada['file'] for entrada in entradas]
+    nombres.append(INDEX_FILENAME)
+    return nombres + [nombre for nombre in (DEDUP_FILENAME, SCENES_FILENAME) if (video_output_path / nombre).exists()]
+
+
+def _nombres_de_salida(video_paths: List[str]) -> List[str]:
+    """
+    Asigna a cada video un nombre de carpeta único a partir de su stem.
+    
+    Videos con el mismo stem (p. ej. "a/clip.mp4" y "b/clip.mov") escribirían en la
+    misma carpeta de Storage/Frames, por lo que a partir del segundo se añade un sufijo.
+    
+    Args:
+        video_paths: Lista de rutas de videos
+    
+    Returns:
+        List[str]: Nombre de carpeta para cada video, en el mismo orden
+    """
+    nombres = []
+    usados = set()
+    for video_path in video_paths:
+        stem = Path(video_path).stem
+        nombre = stem
+        sufijo = 2
+        while nombre in usados:
+            nombre = f"{stem}_{sufijo}"
+            sufijo += 1
+        if nombre != stem:
+            print(f" - Aviso: '{video_path}' comparte nombre con otro video, se guardará en '{nombre}'")
+        usados.add(nombre)
+        nombres.append(nombre)
+    return nombres
+
+
+def _extraer_video_seguro(video_path: str, video_output_path: Path, **opciones) -> int:
+    """Igual que _extraer_video, pero devuelve 0 si el video falla en lugar de propagar el error."""
+    try:
+        return _extraer_video(video_path, video_output_path, **opciones)
+    except Exception as e:
+        print(f" - Error al procesar el video {video_path}: {str(e)}")
+        return 0
+
+
+# Cola por la que los procesos del pool envían su progreso al proceso principal
+_cola_de_eventos = None
+
+
+def _iniciar_proceso(cola_de_eventos):
+    """Inicializador de cada proceso del pool."""
+    global _cola_de_eventos
+    _cola_de_eventos = cola_de_eventos
+
+
+def _extraer_video_en_proceso(video_path: str, video_output_path: Path, **opciones) -> tuple:
+    """
+    Versión de _extraer_video_seguro para el pool de procesos: los callbacks no cruzan
+    procesos, así que el inicio y el progreso (como máximo cuatro por segundo) se envían por
+    la cola de eventos y los resúmenes se devuelven para emitirlos en el proceso principal.
+    
+    Returns:
+        tuple: (frames guardados, lista de VideoSummaryEvent)
+    """
+    resumenes = []
+    ultimo = [0.0]
+    
+    def recoger(evento):
+        if isinstance(evento, VideoSummaryEvent):
+            resumenes.append(evento)
+        elif _cola_de_eventos is not None:
+            ahora = time.monotonic()
+            if isinstance(evento, ProgressEvent) and ahora - ultimo[0] < 0.25 and evento.done < evento.total:
+                return
+            ultimo[0] = ahora
+            _cola_de_eventos.put(evento)
+    return _extraer_video_seguro(video_path, video_output_path, on_event=recoger, **opciones), resumenes
+
+
+def _frames_a_procesar(sondeo: VideoProbe, start_time: float = None, end_time: float = None) -> int:
+    """Frames del rango de tiempo pedido según los metadatos del sondeo."""
+    if sondeo.fps <= 0:
+        return sondeo.frames
+    inicio = math.ceil(start_time * sondeo.fps - 1e-6) if start_time is not None else 0
+    fin = min(sondeo.frames, math.ceil(end_time * sondeo.fps - 1e-6)) if end_time is not None else sondeo.frames
+    return max(0, fin - max(0, inicio))
+
+
+def extraer_frames(video_paths: Union[str, List[str]], frame_interval: int = 1, workers: int = 1, processes: int = 1,
+                   image_format: str = 'png', quality: int = None, storage: str = 'images',
+                   resume: bool = True, dedup_threshold: float = None, scene_threshold: float = None,
+                   min_scene_length: int = 15, on_event: Callable = None,
+                   cancel_event: threading.Event = None, output_dir: Union[str, Path] = None,
+                   report: bool = False, shard_frames: int = 10000, shard_bytes: int = 1 << 30,
+                   cache_dir: Union[str, Path] = None, cache_max_bytes: int = CACHE_MAX_BYTES,
+                   segments: int = 1, max_inflight_bytes: int = None, start_time: float = None,
+                   end_time: float = None, sample_fps: float = None, sample_every: float = None,
+                   transforms=None, transform_batch: int = 16) -> dict:
+    """
+    Extrae frames de uno o varios videos, creando carpetas específicas para cada uno.
+    
+    Args:
+        video_paths: Puede ser una sola ruta (str) o una lista de rutas de videos
+        frame_interval: Intervalo de frames a guardar (1 = todos los frames)
+        workers: Hilos de codificación/escritura por video (1 = modo secuencial)
+        processes: Procesos que extraen videos en paralelo (1 = un video tras otro)
+        image_format: Formato de los frames ('png', 'jpg', 'webp' o 'bmp')
+        quality: Compresión PNG (0-9) o calidad JPEG/WebP (0-100). None = valor por defecto
+        storage: 'images' (un archivo por frame), 'raw' (un único frames.raw sin comprimir por video)
+            o 'archive' (fragmentos tar de solo anexado con índice de desplazamientos)
+        resume: Reanudar extracciones interrumpidas a partir del manifiesto de cada carpeta
+        dedup_threshold: Si se indica, omite frames cuya diferencia media (0-255) con el último
+            frame guardado sea menor al umbral
+        scene_threshold: Si se indica, solo guarda el primer frame de cada escena (distancia entre
+            histogramas de 0 a 1) y escribe los cortes en scenes.json
+        min_scene_length: Longitud mínima de una escena, en frames
+        on_event: Función que recibe los eventos de cada video (VideoStartEvent, ProgressEvent y
+            VideoSummaryEvent). Con processes > 1 solo se emiten el progreso y el resumen al
+            terminar cada video
+        cancel_event: Evento que, al activarse, detiene la extracción. Con processes > 1 se
+            descartan los videos pendientes y los que están en curso terminan
+        output_dir: Carpeta base donde se crean las carpetas de cada video. Si es None, Storage/Frames
+        report: Imprimir al terminar cada video el resumen de tiempos por etapa
+        shard_frames: Con storage='archive', cantidad máxima de frames por fragmento tar
+        shard_bytes: Con storage='archive', tamaño máximo de cada fragmento tar en bytes
+        cache_dir: Carpeta de la caché de extracciones, direccionada por el contenido del video
+            y los parámetros. Un acierto enlaza los frames cacheados en lugar de extraerlos
+            (None = sin caché)
+        cache_max_bytes: Tamaño máximo de la caché; se expulsan las entradas usadas hace más tiempo
+        segments: Divide cada video en este número de rangos de frames que se decodifican en
+            paralelo, cada uno con su propia captura (útil para un único video largo). Si el
+            contenedor no permite buscar con exactitud, ese video se extrae de forma secuencial
+        max_inflight_bytes: Presupuesto de memoria para los frames decodificados que esperan
+            ser escritos (colas de escritura, codificaciones pendientes, segmentos). La
+            decodificación se frena al alcanzarlo. Con processes > 1 se reparte entre los
+            procesos. None = sin límite; el pico se informa en cada VideoSummaryEvent
+        start_time: Segundo desde el que se extrae cada video (None = desde el inicio)
+        end_time: Segundo hasta el que se extrae cada video, sin incluirlo (None = hasta el final)
+        sample_fps: Frames por segundo de video a guardar (p. ej. 1 = un frame por segundo);
+            reemplaza a frame_interval. Los frames intermedios no se decodifican por completo
+        sample_every: Alternativa a sample_fps: segundos entre dos frames guardados
+        transforms: Transformaciones aplicadas a los frames antes de guardarlos, en texto
+            ("crop=0:0:1280:720,resize=640x-1,grayscale"), como lista de pasos o TransformChain.
+            Se aplican a lotes de frames apilados en un solo arreglo
+        transform_batch: Frames por lote al aplicar las transformaciones
+    
+    Returns:
+        dict: Diccionario con el conteo de frames guardados por cada video
+    """
+    # Si no se seleccionó ningún video, terminar
+    if not video_paths:
+        print("No se seleccionó ningún video.")
+        return {}
+    
+    # Validar el perfil de formato y el almacenamiento antes de procesar ningún video
+    _perfil_de_formato(image_format, quality)
+    if storage not in ('images', 'raw', 'archive'):
+        raise ValueError(f"Almacenamiento no soportado: {storage}")
+    if sample_every is not None:
+        if sample_fps is not None:
+            raise ValueError("Indica sample_fps o sample_every, no ambos")
+        if sample_every <= 0:
+            raise ValueError(f"sample_every debe ser positivo: {sample_every}")
+        sample_fps = 1 / sample_every
+    if sample_fps is not None and sample_fps <= 0:
+        raise ValueError(f"sample_fps debe ser positivo: {sample_fps}")
+    if start_time is not None and end_time is not None and end_time <= start_time:
+        raise ValueError(f"El rango de tiempo está vacío: {start_time} - {end_time}")
+    if transform_batch < 1:
+        raise ValueError(f"transform_batch debe ser al menos 1: {transform_batch}")
+    # Se pasa como lista de pasos, que se puede enviar a otros procesos y registrar en el manifiesto
+    cadena = crear_cadena(transforms)
+    opciones = {
+        'frame_interval': frame_interval,
+        'workers': workers,
+        'image_format': image_format,
+        'quality': quality,
+        'storage': storage,
+        'resume': resume,
+        'dedup_threshold': dedup_threshold,
+        'scene_threshold': scene_threshold,
+        'min_scene_length': min_scene_length,
+        'report': report,
+        'shard_frames': shard_frames,
+        'shard_bytes': shard_bytes,
+        'cache_dir': cache_dir,
+        'cache_max_bytes': cache_max_bytes,
+        'segments': segments,
+        'max_inflight_bytes': max_inflight_bytes,
+        'start_time': start_time,
+        'end_time': end_time,
+        'sample_fps': sample_fps,
+        'transforms': cadena.to_list() if cadena is not None else None,
+        'transform_batch': transform_batch,
+    }
+    
+    # Convertir entrada única a lista para procesamiento uniforme
+    if isinstance(video_paths, str):
+        video_paths = [video_paths]
+    
+    # Verificar ruta base de almacenamiento
+    if output_dir is None:
+        base_output_path = Path(verificar_rutas_almacenamiento())
+    else:
+        base_output_path = Path(output_dir)
+        base_output_path.mkdir(parents=True, exist_ok=True)
+    
+    # Diccionario para almacenar resultados
+    results = {}
+    
+    # Sondear todos los videos en paralelo y rechazar los que no se pueden usar antes de empezar
+    nombres = _nombres_de_salida(video_paths)
+    sondeos = sondear_videos(video_paths)
+    trabajos = []
+    totales = {}
+    rechazados = []
+    for video_path, video_name, sondeo in zip(video_paths, nombres, sondeos):
+        if not sondeo.ok:
+            print(f" - Video rechazado: {video_path} ({sondeo.error})")
+            results[video_name] = 0
+            rechazados.append(video_name)
+            continue
+        video_output_path = base_output_path / video_name
+        video_output_path.mkdir(parents=True, exist_ok=True)
+        trabajos.append((video_path, video_name, video_output_path))
+        totales[video_name] = (_frames_a_procesar(sondeo, start_time, end_time), sondeo.width * sondeo.height)
+    
+    total_frames = sum(frames for frames, _ in totales.values())
+    duracion = sum(sondeo.duration for sondeo in sondeos if sondeo.ok)
+    if len(video_paths) > 1:
+        print(f" - {len(trabajos)} vídeos válidos, {total_frames} frames ({duracion:.0f}s de video)")
+    
+    # El progreso de cada video se combina en un progreso y un ETA de toda la ejecución
+    if on_event is not None:
+        on_event(RunStartEvent('extract', len(trabajos), total_frames, duracion, rechazados))
+        on_event = RunTracker('extract', totales, on_event)
+    
+    # Procesar los videos en paralelo, cada uno en su propio proceso
+    if processes > 1 and len(trabajos) > 1:
+        # Importado aquí: cargar multiprocessing encarece el arranque de quien no lo usa
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # Los videos más costosos primero: el pool los reparte a medida que quedan procesos
+        # libres, así un video largo no queda para el final alargando la ejecución
+        por_costo = sorted(trabajos, key=lambda trabajo: totales[trabajo[1]][0] * totales[trabajo[1]][1], reverse=True)
+        procesos = min(processes, len(trabajos))
+        
+        print("\n[ Extracción de FRAMES de vídeo ]")
+        print(f" - Procesando {len(trabajos)} vídeos con {procesos} procesos, del más costoso al menos costoso")
+        
+        # El presupuesto de memoria es del trabajo completo: cada proceso recibe su parte
+        if max_inflight_bytes is not None:
+            opciones['max_inflight_bytes'] = max_inflight_bytes // procesos
+        
+        cola_de_eventos = multiprocessing.Queue() if on_event is not None else None
+        
+        def reenviar_eventos():
+            """Emite en este proceso los eventos de progreso recibidos de los workers."""
+            if cola_de_eventos is None:
+                return
+            while True:
+                try:
+                    evento = cola_de_eventos.get_nowait()
+                except queue.Empty:
+                    return
+                on_event(evento)
+        
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso, initargs=(cola_de_eventos,)) as executor:
+            futuros = {
+                executor.submit(_extraer_video_en_proceso, video_path, video_output_path, **opciones): video_name
+                for video_path, video_name, video_output_path in por_costo
+            }
+            pendientes = set(futuros)
+            while pendientes:
+                terminados, pendientes = wait(pendientes, timeout=0.5, return_when=FIRST_COMPLETED)
+                reenviar_eventos()
+                for futuro in terminados:
+                    video_name = futuros[futuro]
+                    resumenes = []
+                    try:
+                        results[video_name], resumenes = futuro.result()
+                    except Exception as e:
+                        # El proceso del worker terminó de forma inesperada
+                        print(f" - Error al procesar el video {video_name}: {str(e)}")
+                        results[video_name] = 0
+                    if on_event is not None:
+                        for resumen in resumenes:
+                            on_event(resumen)
+                
+                # Descartar los videos que aún no comenzaron
+                if cancel_event is not None and cancel_event.is_set():
+                    for futuro in pendientes:
+                        futuro.cancel()
+                    pendientes = {futuro for futuro in pendientes if not futuro.cancelled()}
+        reenviar_eventos()
+    else:
+        # Procesar cada video
+        for video_path, video_name, video_output_path in trabajos:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            
+            print("\n[ Extracción de FRAMES de vídeo ]")
+            print(f" - Procesando vídeo: {video_name}")
+            
+            results[video_name] = _extraer_video_seguro(
+                video_path, video_output_path, on_event=on_event, cancel_event=cancel_event, **opciones
+            )
+    
+    # Conservar el orden de selección en el resultado
+    return {video_name: results[video_name] for video_name in nombres if video_name in results}
+
+
+def unir_frames_en_video(frames_path: Union[str, Path], output_path: Union[str, Path] = None, fps: float = None,
+                         image_format: str = None, read_workers: int = 4, prefetch: int = 16,
+                         on_event: Callable = None, cancel_event: threading.Event = None,
+                         report: bool = False, encoder: str = 'opencv', encoder_options: dict = None,
+                         max_inflight_bytes: int = None, transforms=None, transform_batch: int = 16) -> bool:
+    """
+    Une una secuencia de frames en un archivo de video.
+    
+    Si la carpeta tiene índice (index.jsonl), los frames se toman de él sin recorrer el
+    directorio y las dimensiones se comprueban antes de empezar. Los frames guardados en
+    fragmentos tar se leen directamente de ellos, sin desempaquetar.
+    
+    Con transforms, los frames se transforman por lotes antes de codificarse. Una cadena
+    que termina en un tamaño fijo (resize con ancho y alto, letterbox) permite unir frames
+    de dimensiones distintas; sin ella, la unión se rechaza si el índice muestra tamaños
+    distintos y, sin índice, los frames de otro tamaño se omiten y se informa cuántos.
+    
+    Args:
+        frames_path: Ruta de la carpeta que contiene los frames
+        output_path: Ruta donde se guardará el video. Si es None, se usa la misma carpeta
+        fps: Frames por segundo del video resultante. Si es None, se usan los fps del video
+            original y cada frame se coloca en su marca de tiempo original (requiere índice;
+            sin él se usan 30 fps). Con un valor explícito cada frame se escribe una vez
+        image_format: Formato de los frames. Si es None, se usa el almacenamiento del índice
+            (o frames.raw / los fragmentos tar si existen) o se detecta a partir de los archivos
+        read_workers: Hilos que leen y decodifican frames por adelantado (1 = sin prefetch)
+        prefetch: Cantidad máxima de frames leídos por adelantado
+        on_event: Función que recibe VideoStartEvent, ProgressEvent (tras cada frame escrito)
+            y VideoSummaryEvent (con los tiempos de read, decode y mux)
+        cancel_event: Evento que, al activarse, detiene la unión y libera el escritor de video
+        report: Imprimir el resumen por etapas al terminar
+        encoder: Codificador de video: 'opencv' (cv2.VideoWriter), 'ffmpeg' (tubería a un
+            ffmpeg instalado) o 'auto'. Si no está disponible se usa OpenCV
+        encoder_options: Opciones del codificador (fourcc para OpenCV; codec, preset, crf y
+            threads para ffmpeg)
+        max_inflight_bytes: Bytes máximos de frames leídos por adelantado y aún no escritos;
+            limita la lectura anticipada según el tamaño de los frames (None = solo prefetch)
+        transforms: Transformaciones aplicadas a los frames antes de codificarlos (texto,
+            lista de pasos o TransformChain). Si dejan un solo canal se vuelve a BGR
+        transform_batch: Frames por lote al aplicar las transformaciones
+    
+    Returns:
+        bool: True si el proceso fue exitoso, False en caso contrario
+    """
+    timer = StageTimer()
+    presupuesto = MemoryBudget(max_inflight_bytes)
+    emitir = on_event if on_event is not None else (lambda evento: None)
+    lector = None
+    try:
+        frames_path = Path(frames_path)
+        
+        # Verificar que la carpeta existe
+        if not frames_path.exists() or not frames_path.is_dir():
+            print(f"Error: La carpeta {frames_path} no existe o no es válida")
+            return False
+            
+        # Usar el almacén raw si existe (vistas sin copia, sin decodificar) o listar los archivos de frames
+        # Elegir el almacenamiento: el del índice, o frames.raw / fragmentos tar / archivos sueltos
+        raw_path = frames_path / RAW_FILENAME
+        indice = leer_indice(frames_path)
+        if indice is not None and image_format is not None and \
+                (indice[0].get('storage') != 'images' or indice[0].get('image_format') != image_format):
+            indice = None
+        almacen = indice[0].get('storage') if indice is not None else None
+        if almacen is None and image_format is None:
+            if raw_path.exists():
+                almacen = 'raw'
+            elif (frames_path / ARCHIVE_INDEX_FILENAME).exists():
+                almacen = 'archive'
+        usar_raw = almacen == 'raw'
+        
+        if usar_raw:
+            _, frames = leer_frames_raw(raw_path)
+            leer = lambda frame: frame
+            if indice is not None and len(indice[1]) != len(frames):
+                indice = None
+        elif almacen == 'archive':
+            lector = ArchiveFrameReader(frames_path)
+            nombres = [entrada['file'] for entrada in indice[1]] if indice is not None else lector.names()
+            frames = [Path(nombre) for nombre in nombres]
+            leer = lambda frame_path: _leer_imagen(frame_path, timer, lector)
+        else:
+            if indice is not None and almacen == 'images':
+                frames = [frames_path / entrada['file'] for entrada in indice[1]]
+            else:
+                indice = None
+                frames = _listar_frames(frames_path, image_format)
+            leer = lambda frame_path: _leer_imagen(frame_path, timer)
+        if len(frames) == 0:
+            print(f"Error: No se encontraron frames en la carpeta {frames_path}")
+            return False
+        
+        # Los codificadores de video necesitan BGR: un almacén raw en escala de grises se convierte
+        cadena = crear_cadena(transforms)
+        if usar_raw and frames.ndim == 3:
+            cadena = TransformChain((cadena.pasos if cadena is not None else []) + [ToBGR()])
+        elif cadena is not None:
+            cadena = cadena.with_bgr_output()
+        
+        if indice is not None:
+            # Las dimensiones se conocen de antemano: todos los frames deben coincidir tras las transformaciones
+            formas = {tuple(entrada['shape']) for entrada in indice[1]}
+            salidas = {(cadena.output_shape(forma) if cadena is not None else forma)[:2] for forma in formas}
+            if len(salidas) > 1:
+                print(f"Error: Los frames tienen dimensiones distintas: {sorted(formas)}"
+                      + (" (usa una transformación resize o letterbox con tamaño fijo)" if cadena is None else ""))
+                return False
+            height, width = salidas.pop()
+            frame_bytes = max(_bytes_por_lectura((forma[0], forma[1], 3), cadena) for forma in formas)
+        else:
+            # Leer el primer frame para obtener dimensiones
+            first_frame = leer(frames[0])
+            if first_frame is None:
+                print(f"Error: No se pudo leer el primer frame")
+                return False
+            height, width = (cadena.output_shape(first_frame.shape) if cadena is not None else first_frame.shape)[:2]
+            frame_bytes = _bytes_por_lectura((first_frame.shape[0], first_frame.shape[1], 3), cadena)
+        
+        # Por defecto se conserva la cadencia original: fps del video y marcas de tiempo del índice
+        if fps is None and indice is not None and indice[0].get('fps'):
+            fps = indice[0]['fps']
+            repeticiones = repeticiones_por_tiempo(indice[0], indice[1], fps)
+        else:
+            fps = fps or 30
+            # Repetir los frames guardados en lugar de duplicados omitidos
+            repeticiones = _leer_repeticiones(frames_path, frames, usar_raw)
+        
+        # Si no se especifica ruta de salida, usar la misma carpeta
+        if output_path is None:
+            output_path = frames_path / f"output_{fps:g}fps.mp4"
+        else:
+            output_path = Path(output_path)
+            
+        # Crear el escritor de video
+        out = crear_encoder(encoder, output_path, fps, (width, height), **(encoder_options or {}))
+        
+        total_frames = sum(repeticiones)
+        print(f"\n[ Uniendo frames en video ]")
+        print(f" - Carpeta de origen: {frames_path}")
+        print(f" - Total frames: {total_frames}")
+        print(f" - FPS objetivo: {fps}")
+        print(f" - Resolución: {width}x{height}")
+        if cadena is not None:
+            print(f" - Transformaciones: {cadena.describe()} (lotes de {transform_batch} frames)")
+        print(f" - Codificador: {out.description}")
+        emitir(VideoStartEvent('join', frames_path.name, total_frames, fps))
+        
+        # Leer los frames por adelantado en paralelo (el almacén raw no necesita decodificar)
+        if usar_raw or read_workers <= 1:
+            fuente = (leer(frame_path) for frame_path in frames)
+            reserva_previa = 0
+        else:
+            # Con transformaciones, la reserva de cada lectura pasa a la etapa de lotes
+            fuente = _precargar_frames(frames, leer, read_workers, prefetch, presupuesto, frame_bytes,
+                                       transferir=cadena is not None)
+            reserva_previa = frame_bytes
+        pares = zip(repeticiones, fuente)
+        if cadena is not None:
+            pares = _transformar_por_lotes(pares, cadena, transform_batch, timer, presupuesto, reserva_previa)
+        
+        # Procesar cada frame
+        written_count = 0
+        omitidos = 0
+        cancelado = False
+        try:
+            for veces, frame in pares:
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelado = True
+                    break
+                if frame is None:
+                    continue
+                if frame.shape[:2] != (height, width):
+                    print(f" - Frame omitido por dimensiones distintas: {frame.shape[1]}x{frame.shape[0]}")
+                    omitidos += 1
+                    continue
+                for _ in range(veces):
+                    with timer.measure('mux'):
+                        out.write(frame)
+                    written_count += 1
+                    
+                    # Mostrar progreso cada 100 frames
+                    if written_count % 100 == 0:
+                        print(f"(OK) Procesando frame {written_count}/{total_frames}")
+                    emitir(ProgressEvent('join', frames_path.name, written_count, total_frames, timer.elapsed))
+        finally:
+            # Liberar recursos (con ffmpeg, esperar a que termine de codificar)
+            inicio = time.perf_counter()
+            out.close()
+            timer.add('mux', time.perf_counter() - inicio, calls=0)
+        
+        resumen = VideoSummaryEvent('join', frames_path.name, written_count, timer.elapsed, timer.stages(), cancelado,
+                                    presupuesto.peak)
+        if report:
+            print(formatear_resumen(resumen))
+        emitir(resumen)
+        if cancelado:
+            print(f"\n(!) Unión cancelada tras {written_count} frames.")
+            return False
+        if omitidos:
+            print(f"\n(!) Se omitieron {omitidos} frames con dimensiones distintas a {width}x{height}; "
+                  "una transformación resize o letterbox con tamaño fijo los incluiría")
+        
+        print(f"\n(OK) Video creado exitosamente en: {output_path}")
+        return True
+    except Exception as e:
+        print(f"Error durante la creación del video: {str(e)}")
+        return False
+    finally:
+        # Los fragmentos tar se cierran también si la unión termina antes de crear el codificador
+        if lector is not None:
+            lector.close()
+
+
+def transformar_video(video_path: Union[str, Path], output_path: Union[str, Path] = None,
+                      transform: Callable = None, fps: float = None, frame_interval: int = 1,
+                      on_event: Callable = None, report: bool = False, encoder: str = 'opencv',
+                      encoder_options: dict = None) -> bool:
+    """
+    Decodifica un video, aplica opcionalmente una función a cada frame y lo escribe
+    directamente en un nuevo video, sin archivos de frames intermedios.
+    
+    Solo hay un frame en memoria a la vez, por lo que el consumo es constante sin
+    importar la duración del video.
+    
+    Args:
+        video_path: Ruta del video de entrada
+        output_path: Ruta del video resultante. Si es None, se crea "<nombre>_procesado.mp4"
+            junto al video de entrada
+        transform: Función frame -> frame aplicada a cada frame. Si devuelve None, el frame se descarta;
+            un frame en escala de grises se convierte a BGR, y todos deben tener las dimensiones del primero
+        fps: Frames por segundo del video resultante. Si es None, se usan los del video de entrada
+        frame_interval: Intervalo de frames a procesar (1 = todos los frames)
+        on_event: Función que recibe VideoStartEvent, ProgressEvent y VideoSummaryEvent
+            (con los tiempos de decode, transform y mux)
+        report: Imprimir el resumen por etapas al terminar
+        encoder: Codificador de video ('opencv', 'ffmpeg' o 'auto'), como en unir_frames_en_video
+        encoder_options: Opciones del codificador
+    
+    Returns:
+        bool: True si el proceso fue exitoso, False en caso contrario
+    """
+    timer = StageTimer()
+    emitir = on_event if on_event is not None else (lambda evento: None)
+    video_path = Path(video_path)
+    if output_path is None:
+        output_path = video_path.with_name(f"{video_path.stem}_procesado.mp4")
+    else:
+        output_path = Path(output_path)
+    
+    video = cv2.VideoCapture(str(video_path))
+    out = None
+    try:
+        # Verificar si el video se abrió correctamente
+        if not video.isOpened():
+            print(f"Error al abrir el video: {video_path}")
+            return False
+        
+        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        if fps is None:
+            fps = video.get(cv2.CAP_PROP_FPS) or 30
+        
+        print("\n[ Procesando vídeo en streaming ]")
+        print(f" - Vídeo de origen: {video_path}")
+        print(f" - Total frames en el video: {total_frames}")
+        print(f" - FPS objetivo: {fps}")
+        emitir(VideoStartEvent('transform', video_path.stem, total_frames, fps))
+        
+        written_count = 0
+        a_bgr = ToBGR()
+        for frame_count, _, frame in _iterar_captura(video, frame_interval, timer=timer):
+            if transform is not None:
+                with timer.measure('transform'):
+                    frame = transform(frame)
+            if frame is None:
+                continue
+            
+            # Los codificadores descartan en silencio los frames de un solo canal
+            if frame.ndim == 2 or frame.shape[2] == 1:
+                frame = a_bgr.apply(frame.reshape(1, *frame.shape[:2]))[0]
+            
+            # Crear el escritor con las dimensiones del primer frame resultante (el resto debe coincidir)
+            if out is None:
+                height, width = frame.shape[:2]
+                out = crear_encoder(encoder, output_path, fps, (width, height), **(encoder_options or {}))
+                print(f" - Resolución: {width}x{height}")
+                print(f" - Codificador: {out.description}")
+            elif frame.shape[:2] != (height, width):
+                raise ValueError(f"El frame {frame_count} mide {frame.shape[1]}x{frame.shape[0]}, "
+                                 f"distinto de los {width}x{height} del video")
+            with timer.measure('mux'):
+                out.write(frame)
+            written_count += 1
+            
+            # Mostrar progreso cada 100 frames
+            if written_count % 100 == 0:
+                print(f"(OK) Procesando frame {frame_count + 1}/{total_frames}")
+            emitir(ProgressEvent('transform', video_path.stem, frame_count + 1, total_frames, timer.elapsed))
+        
+        if out is not None:
+            # Esperar a que el codificador termine (tiempo de mux sin contar como frame)
+            inicio = time.perf_counter()
+            out.close()
+            timer.add('mux', time.perf_counter() - inicio, calls=0)
+        
+        resumen = VideoSummaryEvent('transform', video_path.stem, written_count, timer.elapsed, timer.stages())
+        if report:
+            print(formatear_resumen(resumen))
+        emitir(resumen)
+        
+        if out is None:
+            print(f"Error: No se escribió ningún frame para {video_path}")
+            return False
+        
+        print(f"\n(OK) Video creado exitosamente en: {output_path}")
+        return True
+    except Exception as e:
+        print(f"Error durante el procesamiento del video: {str(e)}")
+        return False
+    finally:
+        # Liberar recursos
+        video.release()
+        if out is not None:
+            out.close()
@@ -0,0 +1,161 @@
+# encoders.py
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Union, Tuple, List
+
+from utils import importar_perezoso
+
+cv2 = importar_perezoso('cv2')
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Codificadores de video intercambiables para la unión de frames
+'''
+class OpenCVEncoder:
+    """Codifica con cv2.VideoWriter (siempre disponible)."""
+
+    name = 'opencv'
+
+    def __init__(self, output_path: Union[str, Path], fps: float, size: Tuple[int, int], fourcc: str = 'mp4v'):
+        """
+        Args:
+            output_path: Ruta del video resultante
+            fps: Frames por segundo
+            size: (ancho, alto) de los frames
+            fourcc: Código de cuatro caracteres del códec
+        """
+        self.description = f"{self.name} ({fourcc})"
+        self._writer = cv2.VideoWriter(str(output_path), cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if not self._writer.isOpened():
+            raise IOError(f"OpenCV no pudo abrir el escritor de video para {output_path}")
+
+    @staticmethod
+    def available() -> bool:
+        return True
+
+    def write(self, frame):
+        self._writer.write(frame)
+
+    def close(self):
+        self._writer.release()
+
+
+class FFmpegEncoder:
+    """
+    Envía los frames BGR sin comprimir por stdin a un ffmpeg instalado en el sistema,
+    que codifica en sus propios hilos (por defecto H.264 con libx264).
+    """
+
+    name = 'ffmpeg'
+
+    def __init__(self, output_path: Union[str, Path], fps: float, size: Tuple[int, int], codec: str = 'libx264',
+                 preset: str = 'medium', crf: int = 23, threads: int = 0, ffmpeg_path: str = None):
+        """
+        Args:
+            output_path: Ruta del video resultante
+            fps: Frames por segundo
+            size: (ancho, alto) de los frames
+            codec: Códec de ffmpeg (libx264, libx265, libvpx-vp9, ...)
+            preset: Preset de velocidad/compresión del códec (None = no se indica)
+            crf: Factor de calidad constante (None = no se indica)
+            threads: Hilos de codificación de ffmpeg (0 = automático)
+            ffmpeg_path: Ruta del ejecutable (por defecto se busca en el PATH)
+        """
+        ffmpeg_path = ffmpeg_path or shutil.which('ffmpeg')
+        if ffmpeg_path is None:
+            raise FileNotFoundError("No se encontró ffmpeg en el PATH")
+        self.description = f"{self.name} ({codec})"
+
+        width, height = size
+        comando = [
+            ffmpeg_path, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}", '-r', str(fps), '-i', '-',
+            '-c:v', codec, '-threads', str(threads), '-pix_fmt', 'yuv420p',
+        ]
+        if preset is not None:
+            comando += ['-preset', preset]
+        if crf is not None:
+            comando += ['-crf', str(crf)]
+        if width % 2 or height % 2:
+            # yuv420p necesita dimensiones pares
+            comando += ['-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+        comando.append(str(output_path))
+
+        # Los errores de ffmpeg van a un archivo temporal para no bloquear el proceso con una tubería llena
+        self._errores = tempfile.TemporaryFile()
+        self._proceso = subprocess.Popen(comando, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._errores)
+
+    @staticmethod
+    def available() -> bool:
+        return shutil.which('ffmpeg') is not None
+
+    def write(self, frame):
+        try:
+            self._proceso.stdin.write(memoryview(frame).cast('B') if frame.flags['C_CONTIGUOUS'] else frame.tobytes())
+        except BrokenPipeError:
+            # ffmpeg terminó antes de tiempo: el motivo se informa en close()
+            self.close()
+
+    def close(self):
+        if self._proceso.stdin.closed:
+            return
+        try:
+            self._proceso.stdin.close()
+        except BrokenPipeError:
+            pass
+        codigo = self._proceso.wait()
+        self._errores.seek(0)
+        mensaje = self._errores.read().decode('utf-8', errors='replace').strip()
+        self._errores.close()
+        if codigo != 0:
+            raise IOError(f"ffmpeg terminó con código {codigo}: {mensaje}")
+
+
+ENCODERS = {
+    'opencv': OpenCVEncoder,
+    'ffmpeg': FFmpegEncoder,
+}
+
+
+def encoders_disponibles() -> List[str]:
+    """Nombres de los codificadores que se pueden usar en este equipo."""
+    return [nombre for nombre, clase in ENCODERS.items() if clase.available()]
+
+
+def crear_encoder(encoder: str, output_path: Union[str, Path], fps: float, size: Tuple[int, int], **opciones):
+    """
+    Crea el codificador pedido, o el de OpenCV si el pedido no está disponible.
+
+    Args:
+        encoder: 'opencv', 'ffmpeg' o 'auto' (ffmpeg si está instalado)
+        output_path: Ruta del video resultante
+        fps: Frames por segundo
+        size: (ancho, alto) de los frames
+        **opciones: Opciones del codificador (fourcc para OpenCV; codec, preset, crf,
+            threads y ffmpeg_path para ffmpeg)
+
+    Returns:
+        Codificador con write(frame), close() y description
+    """
+    if encoder == 'auto':
+        encoder = 'ffmpeg' if FFmpegEncoder.available() else 'opencv'
+    if encoder not in ENCODERS:
+        raise ValueError(f"Codificador no soportado: {encoder}. Opciones: {', '.join(ENCODERS)}")
+
+    clase = ENCODERS[encoder]
+    if clase is not OpenCVEncoder and not (opciones.get('ffmpeg_path') or clase.available()):
+        print(f" - El codificador {encoder} no está disponible, se usa OpenCV")
+        return OpenCVEncoder(output_path, fps, size)
+    if clase is OpenCVEncoder:
+        opciones = {clave: valor for clave, valor in opciones.items() if clave == 'fourcc'}
+    return clase(output_path, fps, size, **opciones)
@@ -0,0 +1,224 @@
+# events.py
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Tuple, Callable, Optional
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Eventos de progreso y medición de tiempos por etapa
+'''
+@dataclass
+class VideoStartEvent:
+    """Se emite al comenzar a procesar un video o una carpeta de frames."""
+    operation: str
+    name: str
+    total_frames: int
+    fps: float
+
+
+@dataclass
+class ProgressEvent:
+    """Se emite tras cada frame guardado (extracción) o escrito (unión)."""
+    operation: str
+    name: str
+    done: int
+    total: int
+    elapsed: float
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float:
+        """Segundos restantes estimados (None si no se puede estimar)."""
+        velocidad = self.frames_per_second
+        if velocidad <= 0 or self.total <= self.done:
+            return None
+        return (self.total - self.done) / velocidad
+
+
+@dataclass
+class VideoSummaryEvent:
+    """
+    Se emite al terminar un video con el total de frames, los tiempos de cada etapa y el
+    pico de bytes de frames retenidos entre etapas (colas, codificaciones pendientes,
+    lectura anticipada).
+    """
+    operation: str
+    name: str
+    frames: int
+    elapsed: float
+    stages: Dict[str, dict] = field(default_factory=dict)
+    cancelled: bool = False
+    peak_buffered_bytes: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class RunStartEvent:
+    """Se emite antes de procesar varios videos, con el trabajo total y los videos rechazados."""
+    operation: str
+    videos: int
+    total_frames: int
+    duration: float
+    rejected: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RunProgressEvent:
+    """Progreso conjunto de todos los videos de una ejecución, con su tiempo restante estimado."""
+    operation: str
+    done: int
+    total: int
+    elapsed: float
+    eta: Optional[float] = None
+
+
+class RunTracker:
+    """
+    Reenvía los eventos de cada video y los combina en RunProgressEvent (como máximo uno
+    cada `intervalo` segundos). El ETA pondera cada frame por sus píxeles, de modo que un
+    video 4K pendiente pesa más que uno de baja resolución con los mismos frames.
+
+    Se usa como on_event y es seguro entre hilos.
+    """
+
+    def __init__(self, operation: str, totales: Dict[str, Tuple[int, int]], on_event: Callable = None,
+                 intervalo: float = 0.5):
+        """
+        Args:
+            operation: Operación de la ejecución ('extract')
+            totales: Nombre de cada video -> (frames a procesar, píxeles por frame)
+            on_event: Función que recibe los eventos reenviados y los RunProgressEvent
+            intervalo: Segundos mínimos entre dos RunProgressEvent
+        """
+        self.operation = operation
+        self._on_event = on_event if on_event is not None else (lambda evento: None)
+        self._intervalo = intervalo
+        self._totales = {nombre: max(0, frames) for nombre, (frames, _) in totales.items()}
+        self._pixeles = {nombre: max(1, pixeles) for nombre, (_, pixeles) in totales.items()}
+        self._hechos = dict.fromkeys(totales, 0)
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._ultimo = 0.0
+
+    def progress(self) -> RunProgressEvent:
+        """Progreso conjunto actual."""
+        with self._lock:
+            return self._progreso()
+
+    def _progreso(self) -> RunProgressEvent:
+        elapsed = time.perf_counter() - self._inicio
+        trabajo = sum(self._totales[nombre] * self._pixeles[nombre] for nombre in self._totales)
+        hecho = sum(self._hechos[nombre] * self._pixeles[nombre] for nombre in self._hechos)
+        eta = None
+        if hecho > 0 and elapsed > 0:
+            eta = max(0.0, trabajo - hecho) / (hecho / elapsed)
+        return RunProgressEvent(self.operation, sum(self._hechos.values()), sum(self._totales.values()), elapsed, eta)
+
+    def __call__(self, evento):
+        self._on_event(evento)
+        nombre = getattr(evento, 'name', None)
+        if nombre not in self._hechos:
+            return
+        with self._lock:
+            if isinstance(evento, ProgressEvent):
+                if evento.total > 0:
+                    self._totales[nombre] = evento.total
+                self._hechos[nombre] = min(evento.done, self._totales[nombre]) if self._totales[nombre] else evento.done
+            elif isinstance(evento, VideoSummaryEvent):
+                # Terminado (o cancelado): ya no queda trabajo pendiente de este video
+                self._totales[nombre] = self._hechos[nombre] = max(self._hechos[nombre], self._totales[nombre])
+            else:
+                return
+            ahora = time.perf_counter()
+            terminado = isinstance(evento, VideoSummaryEvent)
+            if not terminado and ahora - self._ultimo < self._intervalo:
+                return
+            self._ultimo = ahora
+            self._on_event(self._progreso())
+
+
+class StageTimer:
+    """
+    Acumula el tiempo y la cantidad de llamadas de cada etapa (decode, encode, write, read, mux).
+
+    Es seguro entre hilos: las etapas ejecutadas en paralelo por varios hilos suman su
+    tiempo, por lo que el acumulado puede superar al tiempo de pared.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._segundos = {}
+        self._llamadas = {}
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Mide el bloque como una llamada de la etapa indicada."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - inicio)
+
+    def add(self, stage: str, seconds: float, calls: int = 1):
+        """Suma tiempo a una etapa."""
+        with self._lock:
+            self._segundos[stage] = self._segundos.get(stage, 0.0) + seconds
+            self._llamadas[stage] = self._llamadas.get(stage, 0) + calls
+
+    @property
+    def elapsed(self) -> float:
+        """Tiempo de pared desde la creación del medidor."""
+        return time.perf_counter() - self._inicio
+
+    def stages(self) -> Dict[str, dict]:
+        """Tiempo acumulado, llamadas y milisegundos medios por frame de cada etapa."""
+        with self._lock:
+            return {
+                stage: {
+                    'seconds': round(segundos, 6),
+                    'count': self._llamadas[stage],
+                    'per_frame_ms': round(segundos * 1000 / self._llamadas[stage], 4) if self._llamadas[stage] else 0.0,
+                }
+                for stage, segundos in self._segundos.items()
+            }
+
+
+def formatear_resumen(evento: VideoSummaryEvent) -> str:
+    """
+    Texto legible con el resumen por etapas de un video.
+
+    Args:
+        evento: Resumen emitido al terminar el video
+
+    Returns:
+        str: Varias líneas con frames, tiempo total y cada etapa
+    """
+    velocidad = evento.frames / evento.elapsed if evento.elapsed > 0 else 0.0
+    estado = " (cancelado)" if evento.cancelled else ""
+    lineas = [f"Resumen {evento.name}{estado}: {evento.frames} frames en {evento.elapsed:.2f}s ({velocidad:.1f} frames/s)"]
+    for stage, datos in evento.stages.items():
+        lineas.append(f"  - {stage}: {datos['seconds']:.3f}s acumulados, {datos['per_frame_ms']:.2f} ms/frame ({datos['count']} llamadas)")
+    if evento.peak_buffered_bytes:
+        lineas.append(f"  - pico de frames en memoria: {evento.peak_buffered_bytes / 1024 ** 2:.1f} MiB")
+    return "\n".join(lineas)
+
+
+def evento_a_dict(evento) -> dict:
+    """Serializa cualquier evento como diccionario con su tipo en la clave 'event'."""
+    return {'event': type(evento).__name__, **asdict(evento)}
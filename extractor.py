@@ -1,15 +1,16 @@
 # extractor.py
-import os
-import re
-import cv2
-from pathlib import Path
-from typing import Union, List
+import time
+import queue
+import threading
+from typing import List, Callable
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter.scrolledtext import ScrolledText
 
-from utils import verificar_rutas_almacenamiento
+from core import extraer_frames, unir_frames_en_video
+from cache import CACHE_DIR
+from events import VideoStartEvent, ProgressEvent, VideoSummaryEvent, RunStartEvent, RunProgressEvent
 
 
 
@@ -21,179 +22,89 @@ from utils import verificar_rutas_almacenamiento
 
 
 '''
->>> Funciones utilitarias
+>>> Funciones para interacción con UI
 '''
-def extraer_frames(video_paths: Union[str, List[str]], frame_interval: int = 1) -> dict:
+def _ejecutar_en_segundo_plano(root, trabajo: Callable, al_mensaje: Callable, intervalo_ms: int = 100):
     """
-    Extrae frames de uno o varios videos, creando carpetas específicas para cada uno.
+    Ejecuta un trabajo pesado en un hilo y entrega sus mensajes en el hilo principal de Tk.
     
-    Args:
-        video_paths: Puede ser una sola ruta (str) o una lista de rutas de videos
-        frame_interval: Intervalo de frames a guardar (1 = todos los frames)
+    El trabajo recibe una función publicar(mensaje) segura entre hilos. La cola se revisa
+    con root.after(), de modo que los widgets solo se modifican desde el hilo de Tk. Al
+    terminar se publica ('fin', resultado) o ('error', excepción).
     
-    Returns:
-        dict: Diccionario con el conteo de frames guardados por cada video
+    Args:
+        root: Ventana cuyo bucle de eventos revisa la cola
+        trabajo: Función trabajo(publicar) que se ejecuta en segundo plano
+        al_mensaje: Función llamada en el hilo de Tk con cada mensaje publicado
+        intervalo_ms: Cada cuántos milisegundos se revisa la cola
     """
-    # Si no se seleccionó ningún video, terminar
-    if not video_paths:
-        print("No se seleccionó ningún video.")
-        return {}
+    cola = queue.Queue()
     
-    # Convertir entrada única a lista para procesamiento uniforme
-    if isinstance(video_paths, str):
-        video_paths = [video_paths]
-    
-    # Verificar ruta base de almacenamiento
-    storage_path = verificar_rutas_almacenamiento()
-    base_output_path = Path(storage_path)
+    def ejecutar():
+        try:
+            cola.put(('fin', trabajo(cola.put)))
+        except Exception as e:
+            cola.put(('error', e))
     
-    # Diccionario para almacenar resultados
-    results = {}
+    def revisar_cola():
+        try:
+            while True:
+                mensaje = cola.get_nowait()
+                al_mensaje(mensaje)
+                if mensaje[0] in ('fin', 'error'):
+                    return
+        except queue.Empty:
+            pass
+        root.after(intervalo_ms, revisar_cola)
     
-    # Procesar cada video
-    for video_path in video_paths:
-        # Obtener nombre del video sin extensión para crear la carpeta
-        video_name = Path(video_path).stem
-        
-        # Crear carpeta específica para este video
-        video_output_path = base_output_path / video_name
-        video_output_path.mkdir(parents=True, exist_ok=True)
-        
-        print("\n[ Extracción de FRAMES de vídeo ]")
-        print(f" - Procesando vídeo: {video_name}")
-        
-        # Abrir el video
-        video = cv2.VideoCapture(video_path)
-        
-        # Verificar si el video se abrió correctamente
-        if not video.isOpened():
-            print(f" - Error al abrir el video: {video_path}")
-            results[video_name] = 0
-            continue
-        
-        # Obtener información del video
-        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = video.get(cv2.CAP_PROP_FPS)
-        
-        print(f" - Total frames en el video: {total_frames}")
-        print(f" - FPS: {fps}\n")
-        
-        frame_count = 0
-        saved_count = 0
-        
-        while True:
-            # Leer el siguiente frame
-            success, frame = video.read()
-            
-            if not success:
-                break
-                
-            # Guardar frame según el intervalo especificado
-            if frame_count % frame_interval == 0:
-                # Generar nombre del archivo
-                frame_filename = video_output_path / f"frame_{frame_count:06d}.png"
-                
-                # Guardar el frame como PNG
-                cv2.imwrite(str(frame_filename), frame)
-                saved_count += 1
-                
-                # Mostrar progreso
-                if saved_count % 100 == 0:
-                    print(f"(OK) Frames guardados para {video_name}: {saved_count}")
-            
-            frame_count += 1
-        
-        # Liberar recursos
-        video.release()
-        
-        print(f"\n(OK) Proceso completado para {video_name}.")
-        print(f"Se guardaron {saved_count} frames en {video_output_path}")
-        results[video_name] = saved_count
-    return results
+    threading.Thread(target=ejecutar, daemon=True).start()
+    root.after(intervalo_ms, revisar_cola)
 
 
-def unir_frames_en_video(frames_path: Union[str, Path], output_path: Union[str, Path] = None, fps: int = 30) -> bool:
+def _crear_receptor_de_eventos(publicar: Callable, intervalo: float = 0.1) -> Callable:
     """
-    Une una secuencia de frames en un archivo de video.
-    
-    Args:
-        frames_path: Ruta de la carpeta que contiene los frames
-        output_path: Ruta donde se guardará el video. Si es None, se usa la misma carpeta
-        fps: Frames por segundo del video resultante
-    
-    Returns:
-        bool: True si el proceso fue exitoso, False en caso contrario
+    Crea un callback on_event que publica ('evento', evento). Los ProgressEvent se publican
+    como máximo una vez cada `intervalo` segundos por video (y siempre al completar); el
+    resto de eventos se publican siempre.
     """
-    try:
-        frames_path = Path(frames_path)
-        
-        # Verificar que la carpeta existe
-        if not frames_path.exists() or not frames_path.is_dir():
-            print(f"Error: La carpeta {frames_path} no existe o no es válida")
-            return False
-            
-        # Listar todos los archivos PNG en la carpeta
-        frames = sorted(frames_path.glob("frame_*.png"))
-        if not frames:
-            print(f"Error: No se encontraron frames en la carpeta {frames_path}")
-            return False
-            
-        # Leer el primer frame para obtener dimensiones
-        first_frame = cv2.imread(str(frames[0]))
-        if first_frame is None:
-            print(f"Error: No se pudo leer el primer frame")
-            return False
-            
-        height, width = first_frame.shape[:2]
-        
-        # Si no se especifica ruta de salida, usar la misma carpeta
-        if output_path is None:
-            output_path = frames_path / f"output_{fps}fps.mp4"
-        else:
-            output_path = Path(output_path)
-            
-        # Crear el escritor de video
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
-        
-        total_frames = len(frames)
-        print(f"\n[ Uniendo frames en video ]")
-        print(f" - Carpeta de origen: {frames_path}")
-        print(f" - Total frames: {total_frames}")
-        print(f" - FPS objetivo: {fps}")
-        print(f" - Resolución: {width}x{height}")
-        
-        # Procesar cada frame
-        for i, frame_path in enumerate(frames, 1):
-            frame = cv2.imread(str(frame_path))
-            if frame is not None:
-                out.write(frame)
-                
-                # Mostrar progreso cada 100 frames
-                if i % 100 == 0:
-                    print(f"(OK) Procesando frame {i}/{total_frames}")
-        
-        # Liberar recursos
-        out.release()
-        
-        print(f"\n(OK) Video creado exitosamente en: {output_path}")
-        return True
-    except Exception as e:
-        print(f"Error durante la creación del video: {str(e)}")
-        return False
-
-
-
-
-
-
-
-
+    ultimos = {}
+    
+    def on_event(evento):
+        if isinstance(evento, ProgressEvent):
+            ahora = time.monotonic()
+            if ahora - ultimos.get(evento.name, 0.0) < intervalo and evento.done < evento.total:
+                return
+            ultimos[evento.name] = ahora
+        publicar(('evento', evento))
+    return on_event
+
+
+def _formatear_progreso(evento: ProgressEvent) -> str:
+    """Texto de progreso con frames procesados, frames/s y tiempo restante estimado."""
+    texto = f"{evento.name}: {evento.done}/{evento.total} frames · {evento.frames_per_second:.1f} frames/s"
+    if evento.eta is not None:
+        texto += f" · ETA {evento.eta:.0f}s"
+    return texto
+
+
+def _formatear_progreso_global(evento: RunProgressEvent) -> str:
+    """Sufijo con el progreso y el tiempo restante de toda la ejecución."""
+    texto = f" · total {evento.done}/{evento.total}"
+    if evento.eta is not None:
+        texto += f" · ETA total {evento.eta:.0f}s"
+    return texto
+
+
+def _formatear_resumen_corto(evento: VideoSummaryEvent) -> str:
+    """Línea de log con el total de frames, la velocidad y la etapa más costosa."""
+    velocidad = evento.frames / evento.elapsed if evento.elapsed > 0 else 0.0
+    texto = f"{evento.name}: {evento.frames} frames en {evento.elapsed:.1f}s ({velocidad:.1f} frames/s)"
+    if evento.stages:
+        etapa, datos = max(evento.stages.items(), key=lambda item: item[1]['seconds'])
+        texto += f" · etapa más lenta: {etapa} ({datos['per_frame_ms']:.1f} ms/frame)"
+    return texto
 
 
-'''
->>> Funciones para interacción con UI
-'''
 def opcion_seleccionar_videos():
     """Función para seleccionar videos desde una ventana modal."""
 
@@ -203,42 +114,98 @@ def opcion_seleccionar_videos():
         video_paths = filedialog.askopenfilenames(title='Selecciona los videos para extraer frames', filetypes=filetypes)
         return list(video_paths)
 
+    def escribir_log(texto: str):
+        """Agrega una línea al área de log manteniéndola no editable."""
+        log_area.configure(state='normal')  # Habilitar el área de log para escribir en ella
+        log_area.insert(tk.END, texto + "\n")
+        log_area.see(tk.END)
+        log_area.configure(state='disabled')  # Deshabilitar el área de log para evitar edición
+
     def process_videos(parent):
-        """Función que procesa los videos seleccionados."""
+        """Función que procesa los videos seleccionados en segundo plano."""
         videos = seleccionar_videos()
-        if videos:
-            log_area.configure(state='normal')  # Habilitar el área de log para escribir en ella
-            log_area.insert(tk.END, f"Procesando {len(videos)} video(s)...\n")
-            log_area.see(tk.END)
-            parent.update_idletasks()  # Actualizar la interfaz para mostrar el log
-
-            # Procesar cada video y mostrar los resultados en tiempo real
-            resultados = extraer_frames(videos)
-            for name, count in resultados.items():
-                log_area.insert(tk.END, f"{name}: {count} frames extraídos\n")
-                log_area.see(tk.END)
-                parent.update_idletasks()  # Actualizar para cada entrada de log
-            
-            # Mostrar resumen en ventana emergente
-            summary = "\n".join(f"{name}: {count} frames extraídos" for name, count in resultados.items())
-            messagebox.showinfo("Resumen de extracción", f"Resumen de extracción:\n{summary}")
-            log_area.insert(tk.END, "Extracción completada.\n")
-            log_area.see(tk.END)
-            parent.update_idletasks()
-        else:
+        if not videos:
             messagebox.showinfo("Selección vacía", "No se seleccionó ningún video.")
-            log_area.configure(state='normal')
-            log_area.insert(tk.END, "No se seleccionó ningún video.\n")
-            log_area.see(tk.END)
-            parent.update_idletasks()
+            escribir_log("No se seleccionó ningún video.")
+            parent.destroy()  # Cerrar la ventana modal
+            return
         
-        log_area.configure(state='disabled')  # Deshabilitar el área de log para evitar edición
-        parent.destroy()  # Cerrar la ventana modal al terminar
+        escribir_log(f"Procesando {len(videos)} video(s)...")
+        select_button.config(state='disabled')
+        cache_check.config(state='disabled')
+        cancel_button.config(state='normal')
+        en_curso['activo'] = True
+        progreso_global = {'texto': ''}
+        
+        # La caché es opcional: calcula el hash de cada video y guarda una segunda copia de los frames
+        cache_dir = CACHE_DIR if usar_cache.get() else None
+        
+        def trabajo(publicar):
+            return extraer_frames(
+                videos,
+                cache_dir=cache_dir,
+                on_event=_crear_receptor_de_eventos(publicar),
+                cancel_event=cancelar
+            )
+        
+        def al_mensaje(mensaje):
+            tipo = mensaje[0]
+            if tipo == 'evento':
+                evento = mensaje[1]
+                if isinstance(evento, RunStartEvent):
+                    if evento.rejected:
+                        escribir_log(f"Videos rechazados (no se pueden abrir): {', '.join(evento.rejected)}")
+                    if evento.videos > 1:
+                        escribir_log(f"{evento.videos} videos, {evento.total_frames} frames en total")
+                elif isinstance(evento, RunProgressEvent):
+                    if len(videos) > 1:
+                        progreso_global['texto'] = _formatear_progreso_global(evento)
+                elif isinstance(evento, VideoStartEvent):
+                    escribir_log(f"Extrayendo {evento.name}...")
+                elif isinstance(evento, ProgressEvent):
+                    status_label.config(text=_formatear_progreso(evento) + progreso_global['texto'], fg=colors['accent'])
+                elif isinstance(evento, VideoSummaryEvent):
+                    escribir_log(_formatear_resumen_corto(evento))
+                return
+            
+            en_curso['activo'] = False
+            if tipo == 'error':
+                messagebox.showerror("Error", f"Error durante la extracción: {mensaje[1]}")
+            else:
+                resultados = mensaje[1]
+                for name, count in resultados.items():
+                    escribir_log(f"{name}: {count} frames extraídos")
+                
+                # Mostrar resumen en ventana emergente
+                summary = "\n".join(f"{name}: {count} frames extraídos" for name, count in resultados.items())
+                titulo = "Extracción cancelada" if cancelar.is_set() else "Resumen de extracción"
+                escribir_log("Extracción cancelada." if cancelar.is_set() else "Extracción completada.")
+                messagebox.showinfo(titulo, f"{titulo}:\n{summary}")
+            parent.destroy()  # Cerrar la ventana modal al terminar
+        
+        _ejecutar_en_segundo_plano(parent, trabajo, al_mensaje)
+
+    def cancelar_proceso():
+        """Solicita detener la extracción en curso; las capturas se liberan al salir del bucle."""
+        cancelar.set()
+        cancel_button.config(state='disabled')
+        status_label.config(text="Cancelando...", fg=colors['text_secondary'])
+
+    def cerrar_ventana():
+        """Cierra la ventana, cancelando antes el trabajo en curso si lo hay."""
+        if en_curso['activo']:
+            cancelar_proceso()
+        else:
+            root.destroy()
+
+    # Estado del trabajo en segundo plano
+    cancelar = threading.Event()
+    en_curso = {'activo': False}
 
     # Crear ventana modal
     root = tk.Toplevel()
     root.title("Seleccionar Videos")
-    root.geometry("500x400")
+    root.geometry("500x430")
     root.minsize(400, 300)
     root.transient()
     root.grab_set()
@@ -294,6 +261,23 @@ def opcion_seleccionar_videos():
     )
     instruction_label.grid(row=2, column=0, sticky="ew")
 
+    # Casilla para reutilizar extracciones anteriores del mismo video (desactivada por defecto)
+    usar_cache = tk.BooleanVar(value=False)
+    cache_check = tk.Checkbutton(
+        main_frame,
+        text="Usar caché de extracciones (Storage/Cache)",
+        variable=usar_cache,
+        font=("Helvetica", 9),
+        bg=colors['bg'],
+        fg=colors['text_secondary'],
+        selectcolor=colors['secondary_bg'],
+        activebackground=colors['bg'],
+        activeforeground=colors['text'],
+        relief="flat",
+        highlightthickness=0
+    )
+    cache_check.grid(row=3, column=0, sticky="w", pady=(5, 0))
+
     # Botón para seleccionar videos
     select_button = tk.Button(
         main_frame,
@@ -308,7 +292,7 @@ def opcion_seleccionar_videos():
         cursor="hand2",
         pady=10
     )
-    select_button.grid(row=3, column=0, pady=20, sticky="ew")
+    select_button.grid(row=4, column=0, pady=20, sticky="ew")
 
     # Etiqueta de estado (para mostrar mensajes)
     status_label = tk.Label(
@@ -318,11 +302,28 @@ def opcion_seleccionar_videos():
         bg=colors['bg'],
         fg=colors['text_secondary'],
     )
-    status_label.grid(row=4, column=0, sticky="ew", pady=(10, 0))
+    status_label.grid(row=5, column=0, sticky="ew", pady=(10, 0))
+
+    # Botón para cancelar la extracción en curso
+    cancel_button = tk.Button(
+        main_frame,
+        text="Cancelar",
+        command=cancelar_proceso,
+        font=("Helvetica", 10),
+        bg=colors['secondary_bg'],
+        fg=colors['text'],
+        activebackground=colors['bg'],
+        activeforeground=colors['text'],
+        relief="flat",
+        cursor="hand2",
+        state='disabled'
+    )
+    cancel_button.grid(row=6, column=0, pady=(10, 0), sticky="ew")
+    root.protocol("WM_DELETE_WINDOW", cerrar_ventana)
 
     # Ajustar el diseño para que sea responsive
     main_frame.grid_rowconfigure(0, weight=1)  # El área de log puede expandirse
-    main_frame.grid_rowconfigure(3, weight=1)
+    main_frame.grid_rowconfigure(4, weight=1)
     main_frame.grid_columnconfigure(0, weight=1)
 
     # Configurar área de log como no editable inicialmente
@@ -334,12 +335,13 @@ def opcion_seleccionar_carpeta_y_fps():
 
     def procesar(parent, fps, folder):
         """Función que une frames en un video."""
+        # Sin valor se conservan los fps y la cadencia del video original
         try:
-            fps = int(fps_entry.get())
-            if fps <= 0:
+            fps = float(fps_entry.get()) if fps_entry.get().strip() else None
+            if fps is not None and fps <= 0:
                 raise ValueError("Los FPS deben ser un número positivo")
         except ValueError:
-            messagebox.showerror("Error", "FPS inválido. Ingrese un número positivo.")
+            messagebox.showerror("Error", "FPS inválido. Ingrese un número positivo o déjelo vacío.")
             return
         
         if not folder.get():
@@ -348,18 +350,53 @@ def opcion_seleccionar_carpeta_y_fps():
 
         # Notificar al usuario que el proceso ha comenzado
         status_label.config(text="Procesando video...", fg=colors['accent'])
-        parent.update_idletasks()  # Actualizar la interfaz para mostrar el mensaje
-
-        # Intentar unir frames y mostrar resultados
-        success = unir_frames_en_video(folder.get(), fps=fps)
-        if success:
-            messagebox.showinfo("Éxito", "Video creado exitosamente.")
+        process_button.config(state='disabled')
+        cancel_button.config(state='normal')
+        en_curso['activo'] = True
+        carpeta = folder.get()
+
+        def trabajo(publicar):
+            return unir_frames_en_video(
+                carpeta,
+                fps=fps,
+                on_event=_crear_receptor_de_eventos(publicar),
+                cancel_event=cancelar
+            )
+
+        def al_mensaje(mensaje):
+            tipo = mensaje[0]
+            if tipo == 'evento':
+                if isinstance(mensaje[1], ProgressEvent):
+                    status_label.config(text=_formatear_progreso(mensaje[1]), fg=colors['accent'])
+                return
+            
+            # Mostrar resultados
+            en_curso['activo'] = False
+            if tipo == 'fin' and mensaje[1]:
+                messagebox.showinfo("Éxito", "Video creado exitosamente.")
+            elif cancelar.is_set():
+                messagebox.showinfo("Cancelado", "Se canceló la creación del video.")
+            else:
+                messagebox.showerror("Error", "No se pudo crear el video.")
+            
+            # Restablecer el estado después del procesamiento
+            status_label.config(text="")
+            parent.destroy()  # Cerrar la ventana modal al terminar
+
+        _ejecutar_en_segundo_plano(parent, trabajo, al_mensaje)
+
+    def cancelar_proceso():
+        """Solicita detener la unión en curso; el escritor de video se libera al salir del bucle."""
+        cancelar.set()
+        cancel_button.config(state='disabled')
+        status_label.config(text="Cancelando...", fg=colors['text_secondary'])
+
+    def cerrar_ventana():
+        """Cierra la ventana, cancelando antes el trabajo en curso si lo hay."""
+        if en_curso['activo']:
+            cancelar_proceso()
         else:
-            messagebox.showerror("Error", "No se pudo crear el video.")
-        
-        # Restablecer el estado después del procesamiento
-        status_label.config(text="")
-        parent.destroy()  # Cerrar la ventana modal al terminar
+            root.destroy()
 
     def seleccionar_carpeta():
         """Función para seleccionar una carpeta y actualizar la entrada."""
@@ -367,6 +404,10 @@ def opcion_seleccionar_carpeta_y_fps():
         if carpeta:
             folder_var.set(carpeta)  # Mostrar la ruta seleccionada en el campo de entrada
 
+    # Estado del trabajo en segundo plano
+    cancelar = threading.Event()
+    en_curso = {'activo': False}
+
     # Crear ventana modal
     root = tk.Toplevel()
     root.title("Unir Frames en Video")
@@ -441,7 +482,7 @@ def opcion_seleccionar_carpeta_y_fps():
     # FPS
     fps_label = tk.Label(
         main_frame,
-        text="FPS deseados:",
+        text="FPS deseados (vacío = original):",
         font=("Helvetica", 10),
         bg=colors['bg'],
         fg=colors['text_secondary']
@@ -457,7 +498,6 @@ def opcion_seleccionar_carpeta_y_fps():
         relief="flat",
         justify="center"
     )
-    fps_entry.insert(0, "30")  # Valor por defecto
     fps_entry.grid(row=2, column=1, sticky="w", padx=(10, 0))
 
     # Botón de proceso
@@ -486,6 +526,23 @@ def opcion_seleccionar_carpeta_y_fps():
     )
     status_label.grid(row=4, column=0, columnspan=3, pady=(10, 0))
 
+    # Botón para cancelar la unión en curso
+    cancel_button = tk.Button(
+        main_frame,
+        text="Cancelar",
+        command=cancelar_proceso,
+        font=("Helvetica", 10),
+        bg=colors['secondary_bg'],
+        fg=colors['text'],
+        activebackground=colors['bg'],
+        activeforeground=colors['text'],
+        relief="flat",
+        cursor="hand2",
+        state='disabled'
+    )
+    cancel_button.grid(row=5, column=0, columnspan=3, pady=(10, 0), sticky="ew")
+    root.protocol("WM_DELETE_WINDOW", cerrar_ventana)
+
     # Ajustar el diseño para que sea responsive
     for i in range(4):
         main_frame.grid_rowconfigure(i, weight=1)
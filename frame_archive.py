@@ -0,0 +1,197 @@
+# frame_archive.py
+import json
+import threading
+from pathlib import Path
+from typing import Union, List, Dict
+
+from utils import importar_perezoso
+
+# tarfile solo se necesita al escribir fragmentos
+tarfile = importar_perezoso('tarfile')
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Archivos tar fragmentados con índice de desplazamientos
+'''
+ARCHIVE_INDEX_FILENAME = 'archive.jsonl'
+
+_BLOQUE_TAR = 512
+
+
+def nombre_de_fragmento(shard: int) -> str:
+    """Nombre del archivo tar de un fragmento."""
+    return f"frames-{shard:06d}.tar"
+
+
+def leer_indice_de_archivo(frames_path: Union[str, Path]) -> List[dict]:
+    """
+    Lee el índice de desplazamientos de los fragmentos de una carpeta.
+
+    Args:
+        frames_path: Carpeta de frames del video
+
+    Returns:
+        List[dict]: Entradas con name, shard, offset y size, en orden de escritura
+            (lista vacía si no existe)
+    """
+    entradas = []
+    try:
+        with open(Path(frames_path) / ARCHIVE_INDEX_FILENAME, 'r', encoding='utf-8') as archivo:
+            for linea in archivo:
+                try:
+                    entradas.append(json.loads(linea))
+                except ValueError:
+                    # Última línea a medio escribir por una interrupción
+                    break
+    except OSError:
+        pass
+    return entradas
+
+
+class ArchiveFrameWriter:
+    """
+    Agrega frames ya codificados como miembros de archivos tar de solo anexado, abriendo
+    un fragmento nuevo al superar el tamaño o la cantidad de frames máxima.
+
+    Los fragmentos son tar estándar (se pueden inspeccionar con `tar -tf`) y cada miembro
+    se registra en archive.jsonl con su fragmento, desplazamiento y tamaño.
+    """
+
+    def __init__(self, frames_path: Union[str, Path], max_bytes: int = 1 << 30,
+                 max_frames: int = 10000, keep: int = 0):
+        """
+        Args:
+            frames_path: Carpeta de frames del video
+            max_bytes: Tamaño máximo de cada fragmento
+            max_frames: Cantidad máxima de frames por fragmento
+            keep: Al reanudar, cantidad de frames ya guardados que se conservan; se
+                descarta todo lo escrito después
+        """
+        self.frames_path = Path(frames_path)
+        self.max_bytes = max_bytes
+        self.max_frames = max(1, max_frames)
+        conservadas = leer_indice_de_archivo(frames_path)[:keep] if keep > 0 else []
+        self.count = len(conservadas)
+
+        # Eliminar los fragmentos posteriores al último frame conservado
+        ultimo_fragmento = conservadas[-1]['shard'] if conservadas else -1
+        for tar_path in self.frames_path.glob('frames-*.tar'):
+            if int(tar_path.stem.split('-')[1]) > ultimo_fragmento:
+                tar_path.unlink()
+
+        self._indice = open(self.frames_path / ARCHIVE_INDEX_FILENAME, 'w', encoding='utf-8')
+        for entrada in conservadas:
+            self._indice.write(json.dumps(entrada) + "\n")
+
+        # Continuar el último fragmento justo después del último miembro conservado
+        self._tar = None
+        if conservadas:
+            ultimo = conservadas[-1]
+            self._shard = ultimo['shard']
+            self._frames_en_fragmento = sum(1 for entrada in conservadas if entrada['shard'] == self._shard)
+            self._tar = open(self.frames_path / nombre_de_fragmento(self._shard), 'r+b')
+            self._tar.truncate(ultimo['offset'] + self._rellenado(ultimo['size']))
+            self._tar.seek(0, 2)
+        else:
+            self._shard = -1
+
+    @staticmethod
+    def _rellenado(size: int) -> int:
+        """Tamaño ocupado por los datos de un miembro, redondeado al bloque tar."""
+        return -(-size // _BLOQUE_TAR) * _BLOQUE_TAR
+
+    def _cerrar_fragmento(self):
+        """Escribe el final de archivo tar (dos bloques vacíos) y cierra el fragmento actual."""
+        if self._tar is not None:
+            self._tar.write(b'\0' * (2 * _BLOQUE_TAR))
+            self._tar.close()
+            self._tar = None
+
+    def _abrir_fragmento(self):
+        self._cerrar_fragmento()
+        self._shard += 1
+        self._frames_en_fragmento = 0
+        self._tar = open(self.frames_path / nombre_de_fragmento(self._shard), 'wb')
+
+    def write(self, name: str, datos: bytes):
+        """Agrega un frame codificado como miembro `name` del fragmento actual."""
+        cabecera = tarfile.TarInfo(name)
+        cabecera.size = len(datos)
+        cabecera_bytes = cabecera.tobuf(format=tarfile.USTAR_FORMAT)
+        ocupado = len(cabecera_bytes) + self._rellenado(len(datos))
+
+        if self._tar is None or self._frames_en_fragmento >= self.max_frames or \
+                (self._frames_en_fragmento and self._tar.tell() + ocupado > self.max_bytes):
+            self._abrir_fragmento()
+
+        self._tar.write(cabecera_bytes)
+        offset = self._tar.tell()
+        self._tar.write(datos)
+        self._tar.write(b'\0' * (self._rellenado(len(datos)) - len(datos)))
+        self._indice.write(json.dumps({'name': name, 'shard': self._shard, 'offset': offset, 'size': len(datos)}) + "\n")
+        self._frames_en_fragmento += 1
+        self.count += 1
+
+    def flush(self):
+        """Vuelca al disco los fragmentos y el índice (se llama antes de cada punto de control)."""
+        if self._tar is not None:
+            self._tar.flush()
+        self._indice.flush()
+
+    def close(self):
+        self._cerrar_fragmento()
+        self._indice.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ArchiveFrameReader:
+    """Lee frames codificados de los fragmentos tar por su nombre, sin desempaquetarlos."""
+
+    def __init__(self, frames_path: Union[str, Path]):
+        self.frames_path = Path(frames_path)
+        self.entradas = leer_indice_de_archivo(frames_path)
+        self._por_nombre: Dict[str, dict] = {entrada['name']: entrada for entrada in self.entradas}
+        self._archivos = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        """Nombres de los frames en orden de escritura."""
+        return [entrada['name'] for entrada in self.entradas]
+
+    def read(self, name: str) -> bytes:
+        """Devuelve los bytes codificados del frame `name` (None si no está en el archivo)."""
+        entrada = self._por_nombre.get(name)
+        if entrada is None:
+            return None
+        with self._lock:
+            archivo = self._archivos.get(entrada['shard'])
+            if archivo is None:
+                archivo = open(self.frames_path / nombre_de_fragmento(entrada['shard']), 'rb')
+                self._archivos[entrada['shard']] = archivo
+            archivo.seek(entrada['offset'])
+            return archivo.read(entrada['size'])
+
+    def close(self):
+        with self._lock:
+            for archivo in self._archivos.values():
+                archivo.close()
+            self._archivos.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
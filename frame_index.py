@@ -0,0 +1,150 @@
+# frame_index.py
+import json
+from pathlib import Path
+from typing import Union, Optional, Tuple, List, Callable
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Índice de frames extraídos (número, marca de tiempo, forma y archivo)
+'''
+INDEX_FILENAME = 'index.jsonl'
+
+# Versión del formato: la primera línea es la cabecera y cada línea siguiente un frame
+_VERSION_INDICE = 1
+
+
+def leer_indice(frames_path: Union[str, Path]) -> Optional[Tuple[dict, List[dict]]]:
+    """
+    Lee el índice de una carpeta de frames.
+
+    Args:
+        frames_path: Carpeta de frames del video
+
+    Returns:
+        tuple o None: (cabecera, entradas), o None si no existe o está dañado
+    """
+    index_path = Path(frames_path) / INDEX_FILENAME
+    try:
+        with open(index_path, 'r', encoding='utf-8') as archivo:
+            cabecera = json.loads(archivo.readline())
+            if cabecera.get('version') != _VERSION_INDICE:
+                return None
+            entradas = []
+            for linea in archivo:
+                try:
+                    entrada = json.loads(linea)
+                except ValueError:
+                    # Última línea a medio escribir por una interrupción
+                    break
+                if 'frame' in entrada:
+                    entradas.append(entrada)
+                else:
+                    # Datos finales de una extracción completa (end_ms)
+                    cabecera.update(entrada)
+    except (OSError, ValueError, AttributeError):
+        return None
+    # La extracción por segmentos escribe las entradas fuera de orden
+    entradas.sort(key=lambda entrada: entrada['frame'])
+    return cabecera, entradas
+
+
+def repeticiones_por_tiempo(cabecera: dict, entradas: List[dict], fps: float) -> List[int]:
+    """
+    Calcula cuántas veces escribir cada frame para que, a `fps` constantes, cada uno aparezca
+    en su marca de tiempo original. Corrige la deriva de fuentes con frame rate variable y
+    recupera la duración de los frames omitidos (intervalo, duplicados o escenas).
+
+    Si el contenedor no informó marcas de tiempo utilizables (todas iguales o decrecientes),
+    se derivan del número de frame y los fps de origen.
+
+    Args:
+        cabecera: Cabecera del índice (fps y frame_interval de la extracción)
+        entradas: Entradas del índice, en orden
+        fps: Frames por segundo del video resultante
+
+    Returns:
+        List[int]: Repeticiones de cada frame (un frame puede quedar en 0 si coincide en el
+            tiempo con el siguiente)
+    """
+    if not entradas:
+        return []
+    fps_origen = cabecera.get('fps') or fps
+    marcas = [entrada['ms'] for entrada in entradas]
+    if any(b < a for a, b in zip(marcas, marcas[1:])) or (len(marcas) > 1 and marcas[-1] == marcas[0]):
+        marcas = [entrada['frame'] * 1000 / fps_origen for entrada in entradas]
+
+    # El último frame dura hasta el final del video o, si no se conoce, un intervalo de extracción
+    fin = cabecera.get('end_ms') or marcas[-1] + cabecera.get('frame_interval', 1) * 1000 / fps_origen
+    posiciones = [round((marca - marcas[0]) * fps / 1000) for marca in marcas + [fin]]
+    posiciones[-1] = max(posiciones[-1], posiciones[-2] + 1)
+    return [max(0, siguiente - actual) for actual, siguiente in zip(posiciones, posiciones[1:])]
+
+
+class FrameIndexWriter:
+    """Agrega una línea JSON por frame guardado al índice de la carpeta de salida."""
+
+    def __init__(self, frames_path: Union[str, Path], cabecera: dict, last_frame: int = -1,
+                 keep: Callable[[int], bool] = None):
+        """
+        Args:
+            frames_path: Carpeta de frames del video
+            cabecera: Datos del video (fps, total_frames, frame_interval, storage, image_format)
+            last_frame: Al reanudar, último frame ya guardado; se conservan las entradas
+                hasta ese frame y se descartan las posteriores
+            keep: Alternativa a last_frame para reanudaciones no contiguas: indica si se
+                conserva la entrada de un número de frame
+        """
+        self.path = Path(frames_path) / INDEX_FILENAME
+        self.count = 0
+        if keep is None and last_frame >= 0:
+            keep = lambda frame_number: frame_number <= last_frame
+        conservadas = []
+        if keep is not None:
+            previo = leer_indice(frames_path)
+            if previo is not None:
+                conservadas = [entrada for entrada in previo[1] if keep(entrada['frame'])]
+
+        self._archivo = open(self.path, 'w', encoding='utf-8')
+        self._archivo.write(json.dumps({'version': _VERSION_INDICE, **cabecera}) + "\n")
+        for entrada in conservadas:
+            self._archivo.write(json.dumps(entrada) + "\n")
+        self.count = len(conservadas)
+
+    def append(self, frame_number: int, timestamp_ms: float, filename: Optional[str], shape: tuple):
+        """Registra un frame guardado (filename es None en el almacén raw)."""
+        self._archivo.write(json.dumps({
+            'frame': frame_number,
+            'ms': round(timestamp_ms, 3),
+            'file': filename,
+            'shape': list(shape),
+        }) + "\n")
+        self.count += 1
+
+    def flush(self):
+        """Vuelca al disco las entradas pendientes (se llama antes de cada punto de control)."""
+        self._archivo.flush()
+
+    def close(self, end_ms: float = None):
+        """Cierra el índice; end_ms (fin del video) solo se registra si la extracción terminó."""
+        if end_ms is not None:
+            self._archivo.write(json.dumps({'end_ms': round(end_ms, 3)}) + "\n")
+        self._archivo.close()
+
+    def discard(self):
+        """Cierra y elimina el índice (p. ej. si no cubre los frames ya guardados)."""
+        self.close()
+        self.path.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
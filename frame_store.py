@@ -0,0 +1,142 @@
+# frame_store.py
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Union, Tuple
+
+from utils import importar_perezoso
+
+np = importar_perezoso('numpy')
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Almacén de frames sin comprimir en un único archivo mapeado en memoria
+'''
+RAW_FILENAME = 'frames.raw'
+
+# Cabecera de tamaño fijo: firma + JSON con shape, dtype, count y fps (relleno con espacios)
+_MAGIC = b'SVFERAW1'
+_HEADER_SIZE = 4096
+
+
+def _escribir_cabecera(archivo, cabecera: dict):
+    """Escribe la cabecera de tamaño fijo al inicio del archivo."""
+    contenido = _MAGIC + json.dumps(cabecera).encode('utf-8')
+    if len(contenido) > _HEADER_SIZE:
+        raise ValueError("La cabecera del almacén raw excede el tamaño reservado")
+    archivo.seek(0)
+    archivo.write(contenido.ljust(_HEADER_SIZE, b' '))
+
+
+def leer_cabecera_raw(path: Union[str, Path]) -> dict:
+    """
+    Lee la cabecera de un almacén raw.
+
+    Args:
+        path: Ruta del archivo frames.raw
+
+    Returns:
+        dict: Cabecera con shape, dtype, count y fps
+    """
+    with open(path, 'rb') as archivo:
+        contenido = archivo.read(_HEADER_SIZE)
+    if not contenido.startswith(_MAGIC):
+        raise ValueError(f"El archivo {path} no es un almacén de frames raw")
+    return json.loads(contenido[len(_MAGIC):].decode('utf-8'))
+
+
+def leer_frames_raw(path: Union[str, Path]) -> Tuple[dict, np.ndarray]:
+    """
+    Abre un almacén raw como un arreglo de solo lectura mapeado en memoria.
+
+    Cada frames[i] es una vista sin copia sobre el archivo, lista para cv2.VideoWriter.write.
+
+    Args:
+        path: Ruta del archivo frames.raw
+
+    Returns:
+        tuple: (cabecera, arreglo de forma (count, alto, ancho, canales))
+    """
+    cabecera = leer_cabecera_raw(path)
+    if not cabecera['count']:
+        return cabecera, np.empty((0,), dtype=np.uint8)
+    shape = (cabecera['count'],) + tuple(cabecera['shape'])
+    frames = np.memmap(path, dtype=cabecera['dtype'], mode='r', offset=_HEADER_SIZE, shape=shape)
+    return cabecera, frames
+
+
+class RawFrameWriter:
+    """Agrega frames de igual forma a un único archivo sin comprimir mapeado en memoria."""
+
+    def __init__(self, path: Union[str, Path], fps: float = 0.0, capacity: int = 256):
+        self.path = Path(path)
+        self.fps = fps
+        self.count = 0
+        self.shape = None
+        self.dtype = None
+        self._capacity = max(1, capacity)
+        self._frames = None
+
+        # Crear el archivo con una cabecera vacía
+        with open(self.path, 'wb') as archivo:
+            _escribir_cabecera(archivo, self._cabecera())
+
+    def _cabecera(self) -> dict:
+        """Construye la cabecera con el estado actual del almacén."""
+        return {
+            'shape': list(self.shape) if self.shape else None,
+            'dtype': self.dtype,
+            'count': self.count,
+            'fps': self.fps,
+        }
+
+    def _reservar(self, capacity: int):
+        """Amplía el archivo y vuelve a mapearlo con la nueva capacidad."""
+        if self._frames is not None:
+            self._frames.flush()
+            self._frames = None
+        self._capacity = capacity
+        self._frames = np.memmap(
+            self.path, dtype=self.dtype, mode='r+', offset=_HEADER_SIZE,
+            shape=(self._capacity,) + self.shape
+        )
+
+    def write(self, frame: np.ndarray):
+        """Copia un frame al final del almacén."""
+        if self._frames is None:
+            self.shape = tuple(frame.shape)
+            self.dtype = str(frame.dtype)
+            self._reservar(self._capacity)
+        elif frame.shape != self.shape:
+            raise ValueError(f"Frame con forma {frame.shape} distinta a la del almacén {self.shape}")
+
+        if self.count == self._capacity:
+            self._reservar(self._capacity * 2)
+        self._frames[self.count] = frame
+        self.count += 1
+
+    def close(self):
+        """Vuelca los frames, recorta la capacidad sobrante y actualiza la cabecera."""
+        if self._frames is not None:
+            self._frames.flush()
+            self._frames = None
+
+        frame_bytes = int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize if self.shape else 0
+        with open(self.path, 'r+b') as archivo:
+            archivo.truncate(_HEADER_SIZE + self.count * frame_bytes)
+            _escribir_cabecera(archivo, self._cabecera())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
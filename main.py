@@ -1,9 +1,6 @@
 # main.py
 import tkinter as tk
 
-from extractor import opcion_seleccionar_videos
-from extractor import opcion_seleccionar_carpeta_y_fps
-
 
 
 
@@ -95,7 +92,7 @@ class MainApp:
             "Extraer Frames",
             "Selecciona uno o varios videos\npara extraer sus frames",
             "📹 Seleccionar Videos",
-            opcion_seleccionar_videos
+            self.abrir_extraccion
         )
         
         # Tarjeta 2: Unir Frames
@@ -105,9 +102,19 @@ class MainApp:
             "Unir Frames",
             "Une una secuencia de frames\npara crear un video",
             "🎞️ Seleccionar Frames",
-            opcion_seleccionar_carpeta_y_fps
+            self.abrir_union
         )
         
+    def abrir_extraccion(self):
+        """Abre la ventana de extracción (los módulos de procesamiento se cargan al usarla)"""
+        from extractor import opcion_seleccionar_videos
+        opcion_seleccionar_videos()
+        
+    def abrir_union(self):
+        """Abre la ventana de unión de frames (los módulos de procesamiento se cargan al usarla)"""
+        from extractor import opcion_seleccionar_carpeta_y_fps
+        opcion_seleccionar_carpeta_y_fps()
+        
     def create_card(self, parent, row, column, title, description, button_text, command):
         """Crea una tarjeta con título, descripción y botón"""
         # Frame de la tarjeta
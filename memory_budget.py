@@ -0,0 +1,80 @@
+# memory_budget.py
+import threading
+from typing import Optional
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Presupuesto de memoria para los frames en vuelo
+'''
+class MemoryBudget:
+    """
+    Contabiliza los bytes de los frames decodificados que esperan entre etapas (colas de
+    escritura, codificaciones pendientes, lectura anticipada) y frena a quien los produce
+    cuando superan el máximo.
+
+    Un frame mayor que el presupuesto se admite si no hay ningún otro en vuelo, para que
+    el trabajo avance siempre. Es seguro entre hilos.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_bytes: Bytes máximos en vuelo (None = sin límite, solo se mide el pico)
+        """
+        self.max_bytes = max_bytes
+        self._condicion = threading.Condition()
+        self._en_vuelo = 0
+        self._pico = 0
+
+    def _cabe(self, nbytes: int) -> bool:
+        return self.max_bytes is None or self._en_vuelo == 0 or self._en_vuelo + nbytes <= self.max_bytes
+
+    def _reservar(self, nbytes: int):
+        self._en_vuelo += nbytes
+        self._pico = max(self._pico, self._en_vuelo)
+
+    def acquire(self, nbytes: int):
+        """
+        Reserva nbytes, esperando a que otros hilos liberen memoria si no caben. Quien ya
+        tiene memoria reservada no debe esperar aquí por memoria que solo él liberaría.
+        """
+        with self._condicion:
+            self._condicion.wait_for(lambda: self._cabe(nbytes))
+            self._reservar(nbytes)
+
+    def try_acquire(self, nbytes: int) -> bool:
+        """Reserva nbytes solo si caben ahora; devuelve si se reservaron."""
+        with self._condicion:
+            if not self._cabe(nbytes):
+                return False
+            self._reservar(nbytes)
+            return True
+
+    def fits(self, nbytes: int) -> bool:
+        """Indica si nbytes cabrían ahora, sin reservarlos."""
+        with self._condicion:
+            return self._cabe(nbytes)
+
+    def release(self, nbytes: int):
+        """Devuelve al presupuesto los bytes de un frame que ya salió del pipeline."""
+        with self._condicion:
+            self._en_vuelo -= nbytes
+            self._condicion.notify_all()
+
+    @property
+    def inflight(self) -> int:
+        """Bytes reservados en este momento."""
+        return self._en_vuelo
+
+    @property
+    def peak(self) -> int:
+        """Máximo de bytes reservados a la vez desde la creación."""
+        return self._pico
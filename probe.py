@@ -0,0 +1,110 @@
+# probe.py
+import os
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union
+
+from utils import importar_perezoso
+
+cv2 = importar_perezoso('cv2')
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Sondeo de metadatos de videos antes de procesarlos
+'''
+@dataclass
+class VideoProbe:
+    """Metadatos de un video leídos sin decodificar frames."""
+    path: str
+    ok: bool
+    frames: int = 0
+    fps: float = 0.0
+    width: int = 0
+    height: int = 0
+    duration: float = 0.0
+    codec: str = ''
+    error: Optional[str] = None
+
+    @property
+    def pixels(self) -> int:
+        """Píxeles a decodificar en todo el video (estimación del costo de procesarlo)."""
+        return self.frames * self.width * self.height
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _fourcc_a_texto(fourcc: float) -> str:
+    """Convierte el código CAP_PROP_FOURCC en sus cuatro caracteres (vacío si no se informa)."""
+    codigo = int(fourcc)
+    texto = ''.join(chr((codigo >> (8 * i)) & 0xFF) for i in range(4))
+    return texto.strip('\0 ') if texto.isprintable() else ''
+
+
+def sondear_video(video_path: Union[str, Path]) -> VideoProbe:
+    """
+    Abre un video y lee su cantidad de frames, fps, resolución, duración y códec.
+
+    Se acepta cualquier entrada que OpenCV pueda abrir, no solo archivos: secuencias de
+    imágenes (img_%04d.png), URLs de streams o dispositivos de captura.
+
+    Args:
+        video_path: Ruta del video (o patrón, URL o dispositivo)
+
+    Returns:
+        VideoProbe: Metadatos; ok=False con el motivo en error si el video no se puede usar
+    """
+    video_path = str(video_path)
+    video = cv2.VideoCapture(video_path)
+    try:
+        if not video.isOpened():
+            # Un patrón o una URL no existen como archivo: solo se señala la falta de un archivo común
+            es_archivo = '%' not in video_path and '://' not in video_path
+            motivo = " (el archivo no existe)" if es_archivo and not os.path.exists(video_path) else ""
+            return VideoProbe(video_path, False, error=f"No se pudo abrir el video{motivo}")
+        frames = max(0, int(video.get(cv2.CAP_PROP_FRAME_COUNT)))
+        fps = video.get(cv2.CAP_PROP_FPS)
+        width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if width <= 0 or height <= 0:
+            return VideoProbe(video_path, False, frames, fps, error="El video no tiene una pista de imagen válida")
+        return VideoProbe(video_path, True, frames, fps, width, height,
+                          frames / fps if fps > 0 else 0.0, _fourcc_a_texto(video.get(cv2.CAP_PROP_FOURCC)))
+    finally:
+        video.release()
+
+
+def _sondear_sin_fallar(video_path: Union[str, Path]) -> VideoProbe:
+    """Sondea un video convirtiendo cualquier error en un sondeo fallido, para no detener a los demás."""
+    try:
+        return sondear_video(video_path)
+    except Exception as e:
+        return VideoProbe(str(video_path), False, error=f"No se pudo sondear el video: {e}")
+
+
+def sondear_videos(video_paths: List[Union[str, Path]], workers: int = 8) -> List[VideoProbe]:
+    """
+    Sondea varios videos en paralelo (abrir un contenedor es sobre todo espera de disco
+    y OpenCV libera el GIL mientras tanto). Un video que falla al sondearse queda rechazado
+    sin interrumpir el sondeo de los demás.
+
+    Args:
+        video_paths: Rutas de los videos
+        workers: Hilos de sondeo
+
+    Returns:
+        List[VideoProbe]: Metadatos de cada video, en el mismo orden
+    """
+    if len(video_paths) <= 1:
+        return [_sondear_sin_fallar(video_path) for video_path in video_paths]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(video_paths)))) as executor:
+        return list(executor.map(_sondear_sin_fallar, video_paths))
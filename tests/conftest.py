@@ -0,0 +1,29 @@
+# conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+# Los módulos del proyecto están en la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmark import generar_video
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Datos compartidos por las pruebas
+'''
+@pytest.fixture(scope='session')
+def video_sintetico(tmp_path_factory) -> Path:
+    """Video sintético de 320x240, 60 frames a 30 fps."""
+    path = tmp_path_factory.mktemp('videos') / 'sintetico.mp4'
+    generar_video(path, 320, 240, 60)
+    return path
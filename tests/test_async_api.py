@@ -0,0 +1,28 @@
+# test_async_api.py
+import asyncio
+
+from async_api import extraer_frames_async
+
+
+
+
+
+
+
+
+
+
+'''
+>>> API asíncrona
+'''
+def test_servicio_compartido_en_varios_bucles(video_sintetico, tmp_path):
+    """El servicio por defecto funciona en sucesivas llamadas a asyncio.run con más trabajos que hilos."""
+    async def extraer_tres(ronda: int):
+        return await asyncio.gather(*(
+            extraer_frames_async(str(video_sintetico), frame_interval=10, output_dir=tmp_path / f"{ronda}_{i}")
+            for i in range(3)
+        ))
+
+    for ronda in range(2):
+        resultados = asyncio.run(extraer_tres(ronda))
+        assert resultados == [{'sintetico': 6}] * 3
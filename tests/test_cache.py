@@ -0,0 +1,50 @@
+# test_cache.py
+from core import extraer_frames, unir_frames_en_video, DEDUP_FILENAME
+from events import VideoSummaryEvent
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Caché de extracciones
+'''
+def test_acierto_de_cache_en_carpeta_con_duplicados_previos(video_sintetico, tmp_path):
+    """Recuperar de la caché sobre una carpeta con una extracción con duplicados no mezcla sus archivos."""
+    cache_dir = tmp_path / 'cache'
+    assert extraer_frames(str(video_sintetico), output_dir=tmp_path / 'a', cache_dir=cache_dir) == {'sintetico': 60}
+
+    # Una extracción con duplicados en otra carpeta deja su mapa junto a los frames
+    salida = tmp_path / 'b'
+    extraer_frames(str(video_sintetico), output_dir=salida, dedup_threshold=255)
+    assert (salida / 'sintetico' / DEDUP_FILENAME).exists()
+
+    # La misma extracción sin duplicados se recupera de la caché en esa carpeta
+    assert extraer_frames(str(video_sintetico), output_dir=salida, cache_dir=cache_dir) == {'sintetico': 60}
+    assert not (salida / 'sintetico' / DEDUP_FILENAME).exists()
+
+    resumenes = []
+    assert unir_frames_en_video(salida / 'sintetico', tmp_path / 'salida.mp4', fps=30,
+                                on_event=lambda evento: isinstance(evento, VideoSummaryEvent) and resumenes.append(evento))
+    assert resumenes[0].frames == 60
+
+
+def test_los_frames_recuperados_son_independientes_de_la_cache(video_sintetico, tmp_path):
+    """Editar un frame recuperado de la caché no altera la entrada: la siguiente recuperación es intacta."""
+    cache_dir = tmp_path / 'cache'
+    extraer_frames(str(video_sintetico), frame_interval=10, output_dir=tmp_path / 'a', cache_dir=cache_dir)
+    original = (tmp_path / 'a' / 'sintetico' / 'frame_000000.png').read_bytes()
+
+    extraer_frames(str(video_sintetico), frame_interval=10, output_dir=tmp_path / 'b', cache_dir=cache_dir)
+    recuperado = tmp_path / 'b' / 'sintetico' / 'frame_000000.png'
+    assert recuperado.read_bytes() == original
+    with open(recuperado, 'r+b') as archivo:
+        archivo.write(b'\0' * 64)
+
+    extraer_frames(str(video_sintetico), frame_interval=10, output_dir=tmp_path / 'c', cache_dir=cache_dir)
+    assert (tmp_path / 'c' / 'sintetico' / 'frame_000000.png').read_bytes() == original
@@ -0,0 +1,80 @@
+# test_frame_archive.py
+import random
+import tarfile
+import threading
+
+import cv2
+import numpy as np
+
+from core import extraer_frames, unir_frames_en_video
+from events import ProgressEvent
+from frame_archive import ArchiveFrameReader, leer_indice_de_archivo, nombre_de_fragmento
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Almacén de fragmentos tar
+'''
+def test_acceso_aleatorio_por_indice_de_desplazamientos(video_sintetico, tmp_path):
+    """Cada frame del archivo se lee por su desplazamiento, en cualquier orden, igual que su PNG."""
+    extraer_frames(str(video_sintetico), output_dir=tmp_path / 'imagenes')
+    extraer_frames(str(video_sintetico), output_dir=tmp_path / 'archivo', storage='archive', shard_frames=7, workers=2)
+    carpeta = tmp_path / 'archivo' / 'sintetico'
+
+    entradas = leer_indice_de_archivo(carpeta)
+    assert len(entradas) == 60
+    assert len({entrada['shard'] for entrada in entradas}) == 9
+
+    nombres = [entrada['name'] for entrada in entradas]
+    random.Random(0).shuffle(nombres)
+    with ArchiveFrameReader(carpeta) as lector:
+        for nombre in nombres:
+            frame = cv2.imdecode(np.frombuffer(lector.read(nombre), np.uint8), cv2.IMREAD_COLOR)
+            assert np.array_equal(frame, cv2.imread(str(tmp_path / 'imagenes' / 'sintetico' / nombre)))
+        assert lector.read('frame_999999.png') is None
+
+
+def test_fragmentos_son_tar_validos(video_sintetico, tmp_path):
+    """Los fragmentos se pueden listar con tar y sus miembros coinciden con el índice."""
+    extraer_frames(str(video_sintetico), frame_interval=3, output_dir=tmp_path, storage='archive', shard_frames=8)
+    carpeta = tmp_path / 'sintetico'
+    entradas = leer_indice_de_archivo(carpeta)
+    for shard in sorted({entrada['shard'] for entrada in entradas}):
+        with tarfile.open(carpeta / nombre_de_fragmento(shard)) as fragmento:
+            miembros = {miembro.name: miembro for miembro in fragmento.getmembers()}
+        for entrada in entradas:
+            if entrada['shard'] == shard:
+                assert miembros[entrada['name']].offset_data == entrada['offset']
+                assert miembros[entrada['name']].size == entrada['size']
+
+
+def test_archivo_cancelado_se_reanuda_y_se_une(video_sintetico, tmp_path):
+    """Una extracción a fragmentos cancelada se completa al reanudar y la unión lee todos sus frames."""
+    cancelar = threading.Event()
+    vistos = []
+
+    def on_event(evento):
+        if isinstance(evento, ProgressEvent):
+            vistos.append(evento)
+            if len(vistos) >= 25:
+                cancelar.set()
+
+    parcial = extraer_frames(str(video_sintetico), output_dir=tmp_path, storage='archive', shard_frames=10,
+                             cancel_event=cancelar, on_event=on_event)
+    assert 0 < parcial['sintetico'] < 60
+    assert extraer_frames(str(video_sintetico), output_dir=tmp_path, storage='archive', shard_frames=10) == {'sintetico': 60}
+    nombres = [entrada['name'] for entrada in leer_indice_de_archivo(tmp_path / 'sintetico')]
+    assert nombres == [f"frame_{numero:06d}.png" for numero in range(60)]
+
+    salida = tmp_path / 'unido.mp4'
+    assert unir_frames_en_video(tmp_path / 'sintetico', salida, fps=30)
+    video = cv2.VideoCapture(str(salida))
+    assert int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == 60
+    video.release()
@@ -0,0 +1,63 @@
+# test_memory_budget.py
+import threading
+
+import pytest
+
+from core import extraer_frames, unir_frames_en_video
+from events import VideoSummaryEvent
+
+FRAME_BYTES = 320 * 240 * 3
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Presupuesto de memoria con transformaciones
+'''
+def _ejecutar_con_limite(funcion, *args, **kwargs):
+    """Ejecuta la función en otro hilo y falla si no termina (p. ej. por un bloqueo del presupuesto)."""
+    resultado = {}
+    hilo = threading.Thread(target=lambda: resultado.setdefault('valor', funcion(*args, **kwargs)), daemon=True)
+    hilo.start()
+    hilo.join(60)
+    assert not hilo.is_alive(), "El trabajo quedó bloqueado esperando al presupuesto"
+    return resultado['valor']
+
+
+@pytest.mark.parametrize('opciones', [
+    {'workers': 4},
+    {'segments': 3},
+    {'workers': 4, 'storage': 'archive'},
+])
+def test_extraer_con_presupuesto_de_un_frame(video_sintetico, tmp_path, opciones):
+    """Con un presupuesto de un frame, cada frame se transforma y escribe sin solaparse con otro."""
+    resumenes = []
+    resultado = _ejecutar_con_limite(extraer_frames, str(video_sintetico), output_dir=tmp_path, resume=False,
+                                     transforms='grayscale', max_inflight_bytes=FRAME_BYTES,
+                                     on_event=lambda evento: isinstance(evento, VideoSummaryEvent) and resumenes.append(evento),
+                                     **opciones)
+    assert resultado == {'sintetico': 60}
+    # Un frame en vuelo: la entrada y su salida en gris
+    assert resumenes[0].peak_buffered_bytes <= FRAME_BYTES + FRAME_BYTES // 3
+
+
+@pytest.mark.parametrize('read_workers', [1, 4])
+@pytest.mark.parametrize('presupuesto', [1, 2])
+def test_unir_con_presupuesto_ajustado(video_sintetico, tmp_path, read_workers, presupuesto):
+    """La unión con transformaciones y un presupuesto de uno o dos frames termina sin bloquearse."""
+    extraer_frames(str(video_sintetico), frame_interval=5, output_dir=tmp_path)
+    resumenes = []
+    resultado = _ejecutar_con_limite(unir_frames_en_video, tmp_path / 'sintetico', tmp_path / 'salida.mp4',
+                                     transforms='grayscale', read_workers=read_workers,
+                                     max_inflight_bytes=presupuesto * FRAME_BYTES,
+                                     on_event=lambda evento: isinstance(evento, VideoSummaryEvent) and resumenes.append(evento))
+    assert resultado is True
+    assert (tmp_path / 'salida.mp4').stat().st_size > 0
+    # Nunca más de un frame a la vez: lectura, copia apilada, salida en gris y su conversión a BGR
+    assert resumenes[0].peak_buffered_bytes <= 3 * FRAME_BYTES + FRAME_BYTES // 3
@@ -0,0 +1,31 @@
+# test_probe.py
+from pathlib import Path
+
+from core import extraer_frames
+from probe import sondear_videos
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Sondeo de videos
+'''
+def test_sondeo_acepta_rutas_path(video_sintetico, tmp_path):
+    """Las rutas Path se sondean igual que las de texto, también cuando no se pueden abrir."""
+    sondeos = sondear_videos([video_sintetico, tmp_path / 'falta.mp4'])
+    assert [sondeo.ok for sondeo in sondeos] == [True, False]
+    assert sondeos[0].frames == 60
+    assert 'no existe' in sondeos[1].error
+
+
+def test_video_fallido_no_detiene_a_los_demas(video_sintetico, tmp_path):
+    """Un video que no se puede abrir queda con 0 frames y el resto se extrae."""
+    resultado = extraer_frames([Path(tmp_path / 'falta.mp4'), str(video_sintetico)], frame_interval=10,
+                               output_dir=tmp_path / 'frames')
+    assert resultado == {'falta': 0, 'sintetico': 6}
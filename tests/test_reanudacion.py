@@ -0,0 +1,94 @@
+# test_reanudacion.py
+import threading
+from pathlib import Path
+
+from checkpoint import leer_manifiesto
+from core import extraer_frames
+from events import ProgressEvent
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Reanudación con manifiesto
+'''
+def _frames(carpeta: Path) -> dict:
+    """Contenido de cada archivo de frame de la carpeta, por nombre."""
+    return {ruta.name: ruta.read_bytes() for ruta in sorted(carpeta.glob('frame_*.png'))}
+
+
+def _contar_guardados(lista: list):
+    """Callback on_event que acumula los ProgressEvent en la lista."""
+    return lambda evento: isinstance(evento, ProgressEvent) and lista.append(evento)
+
+
+def _extraer_cancelando(video, salida: Path, tras: int, **opciones) -> dict:
+    """Extrae activando la cancelación después de `tras` frames guardados."""
+    cancelar = threading.Event()
+    vistos = []
+
+    def on_event(evento):
+        if isinstance(evento, ProgressEvent):
+            vistos.append(evento)
+            if len(vistos) >= tras:
+                cancelar.set()
+    return extraer_frames(str(video), output_dir=salida, cancel_event=cancelar, on_event=on_event, **opciones)
+
+
+def test_cancelar_y_reanudar_completa_la_extraccion(video_sintetico, tmp_path):
+    """Tras una cancelación, la siguiente ejecución extrae solo lo que falta y da el mismo resultado."""
+    assert extraer_frames(str(video_sintetico), output_dir=tmp_path / 'completa', workers=2) == {'sintetico': 60}
+
+    parcial = _extraer_cancelando(video_sintetico, tmp_path / 'reanudada', 20, workers=2)
+    assert 0 < parcial['sintetico'] < 60
+    assert not leer_manifiesto(tmp_path / 'reanudada' / 'sintetico')['complete']
+
+    guardados = []
+    assert extraer_frames(str(video_sintetico), output_dir=tmp_path / 'reanudada', workers=2,
+                          on_event=_contar_guardados(guardados)) == {'sintetico': 60}
+    assert len(guardados) == 60 - parcial['sintetico']
+    assert leer_manifiesto(tmp_path / 'reanudada' / 'sintetico')['complete']
+    assert _frames(tmp_path / 'reanudada' / 'sintetico') == _frames(tmp_path / 'completa' / 'sintetico')
+
+
+def test_extraccion_completa_no_se_repite(video_sintetico, tmp_path):
+    """Con el manifiesto completo y los frames en disco, la extracción termina sin decodificar."""
+    extraer_frames(str(video_sintetico), frame_interval=5, output_dir=tmp_path)
+    guardados = []
+    assert extraer_frames(str(video_sintetico), frame_interval=5, output_dir=tmp_path,
+                          on_event=_contar_guardados(guardados)) == {'sintetico': 12}
+    assert guardados == []
+
+
+def test_frames_danados_se_vuelven_a_extraer(video_sintetico, tmp_path):
+    """Un manifiesto completo no se da por bueno si faltan frames o están vacíos."""
+    extraer_frames(str(video_sintetico), frame_interval=5, output_dir=tmp_path)
+    carpeta = tmp_path / 'sintetico'
+    originales = _frames(carpeta)
+    (carpeta / 'frame_000030.png').write_bytes(b'')
+    (carpeta / 'frame_000050.png').unlink()
+
+    guardados = []
+    assert extraer_frames(str(video_sintetico), frame_interval=5, output_dir=tmp_path,
+                          on_event=_contar_guardados(guardados)) == {'sintetico': 12}
+    # Se conserva el prefijo válido (frames 0-25) y se extrae el resto
+    assert len(guardados) == 6
+    assert _frames(carpeta) == originales
+
+
+def test_ejecucion_sin_reanudar_cancelada_invalida_el_manifiesto(video_sintetico, tmp_path):
+    """Una ejecución con resume=False cancelada no deja en pie el 'complete' de la anterior."""
+    extraer_frames(str(video_sintetico), frame_interval=5, output_dir=tmp_path, dedup_threshold=0.5)
+    _extraer_cancelando(video_sintetico, tmp_path, 3, frame_interval=5, resume=False, dedup_threshold=0.5)
+    assert not leer_manifiesto(tmp_path / 'sintetico')['complete']
+
+    guardados = []
+    assert extraer_frames(str(video_sintetico), frame_interval=5, output_dir=tmp_path, dedup_threshold=0.5,
+                          on_event=_contar_guardados(guardados)) == {'sintetico': 12}
+    assert len(guardados) == 12
@@ -0,0 +1,69 @@
+# test_segmentos.py
+import threading
+from pathlib import Path
+
+import pytest
+
+from core import extraer_frames
+from events import ProgressEvent
+from frame_index import leer_indice
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Extracción por segmentos
+'''
+def _frames(carpeta: Path) -> dict:
+    """Contenido de cada archivo de frame de la carpeta, por nombre."""
+    return {ruta.name: ruta.read_bytes() for ruta in sorted(carpeta.glob('frame_*.png'))}
+
+
+def _cancelar_tras(frames: int, cancelar: threading.Event):
+    """Callback on_event que activa cancelar después de `frames` frames guardados."""
+    vistos = []
+
+    def on_event(evento):
+        if isinstance(evento, ProgressEvent):
+            vistos.append(evento)
+            if len(vistos) >= frames:
+                cancelar.set()
+    return on_event
+
+
+@pytest.fixture(scope='module')
+def secuencial(video_sintetico, tmp_path_factory) -> Path:
+    """Extracción secuencial de referencia (un frame de cada dos)."""
+    salida = tmp_path_factory.mktemp('secuencial')
+    assert extraer_frames(str(video_sintetico), frame_interval=2, output_dir=salida) == {'sintetico': 30}
+    return salida / 'sintetico'
+
+
+@pytest.mark.parametrize('opciones', [{'workers': 4}, {'segments': 3}, {'segments': 4, 'workers': 2}])
+def test_mismos_frames_que_la_extraccion_secuencial(video_sintetico, tmp_path, secuencial, opciones):
+    """Los hilos de escritura y los segmentos producen los mismos archivos y el mismo índice."""
+    assert extraer_frames(str(video_sintetico), frame_interval=2, output_dir=tmp_path, **opciones) == {'sintetico': 30}
+    assert _frames(tmp_path / 'sintetico') == _frames(secuencial)
+    assert leer_indice(tmp_path / 'sintetico')[1] == leer_indice(secuencial)[1]
+
+
+def test_segmentos_cancelados_se_reanudan(video_sintetico, tmp_path, secuencial):
+    """Una extracción por segmentos cancelada continúa cada segmento y termina igual que la secuencial."""
+    cancelar = threading.Event()
+    parcial = extraer_frames(str(video_sintetico), frame_interval=2, output_dir=tmp_path, segments=3,
+                             cancel_event=cancelar, on_event=_cancelar_tras(5, cancelar))
+    assert 0 < parcial['sintetico'] < 30
+
+    guardados = []
+    assert extraer_frames(str(video_sintetico), frame_interval=2, output_dir=tmp_path, segments=3,
+                          on_event=lambda evento: isinstance(evento, ProgressEvent) and guardados.append(evento)) == {'sintetico': 30}
+    # Solo se extraen los frames que faltaban
+    assert len(guardados) == 30 - parcial['sintetico']
+    assert _frames(tmp_path / 'sintetico') == _frames(secuencial)
+    assert leer_indice(tmp_path / 'sintetico')[1] == leer_indice(secuencial)[1]
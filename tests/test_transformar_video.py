@@ -0,0 +1,40 @@
+# test_transformar_video.py
+import cv2
+
+from core import transformar_video
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Procesamiento en streaming
+'''
+def test_frames_en_gris_se_escriben_en_bgr(video_sintetico, tmp_path):
+    """Una transformación que devuelve escala de grises produce un video con todos sus frames."""
+    salida = tmp_path / 'gris.mp4'
+    assert transformar_video(video_sintetico, salida, transform=lambda frame: cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    video = cv2.VideoCapture(str(salida))
+    assert int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == 60
+    video.release()
+
+
+def test_cambio_de_dimensiones_falla(video_sintetico, tmp_path):
+    """Un frame con dimensiones distintas a las del primero hace fallar el proceso."""
+    vistos = []
+
+    def recortar_desde_el_quinto(frame):
+        vistos.append(frame)
+        return frame if len(vistos) < 5 else frame[:100]
+
+    assert transformar_video(video_sintetico, tmp_path / 'salida.mp4', transform=recortar_desde_el_quinto) is False
+
+
+def test_sin_frames_escritos_falla(video_sintetico, tmp_path):
+    """Si la transformación descarta todos los frames no se da el video por creado."""
+    assert transformar_video(video_sintetico, tmp_path / 'salida.mp4', transform=lambda frame: None) is False
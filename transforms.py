@@ -0,0 +1,327 @@
+# transforms.py
+import math
+from typing import Union, List, Tuple, Optional
+
+from utils import importar_perezoso
+
+cv2 = importar_perezoso('cv2')
+np = importar_perezoso('numpy')
+
+
+
+
+
+
+
+
+
+
+'''
+>>> Transformaciones declarativas aplicadas a lotes de frames
+'''
+# Todos los pasos reciben y devuelven un lote apilado (N, alto, ancho[, canales]) de uint8.
+# Los pasos con view = True devuelven una vista de su entrada, sin memoria propia
+
+
+def _interpolacion(origen: Tuple[int, int], destino: Tuple[int, int]) -> int:
+    """INTER_AREA para reducir (sin aliasing) e INTER_LINEAR para ampliar."""
+    return cv2.INTER_AREA if destino[0] * destino[1] < origen[0] * origen[1] else cv2.INTER_LINEAR
+
+
+def _redimensionar_lote(lote, width: int, height: int):
+    """
+    Redimensiona cada frame del lote dentro de un único arreglo de salida. cv2.resize se
+    llama por frame: apilar los frames como canales de una sola imagen resultó más de diez
+    veces más lento.
+    """
+    if lote.shape[1:3] == (height, width):
+        return lote
+    interpolacion = _interpolacion(lote.shape[1:3], (height, width))
+    salida = np.empty((lote.shape[0], height, width) + lote.shape[3:], dtype=lote.dtype)
+    for i, frame in enumerate(lote):
+        cv2.resize(frame, (width, height), dst=salida[i], interpolation=interpolacion)
+    return salida
+
+
+class Crop:
+    """Recorta una región de interés (se ajusta a los bordes del frame)."""
+
+    name = 'crop'
+
+    def __init__(self, x: int, y: int, width: int, height: int):
+        self.x, self.y, self.width, self.height = int(x), int(y), int(width), int(height)
+        if self.width <= 0 or self.height <= 0 or self.x < 0 or self.y < 0:
+            raise ValueError(f"Recorte no válido: {self.x}:{self.y}:{self.width}:{self.height}")
+
+    view = True
+
+    def output_shape(self, shape: tuple) -> tuple:
+        alto = max(0, min(self.height, shape[0] - self.y))
+        ancho = max(0, min(self.width, shape[1] - self.x))
+        return (alto, ancho) + tuple(shape[2:])
+
+    def apply(self, lote):
+        # Vista sin copia: la cadena la hace contigua al final
+        recorte = lote[:, self.y:self.y + self.height, self.x:self.x + self.width]
+        if recorte.shape[1] == 0 or recorte.shape[2] == 0:
+            raise ValueError(f"El recorte {self.x}:{self.y}:{self.width}:{self.height} queda fuera del frame "
+                             f"de {lote.shape[2]}x{lote.shape[1]}")
+        return recorte
+
+    def to_dict(self) -> dict:
+        return {'op': self.name, 'x': self.x, 'y': self.y, 'width': self.width, 'height': self.height}
+
+
+class Resize:
+    """Escala a un tamaño dado; con una sola dimensión se conserva la proporción."""
+
+    name = 'resize'
+
+    def __init__(self, width: int = None, height: int = None):
+        self.width = int(width) if width not in (None, -1) else None
+        self.height = int(height) if height not in (None, -1) else None
+        if self.width is None and self.height is None:
+            raise ValueError("resize necesita width, height o ambos")
+
+    def _tamano(self, shape: tuple) -> Tuple[int, int]:
+        alto, ancho = shape[:2]
+        if self.width is not None and self.height is not None:
+            return self.width, self.height
+        if self.width is not None:
+            return self.width, max(1, round(alto * self.width / ancho))
+        return max(1, round(ancho * self.height / alto)), self.height
+
+    def output_shape(self, shape: tuple) -> tuple:
+        ancho, alto = self._tamano(shape)
+        return (alto, ancho) + tuple(shape[2:])
+
+    def apply(self, lote):
+        # cv2.resize acepta cada frame de una vista recortada sin copiarlo antes
+        ancho, alto = self._tamano(lote.shape[1:])
+        return _redimensionar_lote(lote, ancho, alto)
+
+    def to_dict(self) -> dict:
+        return {'op': self.name, 'width': self.width, 'height': self.height}
+
+
+class Grayscale:
+    """Convierte a escala de grises (un canal)."""
+
+    name = 'grayscale'
+
+    def output_shape(self, shape: tuple) -> tuple:
+        return tuple(shape[:2])
+
+    def apply(self, lote):
+        if lote.ndim == 3:
+            return lote
+        # Una sola llamada para todo el lote: los frames apilados forman una imagen muy alta
+        n, alto, ancho = lote.shape[:3]
+        lote = np.ascontiguousarray(lote)
+        codigo = cv2.COLOR_BGRA2GRAY if lote.shape[3] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(lote.reshape(n * alto, ancho, lote.shape[3]), codigo).reshape(n, alto, ancho)
+
+    def to_dict(self) -> dict:
+        return {'op': self.name}
+
+
+class ToBGR:
+    """Vuelve a tres canales BGR un lote en escala de grises (los codificadores de video lo necesitan)."""
+
+    name = 'bgr'
+
+    def output_shape(self, shape: tuple) -> tuple:
+        return tuple(shape[:2]) + (3,)
+
+    def apply(self, lote):
+        if lote.ndim == 4:
+            return lote
+        n, alto, ancho = lote.shape
+        lote = np.ascontiguousarray(lote)
+        return cv2.cvtColor(lote.reshape(n * alto, ancho), cv2.COLOR_GRAY2BGR).reshape(n, alto, ancho, 3)
+
+    def to_dict(self) -> dict:
+        return {'op': self.name}
+
+
+class Normalize:
+    """
+    Ajusta brillo y contraste: valor * alpha + beta con saturación. Sin alpha, estira el
+    rango de cada frame a 0-255 (normalización min-max por frame).
+    """
+
+    name = 'normalize'
+
+    def __init__(self, alpha: float = None, beta: float = 0.0):
+        self.alpha = float(alpha) if alpha is not None else None
+        self.beta = float(beta)
+
+    def output_shape(self, shape: tuple) -> tuple:
+        return tuple(shape)
+
+    def apply(self, lote):
+        lote = np.ascontiguousarray(lote)
+        if self.alpha is not None:
+            # Una sola llamada de OpenCV (aritmética saturada) sobre el lote visto como una imagen
+            plano = lote.reshape(lote.shape[0] * lote.shape[1], -1)
+            return cv2.addWeighted(plano, self.alpha, plano, 0, self.beta).reshape(lote.shape)
+        # Mínimo y máximo de todos los frames a la vez; el estiramiento se escribe frame a frame
+        # en la salida, sin arreglos temporales en coma flotante del tamaño del lote
+        eje = tuple(range(1, lote.ndim))
+        minimos = lote.min(axis=eje).astype(np.float64)
+        escalas = 255.0 / np.maximum(lote.max(axis=eje) - minimos, 1.0)
+        salida = np.empty_like(lote)
+        for i, frame in enumerate(lote):
+            cv2.convertScaleAbs(frame, dst=salida[i], alpha=escalas[i], beta=-minimos[i] * escalas[i])
+        return salida
+
+    def to_dict(self) -> dict:
+        return {'op': self.name, 'alpha': self.alpha, 'beta': self.beta}
+
+
+class Letterbox:
+    """Escala conservando la proporción hasta caber en un tamaño fijo y rellena el resto con un color."""
+
+    name = 'letterbox'
+
+    def __init__(self, width: int, height: int, color: int = 0):
+        self.width, self.height, self.color = int(width), int(height), int(color)
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError(f"Tamaño de letterbox no válido: {self.width}x{self.height}")
+
+    def output_shape(self, shape: tuple) -> tuple:
+        return (self.height, self.width) + tuple(shape[2:])
+
+    def apply(self, lote):
+        alto, ancho = lote.shape[1:3]
+        escala = min(self.width / ancho, self.height / alto)
+        nuevo_ancho = max(1, min(self.width, round(ancho * escala)))
+        nuevo_alto = max(1, min(self.height, round(alto * escala)))
+        escalado = _redimensionar_lote(lote, nuevo_ancho, nuevo_alto)
+        salida = np.full((lote.shape[0], self.height, self.width) + lote.shape[3:], self.color, dtype=lote.dtype)
+        x, y = (self.width - nuevo_ancho) // 2, (self.height - nuevo_alto) // 2
+        salida[:, y:y + nuevo_alto, x:x + nuevo_ancho] = escalado
+        return salida
+
+    def to_dict(self) -> dict:
+        return {'op': self.name, 'width': self.width, 'height': self.height, 'color': self.color}
+
+
+TRANSFORMS = {
+    'crop': Crop,
+    'resize': Resize,
+    'grayscale': Grayscale,
+    'bgr': ToBGR,
+    'normalize': Normalize,
+    'letterbox': Letterbox,
+}
+
+# Argumentos posicionales de cada paso en la notación de texto (crop=x:y:ancho:alto, resize=640x360, ...)
+_ARGUMENTOS = {
+    'crop': ('x', 'y', 'width', 'height'),
+    'resize': ('width', 'height'),
+    'normalize': ('alpha', 'beta'),
+    'letterbox': ('width', 'height', 'color'),
+}
+
+
+class TransformChain:
+    """Secuencia de pasos aplicada a lotes de frames apilados."""
+
+    def __init__(self, pasos: list):
+        self.pasos = list(pasos)
+
+    def apply(self, lote):
+        """Aplica todos los pasos a un lote (N, alto, ancho[, canales]) y devuelve un lote contiguo."""
+        for paso in self.pasos:
+            lote = paso.apply(lote)
+        return np.ascontiguousarray(lote)
+
+    def output_shape(self, shape: tuple) -> tuple:
+        """Forma de un frame de salida para un frame de entrada de la forma dada."""
+        shape = tuple(shape)
+        for paso in self.pasos:
+            shape = paso.output_shape(shape)
+        return shape
+
+    def working_bytes(self, shape: tuple) -> int:
+        """
+        Cota superior de los bytes que la cadena asigna por cada frame de la forma dada:
+        resultados de cada paso, copias contiguas de las vistas y la salida (sin contar el
+        frame de entrada ni la copia apilada del lote).
+        """
+        shape = tuple(shape)
+        total = 0
+        vista = False
+        for paso in self.pasos:
+            if vista and not getattr(paso, 'view', False):
+                total += math.prod(shape)
+            shape = paso.output_shape(shape)
+            vista = getattr(paso, 'view', False)
+            if not vista:
+                total += math.prod(shape)
+        if vista:
+            # La salida se hace contigua al final
+            total += math.prod(shape)
+        return total
+
+    def with_bgr_output(self) -> 'TransformChain':
+        """La misma cadena, terminada en BGR si alguno de sus pasos deja un solo canal."""
+        if any(isinstance(paso, Grayscale) for paso in self.pasos) and not isinstance(self.pasos[-1], ToBGR):
+            return TransformChain(self.pasos + [ToBGR()])
+        return self
+
+    def to_list(self) -> List[dict]:
+        return [paso.to_dict() for paso in self.pasos]
+
+    def describe(self) -> str:
+        return ' -> '.join(paso.name for paso in self.pasos)
+
+
+def _paso_desde_texto(texto: str):
+    """Convierte 'resize=640x360' o 'crop=0:0:640:360' en el paso correspondiente."""
+    nombre, _, valores = texto.strip().partition('=')
+    nombre = nombre.strip().lower()
+    if nombre not in TRANSFORMS:
+        raise ValueError(f"Transformación no soportada: {nombre}. Opciones: {', '.join(TRANSFORMS)}")
+    argumentos = {}
+    if valores:
+        partes = valores.replace('x', ':').split(':')
+        claves = _ARGUMENTOS.get(nombre, ())
+        if len(partes) > len(claves):
+            raise ValueError(f"Demasiados valores para {nombre}: {valores}")
+        try:
+            argumentos = {clave: float(parte) if nombre == 'normalize' else int(parte)
+                          for clave, parte in zip(claves, partes) if parte != ''}
+        except ValueError:
+            raise ValueError(f"Valores no válidos para {nombre}: {valores}") from None
+    return TRANSFORMS[nombre](**argumentos)
+
+
+def crear_cadena(transforms: Union[str, list, TransformChain, None]) -> Optional[TransformChain]:
+    """
+    Crea una cadena de transformaciones a partir de su descripción declarativa.
+
+    Args:
+        transforms: Texto con pasos separados por comas ("crop=0:0:1280:720,resize=640x-1,
+            grayscale,normalize,letterbox=640x480"), lista de pasos (textos o diccionarios
+            con 'op' y sus parámetros) o una cadena ya creada
+
+    Returns:
+        TransformChain o None si no hay pasos
+    """
+    if transforms is None or isinstance(transforms, TransformChain):
+        return transforms
+    if isinstance(transforms, str):
+        transforms = [texto for texto in transforms.split(',') if texto.strip()]
+    pasos = []
+    for paso in transforms:
+        if isinstance(paso, str):
+            pasos.append(_paso_desde_texto(paso))
+        else:
+            opciones = dict(paso)
+            nombre = opciones.pop('op', None)
+            if nombre not in TRANSFORMS:
+                raise ValueError(f"Transformación no soportada: {nombre}. Opciones: {', '.join(TRANSFORMS)}")
+            pasos.append(TRANSFORMS[nombre](**{clave: valor for clave, valor in opciones.items() if valor is not None}))
+    return TransformChain(pasos) if pasos else None
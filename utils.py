@@ -1,6 +1,7 @@
 # utils.py
 import os
 import platform
+import importlib
 
 
 
@@ -25,4 +26,29 @@ def limpiar_consola():
         os.system('cls')
     else:
         os.system('clear')
-    return ''
\ No newline at end of file
+    return ''
+
+
+class _ModuloPerezoso:
+    """Representa un módulo que se importa la primera vez que se accede a uno de sus atributos."""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def __getattr__(self, atributo):
+        if self._modulo is None:
+            self._modulo = importlib.import_module(self._nombre)
+        return getattr(self._modulo, atributo)
+
+
+def importar_perezoso(nombre):
+    """
+    Devuelve un sustituto del módulo que solo lo importa en su primer uso.
+
+    Útil para dependencias pesadas (cv2, numpy) que no todos los llamadores necesitan: los
+    módulos las declaran con esta función para que importarlos no las cargue, y así el
+    arranque de la interfaz y de la CLI (y cada subproceso de los benchmarks) solo paga su
+    importación cuando de verdad decodifica o codifica frames.
+    """
+    return _ModuloPerezoso(nombre)
\ No newline at end of file